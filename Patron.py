@@ -5,6 +5,32 @@
 
 from SimPy.Simulation import * 
 from random import randint, seed
+from heapq import heappush, heappop
+from lib.sampler import PopularitySampler
+from lib.waitline import WaitLine
+from lib.tracing import formatTime, levelNames, TRACE_OFF, TRACE_EVENTS, TRACE_VERBOSE
+from lib.tracing import ENTER_LINE, LINE_FULL, RETURN_SAME, NO_VENUE, CHOOSE_VENUE, WALK, ARRIVE, SERVE, SERVICE_TIME, LEAVE, LEAVE_PARK
+import lib.tracing as tracing
+from lib.linestats import LineStats, monitorLineMinutes
+from lib.replicate import replicate, replicateUntil, summarize
+from lib.columns import exportRun
+from lib.patrontable import PatronTable
+from lib.schedule import daySchedule, partySizes, largestParty
+from lib.hourly import HourlyMetrics, printHour, jsonLinesWriter
+from lib.livefeed import LiveFeed
+from lib.streams import RandomStreams
+import lib.park as park
+from lib.parallel import runParallelPark
+from lib.profiling import profiler, checkSimPy
+from lib.parklayout import loadLayout, defaultLayoutPath
+from lib.whatif import forkVariants
+from lib.queueing import estimatePark
+from functools import partial
+from array import array
+import argparse
+import json
+import os
+import random
 
 # Relevant Requirements 
 # (Monitors might be used to get some of these outputs)
@@ -33,256 +59,763 @@ from random import randint, seed
 # 0036 Each CSCI patron shall simulate a walk of 5 minutes between venues in separate areas.
 
 # Assumptions:
-# A patron must walk to a venue before it can know whether its line is full or not (This means that for Req. 0007, a patron will have to walk to every venue and find all lines to be full)
+# A patron never chooses a venue whose line is currently full (Req. 0020), but a line can fill up while the patron walks there
+# Req. 0007 is counted when every venue the patron has not already found full currently has a full line
 # Patrons never return to venue Vendor0 after leaving it
 # Venue Vendor0 is in its own separate area
 
+# A patron whose departure time has passed leaves the park the next time it is served or finds a line full
+# The whole day's arrival and departure times are sampled up front (lib/schedule.py)
+
 # Still need to implement:
-# Patrons arriving at the park at appropriate times, PatronGenerator class
-# Patrons leaving the park at appropriate times
 # What to do if venue Vendor0's line is full (probably make the line infinite?)
 # Need comments
 
+# "event": venues sleep until a patron joins the line, "poll": venues re-check the line every 0.01 minutes
+venueServingMode = "event"
+# "online": venues keep running line statistics in constant memory, "monitor": the line Level also records its full history
+venueStatisticsMode = "online"
+# Counters of the current simulated hour (lib/hourly.py), None unless an hourly report was asked for
+hourlyMetrics = None
+# Each patron's venue choice stream (lib/streams.py), None while every draw comes from the global generator
+patronStreams = None
+
+# A patron's counters and venues live in patronTable, indexed by patronId, with venues stored as venue ids.
+# The process itself only carries its id. In party mode one process moves a party of size patrons whose rows
+# are patronId .. patronId + size - 1. The party's venues are kept in the first row and every member's
+# counters are kept in the member's own row (Req. 0002 - Req. 0008).
 class Patron(Process):
 
-    def __init__(self, name):
-    	self.name = name
-    	self.nextVenue = venueVendor0 # Req. 0023
-    	self.lastVenue = venueVendor0
-    	self.numberVenuesVisited = 0 # Req. 0004, Req. 0005
-    	self.numberTimesNoAvailableVenue = 0 # Req. 0007
-    	self.numberEmptyLines = 0 # Req. 0008
-    	self.lineFull = False
-    	self.avoidVenues = []
+    def __init__(self, name, patronId, size = 1):
+    	self.patronId = patronId
+    	self.size = size
     	Process.__init__(self, name=name)
-    
+
     # This is the PEM
     def execute(self):
     	while True:
     		if (self.enterVenue()):
-    			yield put, self, self.nextVenue.lineLevel, 1
+    			yield put, self, venueTable[patronTable.nextVenue[self.patronId]].lineLevel, self.size
     			yield passivate, self
+    		if (now() >= patronTable.departureTime[self.patronId]): # Req. 0025 - Req. 0034
+    			if (tracing.level >= TRACE_EVENTS):
+    				tracing.record(now(), LEAVE_PARK, self, None)
+    			if (hourlyMetrics != None):
+    				hourlyMetrics.parkDeparture(now(), self.size)
+    			return
     		self.chooseNextVenue()
 
     		walkTime = self.walkToNextVenue()
     		yield hold, self, walkTime
-    		print (getTime() + " Patron " + self.name + " arrives at venue " + self.nextVenue.name)
+    		if (tracing.level >= TRACE_EVENTS):
+    			tracing.record(now(), ARRIVE, self, venueTable[patronTable.nextVenue[self.patronId]])
 
     def enterVenue(self):
-    	self.lastVenue = self.nextVenue
-
-    	if (self.nextVenue.lineLevel.amount < self.nextVenue.lineCapacity):
-    		print (getTime() + " Patron " + self.name + " has entered the line for venue " + self.nextVenue.name)
-    		self.nextVenue.waitQueue.append(self)
-    		self.numberVenuesVisited = self.numberVenuesVisited + 1 # Req. 0004, Req. 0005
-
-    		if (self.nextVenue.lineLevel.amount == 0): # Req. 0008
-    			self.numberEmptyLines = self.numberEmptyLines + 1
-    		self.avoidVenues = []
-    		self.lineFull = False
+    	patronId = self.patronId
+    	venue = venueTable[patronTable.nextVenue[patronId]]
+    	patronTable.lastVenue[patronId] = venue.venueId
+
+    	if (len(venue.waitQueue) + self.size <= venue.lineCapacity):
+    		if (tracing.level >= TRACE_EVENTS):
+    			tracing.record(now(), ENTER_LINE, self, venue)
+    		emptyLine = len(venue.waitQueue) == 0
+    		for member in range(patronId, patronId + self.size):
+    			if (emptyLine): # Req. 0008
+    				patronTable.emptyLines[member] = patronTable.emptyLines[member] + 1
+    			patronTable.venuesVisited[member] = patronTable.venuesVisited[member] + 1 # Req. 0004, Req. 0005
+    		venue.waitQueue.join(self, now(), self.size)
+    		if (hourlyMetrics != None):
+    			hourlyMetrics.join(now(), venue.venueId, emptyLine, self.size)
+    		venue.lineStats.change(now(), len(venue.waitQueue))
+    		if (len(venue.waitQueue) == venue.lineCapacity):
+    			venue.setLineFull(True)
+
+    		patronTable.avoidVenues[patronId] = None
+    		patronTable.lineFull[patronId] = False
     		return True
     	else:
-    		print (getTime() + " Patron " + self.name + " could not enter venue " + self.nextVenue.name + " because the line was full!")
-    		self.lineFull = True
+    		if (tracing.level >= TRACE_EVENTS):
+    			tracing.record(now(), LINE_FULL, self, venue)
+    		patronTable.lineFull[patronId] = True
+    		venue.lineStats.discourage(self.size)
+    		if (hourlyMetrics != None):
+    			hourlyMetrics.balk(now(), venue.venueId, self.size)
     		return False
 
     def chooseNextVenue(self):
-    	randomNumber = randint(1,100)
-    	if (randomNumber >= 1 and randomNumber <= 5 and self.lineFull == False and self.lastVenue != venueVendor0): # Req. 0021
-    		print (getTime() + " Patron " + self.name + " decided to return to the same venue, " + self.lastVenue.name + ", and begins walking there")	
+    	patronId = self.patronId
+    	lastVenue = venueTable[patronTable.lastVenue[patronId]]
+    	if (patronStreams != None):
+    		randomNumber = patronStreams.randint(patronId, 1, 100)
+    	else:
+    		randomNumber = randint(1,100)
+    	if (randomNumber >= 1 and randomNumber <= 5 and patronTable.lineFull[patronId] == False and lastVenue != venueVendor0): # Req. 0021
+    		if (tracing.level >= TRACE_EVENTS):
+    			tracing.record(now(), RETURN_SAME, self, lastVenue)
+    	else:
+    		avoidVenues = patronTable.avoidVenues[patronId]
+    		if (lastVenue != venueVendor0):
+    			if (avoidVenues == None):
+    				avoidVenues = []
+    				patronTable.avoidVenues[patronId] = avoidVenues
+    			avoidVenues.append(lastVenue.venueId)
+    		if (avoidVenues == None):
+    			avoidVenues = []
+
+    		# Venues this patron is avoiding are masked out of the sampler for this draw only
+    		for venueId in avoidVenues:
+    			venueSampler.mask(venueTable[venueId].sampleIndex)
+    		totalPopularity = venueSampler.total()
+
+    		if (totalPopularity == 0): # Req. 0007
+    			if (tracing.level >= TRACE_EVENTS):
+    				tracing.record(now(), NO_VENUE, self, None)
+    			for member in range(patronId, patronId + self.size):
+    				patronTable.noAvailableVenue[member] = patronTable.noAvailableVenue[member] + 1
+    			for venueId in avoidVenues:
+    				venueSampler.unmask(venueTable[venueId].sampleIndex)
+    			avoidVenues = []
+    			patronTable.avoidVenues[patronId] = None
+    			totalPopularity = venueSampler.total()
+
+    		if (totalPopularity == 0):
+    			# Every line in the park is full, so walk to a venue by popularity alone and hope for room on arrival
+    			nextVenue = self.chooseVenueIgnoringLines()
+    		else:
+    			if (patronStreams != None):
+    				randomNumber = patronStreams.randint(patronId, 1, totalPopularity)
+    			else:
+    				randomNumber = randint(1,totalPopularity)
+    			nextVenue = Venues[venueSampler.find(randomNumber)]
+
+    		for venueId in avoidVenues:
+    			venueSampler.unmask(venueTable[venueId].sampleIndex)
+    		patronTable.nextVenue[patronId] = nextVenue.venueId
+    		nextVenue.timesChosen = nextVenue.timesChosen + 1
+    		if (hourlyMetrics != None):
+    			hourlyMetrics.choose(now(), nextVenue.venueId)
+    		if (tracing.level >= TRACE_EVENTS):
+    			tracing.record(now(), CHOOSE_VENUE, self, nextVenue)
+
+    def chooseVenueIgnoringLines(self):
+    	totalPopularity = 0
+    	for venue in Venues:
+    		totalPopularity = totalPopularity + venue.popularity
+    	if (patronStreams != None):
+    		randomNumber = patronStreams.randint(self.patronId, 1, totalPopularity)
     	else:
-    		if (self.lastVenue != venueVendor0):
-    			self.avoidVenues.append(self.lastVenue)
-    		availableVenues = list(Venues)
-
-    		for venue in self.avoidVenues:
-    			availableVenues.remove(venue)
-
-    		totalPopularity = 0
-    		for venue in availableVenues:
-    			totalPopularity = totalPopularity + venue.popularity
-    		
     		randomNumber = randint(1,totalPopularity)
-    		currentPopularity = 0
-    		i = iter(availableVenues)
-    		venueFound = False
-    		
-    		while venueFound == False:
-    			currentVenue = next(i)
-    			currentPopularity = currentPopularity + currentVenue.popularity
-    			if (randomNumber <= currentPopularity):
-    				self.nextVenue = currentVenue
-    				venueFound = True
-    				currentVenue.timesChosen = currentVenue.timesChosen + 1
-    		print (getTime() + " Patron " + self.name + " has chosen " + self.nextVenue.name + " as the next venue and begins walking there")
+    	currentPopularity = 0
+    	for venue in Venues:
+    		currentPopularity = currentPopularity + venue.popularity
+    		if (randomNumber <= currentPopularity):
+    			return venue
 
     def walkToNextVenue(self):
-    	if (self.nextVenue.number[0] == self.lastVenue.number[0]):
-    		print ("        Patron " + self.name + " walks for 2 minutes to reach venue " + self.nextVenue.name)
-    		return 2 # Req. 0035
-    	else:
-    		print ("        Patron " + self.name + " walks for 5 minutes to reach venue " + self.nextVenue.name)
-    		return 5 # Req. 0036
-
-class VenueService(Process):
-    
-    def __init__(self, serviceTime):
-    	self.serviceTime = serviceTime
-    	Process.__init__(self,name="Venue Service")
-
-    def reactivatePatronAfterDelay(self, patron):
-    	print ("        Venue " + patron.nextVenue.name + " serves patron " + patron.name + " for " + str(int(self.serviceTime)) + " minutes")
-    	yield hold, self, self.serviceTime
-    	reactivate(patron)
-    	print (getTime() + " Patron " + patron.name + " leaves venue " + patron.nextVenue.name)
+    	nextVenueId = patronTable.nextVenue[self.patronId]
+    	walkTime = parkLayout.walkTime[patronTable.lastVenue[self.patronId] * parkLayout.size + nextVenueId] # Req. 0035, Req. 0036
+    	if (tracing.level >= TRACE_VERBOSE):
+    		tracing.record(now(), WALK, self, venueTable[nextVenueId], walkTime)
+    	return walkTime
+
+# One reusable service process per venue, replacing a new VenueService process for every patron served.
+# Patrons being served are kept in a heap ordered by completion time and the server sleeps until the
+# earliest completion, so the number of live objects only depends on how many patrons are in service.
+class VenueServer(Process):
+
+    def __init__(self, venue, servers):
+    	self.venue = venue
+    	self.servers = servers # Patrons that can be served at once, None means no limit
+    	self.inService = [] # Heap of (completion time, sequence number, patron)
+    	self.sequence = 0 # Keeps patrons finishing at the same time in the order they started
+    	self.serverFreed = SimEvent(name = venue.name + " server freed")
+    	Process.__init__(self, name = venue.name + " Service")
+
+    def hasFreeServer(self):
+    	return self.servers == None or len(self.inService) < self.servers
+
+    def serve(self, patron):
+    	if (tracing.level >= TRACE_VERBOSE):
+    		tracing.record(now(), SERVICE_TIME, patron, self.venue, self.venue.serviceTime)
+    	completionTime = now() + self.venue.serviceTime
+    	# Wake the server if it is idle or this patron finishes before the one it is waiting on
+    	wakeServer = len(self.inService) == 0 or completionTime < self.inService[0][0]
+    	heappush(self.inService, (completionTime, self.sequence, patron))
+    	self.sequence = self.sequence + 1
+    	if (wakeServer):
+    		reactivate(self)
+
+    def run(self):
+    	while True:
+    		if (len(self.inService) == 0):
+    			yield passivate, self
+    		elif (self.inService[0][0] > now()):
+    			yield hold, self, self.inService[0][0] - now()
+    		else:
+    			completionTime, sequence, patron = heappop(self.inService)
+    			reactivate(patron)
+    			if (tracing.level >= TRACE_EVENTS):
+    				tracing.record(now(), LEAVE, patron, self.venue)
+    			self.serverFreed.signal()
 
 class Venue(Process):
    
-    def __init__(self, type, number, capacity, numPatronsPerHour, popularity):
+    def __init__(self, type, number, capacity, numPatronsPerHour, popularity, servers = None):
     	self.name = type + " " + number
     	self.type = type
     	self.number = number
     	self.lineCapacity = capacity
     	self.numPatronsPerHour = numPatronsPerHour
     	self.popularity = popularity
-    	self.waitQueue = [] # Stores patrons currently in line
-    	self.lineLevel = Level(name='numInLine', unitName='patrons', capacity=self.lineCapacity, initialBuffered=0, putQType=FIFO, getQType=FIFO, monitored=True, monitorType=Monitor)
-    	self.serviceTime = 0
+    	self.waitQueue = WaitLine() # Stores patrons currently in line and when they joined it
+    	self.lineLevel = Level(name=self.name, unitName='patrons', capacity=self.lineCapacity, initialBuffered=0, putQType=FIFO, getQType=FIFO, monitored=(venueStatisticsMode == "monitor"), monitorType=Monitor)
+    	self.serviceTime = parkLayout.serviceTimes.get(self.type, 0) # Req. 0016
     	self.timesChosen = 0
-    	if (self.type == "Vendor"):
-    		self.serviceTime = 3
-    	elif (self.type == "Ride"):
-    		self.serviceTime = 6
-    	elif (self.type == "Attraction"):
-    		self.serviceTime = 10
+    	self.servingMode = venueServingMode
+    	self.wakeups = 0 # Number of times start() resumed, used to compare serving modes
+    	self.lineStats = LineStats(self.lineCapacity, now()) # Req. 0009, Req. 0010
+    	self.lineDelays = array('d') # Every line delay, only kept in "monitor" statistics mode
+    	self.server = VenueServer(self, servers)
+    	self.sampleIndex = None # Position in venueSampler, Vendor0 is never sampled
+    	self.venueId = len(venueTable) # Position in venueTable, used in trace records
+    	venueTable.append(self)
     	Process.__init__(self, name=self.name)
 
+    # Req. 0020: a venue with a full line is masked out of venueSampler until a patron leaves its line
+    def setLineFull(self, full):
+    	if (self.sampleIndex == None):
+    		return
+    	if (full):
+    		venueSampler.mask(self.sampleIndex)
+    	else:
+    		venueSampler.unmask(self.sampleIndex)
+
+    # Changes the line capacity in the middle of a run. Patrons already in line stay in it.
+    def setCapacity(self, capacity):
+    	wasFull = len(self.waitQueue) >= self.lineCapacity
+    	self.lineStats.change(now(), len(self.waitQueue)) # Time so far counts against the old capacity
+    	self.lineCapacity = capacity
+    	self.lineLevel.capacity = capacity
+    	self.lineStats.capacity = capacity
+    	if (wasFull != (len(self.waitQueue) >= capacity)):
+    		self.setLineFull(not wasFull)
+
     def start(self):
+    	activate(self.server, self.server.run())
     	while True:
-    		if (self.lineLevel.amount > 0):
+    		self.wakeups = self.wakeups + 1
+    		if (not self.server.hasFreeServer()):
+    			# Every server is busy, so the next patron stays in line until one frees up
+    			yield waitevent, self, self.server.serverFreed
+    		# In event mode the venue sleeps on the Level and is woken once per patron put,
+    		# in poll mode it re-checks the line every 0.01 minutes
+    		elif (self.servingMode == "event" or self.lineLevel.amount > 0):
     			yield get, self, self.lineLevel, 1
-    			currentPatron = self.waitQueue.pop(0)
-    			print (getTime() + " Venue " + self.name + " is now serving patron " + currentPatron.name)
-    			service = VenueService(self.serviceTime)
-    			activate(service, service.reactivatePatronAfterDelay(currentPatron))
+    			size = self.waitQueue.sizes[0]
+    			if (size > 1):
+    				# A party is served together, so the rest of its places in line are taken at once
+    				yield get, self, self.lineLevel, size - 1
+    			wasFull = len(self.waitQueue) >= self.lineCapacity
+    			currentPatron, lineArrivalTime = self.waitQueue.leave()
+    			delay = now() - lineArrivalTime
+    			for member in range(currentPatron.patronId, currentPatron.patronId + size):
+    				patronTable.timeInLine[member] = patronTable.timeInLine[member] + delay # Req. 0002, Req. 0003
+    			self.lineStats.change(now(), len(self.waitQueue))
+    			self.lineStats.observeDelay(delay, size)
+    			if (hourlyMetrics != None):
+    				hourlyMetrics.serve(now(), self.venueId, delay, size)
+    			if (venueStatisticsMode == "monitor"):
+    				self.lineDelays.extend([delay] * size)
+    			if (wasFull and len(self.waitQueue) < self.lineCapacity):
+    				# Only unmask once the line drops below capacity, it can be longer after setCapacity()
+    				self.setLineFull(False)
+    			if (tracing.level >= TRACE_EVENTS):
+    				tracing.record(now(), SERVE, currentPatron, self)
+    			self.server.serve(currentPatron)
     		else:
     			yield hold, self, 0.01
 
-#class PatronGenerator(Process):
-    
-    #def __init__(self, numberPatrons):
-    	#self.numberPatrons = numberPatrons
-    	#Process.__init__(self, name="Patron Generator")
-
-    #def generatePatrons(self):
-    	#while True:
-    		#make self.numberPatrons amount of patrons, with arrival times between 10AM and 12PM
+# Releases the day's patrons from a schedule sampled up front and sorted by arrival time (Req. 0024 - Req. 0034).
+# A patron's process is only created when it arrives, instead of every patron holding until its arrival time.
+# In party mode each entry of the schedule is a party, which arrives and leaves together.
+class PatronGenerator(Process):
+
+    def __init__(self, arrivals, departures, sizes = None):
+    	self.arrivals = arrivals
+    	self.departures = departures
+    	self.sizes = sizes # Party sizes, None when every patron comes alone
+    	Process.__init__(self, name="Patron Generator")
+
+    def generatePatrons(self):
+    	for i in range(len(self.arrivals)):
+    		if (self.arrivals[i] > now()):
+    			yield hold, self, self.arrivals[i] - now()
+    		patronId = patronTable.add(venueVendor0.venueId, self.arrivals[i], self.departures[i]) # Req. 0023
+    		size = 1
+    		if (self.sizes != None):
+    			size = self.sizes[i]
+    			for member in range(size - 1):
+    				patronTable.add(venueVendor0.venueId, self.arrivals[i], self.departures[i])
+    		if (patronStreams != None):
+    			for member in range(size):
+    				patronStreams.add()
+    		if (hourlyMetrics != None):
+    			hourlyMetrics.parkArrival(now(), size)
+    		patron = Patron("P" + str(patronId + 1), patronId, size)
+    		activate(patron, patron.execute())
+
+# Publishes a snapshot of every venue's line to a live feed (lib/livefeed.py) every feed.interval minutes
+class LiveSnapshots(Process):
+
+    def __init__(self, feed):
+    	self.feed = feed
+    	Process.__init__(self, name="Live Snapshots")
+
+    def publish(self):
+    	while True:
+    		yield hold, self, self.feed.interval
+    		self.feed.snapshot(now(), venueTable)
+
+# Discards the line statistics and patron counters recorded during the first warmUp minutes, so the summary
+# only covers the rest of the day
+class WarmUp(Process):
+
+    def __init__(self, warmUp):
+    	self.warmUp = warmUp
+    	Process.__init__(self, name="Warm Up")
+
+    def end(self):
+    	yield hold, self, self.warmUp
+    	for venue in venueTable:
+    		venue.lineStats.restart(now())
+    	patronTable.resetCounters(now())
+
+# Methods timed by --profile on top of the per-PEM event costs
+profiler.watch(Patron, "enterVenue")
+profiler.watch(Patron, "chooseNextVenue")
+profiler.watch(Patron, "walkToNextVenue")
+profiler.watch(VenueServer, "serve")
+profiler.watch(Venue, "setLineFull")
+profiler.watch(tracing, "record")
 
 def getTime():
-    time = now()
-
-    hour = int(time/60)
-    hour = hour + 10
-    period = "AM"
+    return formatTime(now())
 
-    if (hour >= 12):
-    	period = "PM"
+def createVenues(servers = None):
+    for type, number, capacity, numPatronsPerHour, popularity in parkLayout.venues():
+    	Venues.append(Venue(type, number, capacity, numPatronsPerHour, popularity, servers))
 
-    if (hour > 12):
-    	hour = hour - 12
-
-    if (hour < 10): # Just for formatting purposes
-    	period = period + " "
-
-    minutes = int(time%60)
-
-    if (minutes < 10):
-    	strMinutes = "0" + str(minutes)
-    else:
-    	strMinutes = str(minutes)
-
-    strTime = str(hour) + ":" + strMinutes + period
-    return strTime
-
-def createVenues():
-    venueRideA0 = Venue("Ride", "A0", 20, 30, 10)
-    venueRideA1 = Venue("Ride", "A1", 20, 30, 5)
-    venueRideA2 = Venue("Ride", "A2", 20, 30, 5)
-    venueRideA3 = Venue("Ride", "A3", 20, 30, 3)
-    venueAttractionA0 = Venue("Attraction", "A0", 20, 30, 10)
-    venueAttractionA1 = Venue("Attraction", "A1", 20, 30, 3)
-    venueAttractionA3 = Venue("Attraction", "A3", 20, 30, 4)
-    venueVendorA0 = Venue("Vendor", "A0", 20, 30, 2)
-    venueVendorA2 = Venue("Vendor", "A2", 20, 30, 4)
-    venueRideB0 = Venue("Ride", "B0", 20, 30, 7)
-    venueRideB1 = Venue("Ride", "B1", 20, 30, 4)
-    venueRideB2 = Venue("Ride", "B2", 20, 30, 6)
-    venueRideB3 = Venue("Ride", "B3", 20, 30, 3)
-    venueAttractionB0 = Venue("Attraction", "B0", 20, 30, 3)
-    venueAttractionB1 = Venue("Attraction", "B1", 20, 30, 4)
-    venueAttractionB3 = Venue("Attraction", "B3", 20, 30, 2)
-    venueVendorB0 = Venue("Vendor", "B0", 20, 30, 8)
-    venueVendorB2 = Venue("Vendor", "B2", 20, 30, 3)
-    venueRideC1 = Venue("Ride", "C1", 20, 30, 7)
-    venueAttractionC1 = Venue("Attraction", "C1", 20, 30, 4)
-    venueVendorC1 = Venue("Vendor", "C1", 20, 30, 3)
-
-    Venues.append(venueRideA0)
-    Venues.append(venueRideA1)
-    Venues.append(venueRideA2)
-    Venues.append(venueRideA3)
-    Venues.append(venueAttractionA0)
-    Venues.append(venueAttractionA1)
-    Venues.append(venueAttractionA3)
-    Venues.append(venueVendorA0)
-    Venues.append(venueVendorA2)
-    Venues.append(venueRideB0)
-    Venues.append(venueRideB1)
-    Venues.append(venueRideB2)
-    Venues.append(venueRideB3)
-    Venues.append(venueAttractionB0)
-    Venues.append(venueAttractionB1)
-    Venues.append(venueAttractionB3)
-    Venues.append(venueVendorB0)
-    Venues.append(venueVendorB2)
-    Venues.append(venueRideC1)
-    Venues.append(venueAttractionC1)
-    Venues.append(venueVendorC1)
+    global venueSampler
+    venueSampler = PopularitySampler([venue.popularity for venue in Venues]) # Req. 0022
+    for i in range(len(Venues)):
+    	Venues[i].sampleIndex = i
 
     for item in Venues:
     	activate(item, item.start())
 
-
-random.seed()
-initialize()
-
-Venues = []
-Patrons = []
-
-venueVendor0 = Venue("Vendor", "0", 50, 50, 0)
-activate(venueVendor0, venueVendor0.start())
-
-createVenues()
-
-#generator = PatronGenerator(100)
-#activate(generator, generator.start())
-
-patron1 = Patron("P1")
-patron2 = Patron("P2")
-patron3 = Patron("P3")
-patron4 = Patron("P4")
-patron5 = Patron("P5")
-
-Patrons.append(patron1)
-Patrons.append(patron2)
-Patrons.append(patron3)
-Patrons.append(patron4)
-Patrons.append(patron5)
-
-for item in Patrons:
-    activate(item, item.execute())
-
-simulate(until = 12*60)
+def simulateCountingEvents(until):
+    # Runs the simulation and returns the number of scheduler events (event notices) SimPy dispatched
+    sim = Globals.sim
+    eventCount = [0]
+    step = sim.step
+    if (profiler.enabled):
+    	step = profiler.instrument(sim)
+
+    def countedStep():
+    	eventCount[0] = eventCount[0] + 1
+    	step()
+
+    sim.step = countedStep
+    sim._stop = False # Left set by the previous simulate() when a run is continued
+    try:
+    	simulate(until = until)
+    finally:
+    	del sim.step
+    	profiler.release(sim)
+    return eventCount[0]
+
+def runPark(numberPatrons = 5, servingMode = "event", traceLevel = TRACE_OFF, traceFile = None, statisticsMode = "online", exportDirectory = None, layoutPath = defaultLayoutPath, servers = None, partySize = None, hourlyReport = None, liveFeed = None, randomStreams = None, warmUp = 0):
+    startPark(numberPatrons, servingMode, traceLevel, traceFile, statisticsMode, layoutPath, servers, partySize, hourlyReport, liveFeed, randomStreams, warmUp)
+    schedulerEvents = simulateCountingEvents(12*60)
+    return finishPark(schedulerEvents, exportDirectory)
+
+# Builds the park and schedules the day's patrons without simulating any of it.
+# servers is how many patrons every venue serves at once, None means no limit.
+# partySize is the mean size of the parties patrons come in, None means every patron comes alone.
+# hourlyReport(report) is called with the figures of every simulated hour as it closes (see lib/hourly.py).
+# liveFeed is a LiveFeed (lib/livefeed.py) to publish venue snapshots to while the park runs.
+# randomStreams is a RandomStreams (lib/streams.py) to draw from instead of the global generator.
+# The summary leaves out the first warmUp minutes of the day, which needs "online" statistics mode.
+def startPark(numberPatrons = 5, servingMode = "event", traceLevel = TRACE_OFF, traceFile = None, statisticsMode = "online", layoutPath = defaultLayoutPath, servers = None, partySize = None, hourlyReport = None, liveFeed = None, randomStreams = None, warmUp = 0):
+    global venueVendor0, Venues, venueServingMode, venueStatisticsMode, venueTable, patronTable, parkLayout, hourlyMetrics, patronStreams
+
+    venueServingMode = servingMode
+    venueStatisticsMode = statisticsMode
+    initialize()
+    tracing.start(traceLevel, traceFile)
+
+    venueTable = [] # Every venue including Vendor0, indexed by venueId
+    Venues = []
+    patronTable = PatronTable()
+
+    parkLayout = loadLayout(layoutPath)
+    venueVendor0 = Venue(*parkLayout.venue(0), servers = servers)
+    activate(venueVendor0, venueVendor0.start())
+
+    createVenues(servers)
+    hourlyMetrics = None
+    if (hourlyReport != None):
+    	hourlyMetrics = HourlyMetrics([venue.name for venue in venueTable], hourlyReport)
+    if (liveFeed != None):
+    	liveFeed.start([venue.name for venue in venueTable])
+    	snapshots = LiveSnapshots(liveFeed)
+    	activate(snapshots, snapshots.publish())
+    if (warmUp > 0):
+    	if (statisticsMode == "monitor"):
+    		raise ValueError("A warm-up period needs online statistics")
+    	warmUpEnd = WarmUp(warmUp)
+    	activate(warmUpEnd, warmUpEnd.end())
+
+    if (randomStreams != None):
+    	patronStreams = randomStreams.patronStreams()
+    	partyRng = randomStreams.stream("parties")
+    	arrivalRng = randomStreams.stream("arrivals")
+    	departureRng = randomStreams.stream("departures")
+    else:
+    	patronStreams = None
+    	partyRng = random
+    	arrivalRng = random
+    	departureRng = None
+    sizes = None
+    if (partySize != None):
+    	checkPartySize(partySize, parkLayout)
+    	sizes = partySizes(numberPatrons, partySize, partyRng)
+    	arrivals, departures = daySchedule(len(sizes), arrivalRng, departureRng)
+    else:
+    	arrivals, departures = daySchedule(numberPatrons, arrivalRng, departureRng)
+    generator = PatronGenerator(arrivals, departures, sizes)
+    activate(generator, generator.generatePatrons())
+
+# Raises ValueError unless every party of mean size partySize fits in the shortest line of layout,
+# a party that does not fit could never join a line and would be discouraged all day.
+def checkPartySize(partySize, layout):
+    shortestLine = min(layout.capacity)
+    if (largestParty(partySize) > shortestLine):
+    	raise ValueError("Parties of mean size %g are up to %d patrons, more than the %d places of the shortest line" % (
+    		partySize, largestParty(partySize), shortestLine))
+
+# Ends the run once the park has closed and returns its summary
+def finishPark(schedulerEvents, exportDirectory = None):
+    if (hourlyMetrics != None):
+    	hourlyMetrics.advance(now())
+    tracing.stop([venue.name for venue in venueTable], ["P" + str(patronId + 1) for patronId in range(len(patronTable))])
+
+    if (exportDirectory != None):
+    	# Line length history and delays as column files for lib/analysis.py, needs "monitor" statistics mode
+    	exportRun(exportDirectory, [(venue.name, venue.lineCapacity, venue.lineLevel.bufferMon, venue.lineDelays) for venue in venueTable], now())
+
+    summary = parkSummary()
+    summary["schedulerEvents"] = schedulerEvents
+    return summary
+
+# Outputs of one run. Counts are park totals, line figures are averaged over every venue including Vendor0
+def parkSummary():
+    patronsServed = 0
+    totalLineDelay = 0
+    discouragedPatrons = 0
+    lineLength = 0
+    minutesEmpty = 0
+    minutesFull = 0
+    venueWakeups = 0
+    for venue in venueTable:
+    	patronsServed = patronsServed + venue.lineStats.served
+    	totalLineDelay = totalLineDelay + venue.lineStats.delaySum
+    	discouragedPatrons = discouragedPatrons + venue.lineStats.discouraged
+    	if (venueStatisticsMode == "monitor"):
+    		lineLength = lineLength + venue.lineLevel.bufferMon.timeAverage()
+    		empty, full = monitorLineMinutes(venue.lineLevel.bufferMon, venue.lineCapacity) # Req. 0009, Req. 0010
+    	else:
+    		lineLength = lineLength + venue.lineStats.timeAverage(now())
+    		empty = venue.lineStats.minutesEmpty
+    		full = venue.lineStats.minutesFull
+    	minutesEmpty = minutesEmpty + empty
+    	minutesFull = minutesFull + full
+    	venueWakeups = venueWakeups + venue.wakeups
+
+    meanLineDelay = 0
+    if (patronsServed > 0):
+    	meanLineDelay = totalLineDelay / patronsServed
+    summary = patronTable.dailyOutputs() # Req. 0002 - Req. 0008
+    summary.update({"patronsServed": patronsServed, "meanLineDelay": meanLineDelay, "discouragedPatrons": discouragedPatrons,
+    	"timeAverageLineLength": lineLength / len(venueTable), "minutesLineEmpty": minutesEmpty / len(venueTable),
+    	"minutesLineFull": minutesFull / len(venueTable), "venueWakeups": venueWakeups})
+    return summary
+
+# Metrics in the summary of every run, as judged by --precision. SimPy runs also report venueWakeups.
+summaryMetrics = sorted(list(PatronTable().dailyOutputs()) + ["patronsServed", "meanLineDelay", "discouragedPatrons", "timeAverageLineLength",
+    "minutesLineEmpty", "minutesLineFull", "schedulerEvents"])
+
+# Applies a what-if change to the venue called name: line capacity, minutes of service or popularity
+def setVenue(name, capacity = None, serviceTime = None, popularity = None):
+    venue = [venue for venue in venueTable if venue.name == name]
+    if (len(venue) == 0):
+    	raise ValueError("No venue called " + name)
+    venue = venue[0]
+    if (capacity != None):
+    	venue.setCapacity(capacity)
+    if (serviceTime != None):
+    	venue.serviceTime = serviceTime
+    if (popularity != None and venue.sampleIndex != None):
+    	venue.popularity = popularity
+    	venueSampler.setWeight(venue.sampleIndex, popularity) # Req. 0022
+
+# The RandomStreams (lib/streams.py) of a run seeded with currentSeed, None when streams is "global"
+def randomStreamsFor(currentSeed, streams):
+    if (streams == "independent"):
+    	return RandomStreams(currentSeed)
+    elif (streams != "global"):
+    	raise ValueError("Unknown random streams " + str(streams))
+    return None
+
+# Simulates the day up to snapshotTime once, then finishes it once per variant in a forked copy of the
+# simulation (see lib/whatif.py). A variant is {"name": ..., "venues": {venue name: {"capacity": ..., "serviceTime": ..., "popularity": ...}}}.
+# servers, partySize, streams and warmUp are as in runReplication; without a servers limit lines never form and capacity variants change nothing.
+# Returns one summary per variant, each with the variant's name and the scheduler events of the whole day.
+def whatIf(currentSeed, numberPatrons, snapshotTime, variants, servingMode = "event", statisticsMode = "online", backend = "simpy", layoutPath = defaultLayoutPath, processes = None, servers = None, partySize = None, streams = "global", warmUp = 0):
+    seed(currentSeed)
+    randomStreams = randomStreamsFor(currentSeed, streams)
+    if (backend == "kernel"):
+    	if (partySize != None):
+    		raise ValueError("Parties are only simulated by the simpy backend")
+    	day = park.Park(loadLayout(layoutPath), servers, randomStreams = randomStreams)
+    	day.start(numberPatrons)
+    	if (warmUp > 0):
+    		day.sim.scheduleAt(warmUp, day.endWarmUp)
+    	day.advance(snapshotTime)
+    	def finishVariant(variant):
+    		for name, changes in variant.get("venues", {}).items():
+    			day.setVenue(name, **changes)
+    		day.advance(12*60)
+    		summary = day.summary()
+    		summary["variant"] = variant["name"]
+    		return summary
+    else:
+    	startPark(numberPatrons, servingMode, statisticsMode = statisticsMode, layoutPath = layoutPath, servers = servers, partySize = partySize, randomStreams = randomStreams, warmUp = warmUp)
+    	morningEvents = simulateCountingEvents(snapshotTime)
+    	def finishVariant(variant):
+    		for name, changes in variant.get("venues", {}).items():
+    			setVenue(name, **changes)
+    		summary = finishPark(morningEvents + simulateCountingEvents(12*60))
+    		summary["variant"] = variant["name"]
+    		return summary
+    return forkVariants(variants, finishVariant, processes)
+
+# One seeded replication without tracing, sent to a worker process by replicate()
+# venueChanges maps venue names to setVenue() changes made before the park opens
+# liveAddress is where the replication publishes live venue snapshots (see lib/livefeed.py), None for nowhere.
+# streams is "global" to draw everything from the global generator, or "independent" for a stream per purpose and
+# per patron derived from currentSeed (lib/streams.py), which keeps runs of two configurations with the same seed in step.
+# parallel is a number of worker processes to spread the park's areas over (lib/parallel.py, kernel backend and
+# independent streams only), None to simulate the day in this process.
+# warmUp is the minutes after opening left out of the summary, so the opening rush does not bias it.
+def runReplication(currentSeed, numberPatrons = 5, servingMode = "event", statisticsMode = "online", backend = "simpy", layoutPath = defaultLayoutPath, venueChanges = None, servers = None, partySize = None, liveAddress = None, streams = "global", parallel = None, warmUp = 0):
+    seed(currentSeed)
+    if (parallel != None):
+    	if (backend != "kernel" or streams != "independent" or partySize != None or liveAddress != None or warmUp > 0):
+    		raise ValueError("Parallel runs need the kernel backend and independent streams, without parties, a live feed or a warm-up period")
+    	summary = runParallelPark(numberPatrons, loadLayout(layoutPath), servers, currentSeed, parallel, venueChanges = venueChanges)
+    	del summary["parallel"]
+    	return summary
+    randomStreams = randomStreamsFor(currentSeed, streams)
+    liveFeed = None
+    if (liveAddress != None):
+    	liveFeed = LiveFeed(liveAddress, "seed " + str(currentSeed))
+    summary = None
+    try:
+    	if (backend == "kernel"):
+    		if (partySize != None):
+    			raise ValueError("Parties are only simulated by the simpy backend")
+    		summary = park.runPark(numberPatrons, loadLayout(layoutPath), servers, venueChanges = venueChanges, liveFeed = liveFeed, randomStreams = randomStreams, warmUp = warmUp)
+    	else:
+    		startPark(numberPatrons, servingMode, statisticsMode = statisticsMode, layoutPath = layoutPath, servers = servers, partySize = partySize, liveFeed = liveFeed, randomStreams = randomStreams, warmUp = warmUp)
+    		for name, changes in (venueChanges or {}).items():
+    			setVenue(name, **changes)
+    		summary = finishPark(simulateCountingEvents(12*60))
+    finally:
+    	# A run that raises still ends its feed, with no summary, and stops the writer thread
+    	if (liveFeed != None):
+    		liveFeed.close(summary)
+    return summary
+
+# The "<venue name>.<capacity|serviceTime|popularity>" entries of sweep parameters as setVenue() changes
+def sweepVenueChanges(params):
+    venueChanges = {}
+    for name, value in params.items():
+    	if ("." in name):
+    		venueName, setting = name.rsplit(".", 1)
+    		venueChanges.setdefault(venueName, {})[setting] = value
+    return venueChanges
+
+# One cell of a lib/sweep.py parameter sweep. params holds "patrons", "servers", "partySize", "servingMode", "backend", "layout", "streams",
+# "warmUp" and "<venue name>.<capacity|serviceTime|popularity>" entries, e.g. {"patrons": 1000, "Ride A0.capacity": 10}.
+def runSweepCell(params, currentSeed):
+    return runReplication(currentSeed, params.get("patrons", 5), params.get("servingMode", "event"), backend = params.get("backend", "simpy"),
+    	layoutPath = params.get("layout", defaultLayoutPath), venueChanges = sweepVenueChanges(params) or None, servers = params.get("servers"),
+    	partySize = params.get("partySize"), streams = params.get("streams", "global"), warmUp = params.get("warmUp", 0))
+
+# The analytical estimate (lib/queueing.py) of the same cell, used to screen a sweep before simulating it
+def estimateSweepCell(params):
+    summary, estimates = estimatePark(loadLayout(params.get("layout", defaultLayoutPath)), params.get("patrons", 5), params.get("servers"), sweepVenueChanges(params))
+    return summary
+
+def printSummary(summary):
+    for metric in sorted(summary):
+    	mean, halfWidth, runs = summary[metric]
+    	print ("%14.4f +/- %-10.4f %s (%d runs)" % (mean, halfWidth, metric, runs))
+
+# Prints the numeric metrics of one run's summary
+def printRun(summary):
+    for metric in sorted(summary):
+    	if (isinstance(summary[metric], (int, float))):
+    		print ("%14.4f %s" % (summary[metric], metric))
+
+# Runs each --precision metric needed before its confidence interval was narrow enough
+def printRunsNeeded(runsNeeded, runs):
+    for metric in sorted(runsNeeded):
+    	if (runsNeeded[metric] == None):
+    		print ("%14s    %-10s %s (not reached in %d runs)" % ("-", "", metric, runs))
+    	else:
+    		print ("%14d    %-10s %s" % (runsNeeded[metric], "runs", metric))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Amusement park simulation")
+    parser.add_argument("--backend", choices = ["simpy", "kernel"], default = "simpy", help = "simulate with SimPy processes or the callback model on lib/kernel.py (kernel ignores --serving, --statistics, --trace and --export)")
+    parser.add_argument("--layout", default = defaultLayoutPath, help = "park layout file (default lib/layouts/default.json, see lib/parklayout.py)")
+    parser.add_argument("--servers", type = int, help = "patrons every venue serves at once (default: no limit)")
+    parser.add_argument("--serving", choices = ["event", "poll"], default = "event", help = "how venues wait for patrons to join their line")
+    parser.add_argument("--patrons", type = int, default = 5, help = "number of patrons in the park")
+    parser.add_argument("--party-size", type = float, help = "patrons come in parties of this mean size that move, wait and are served together (simpy backend only)")
+    parser.add_argument("--statistics", choices = ["online", "monitor"], default = "online", help = "keep running line statistics or the full Monitor history")
+    parser.add_argument("--trace", choices = sorted(levelNames), default = "verbose", help = "which patron and venue events to trace")
+    parser.add_argument("--trace-file", help = "write binary trace records here instead of printing them (render with tracedump.py)")
+    parser.add_argument("--export", help = "write each venue's line length history and line delays to this directory as .npy columns (implies --statistics monitor)")
+    parser.add_argument("--hourly", nargs = "?", const = "-", metavar = "FILE", help = "report every simulated hour as it closes, as one line of JSON per hour in FILE or printed when no FILE is given (single runs only)")
+    parser.add_argument("--live", metavar = "ADDRESS", help = "publish venue snapshots while running to unix:PATH, a socket livewatch.py listens on, or to a JSON lines file or named pipe")
+    parser.add_argument("--streams", choices = ["global", "independent"], default = "global", help = "draw --seeds replications and --what-if runs from the global generator or from independent streams per purpose and patron (see lib/streams.py)")
+    parser.add_argument("--parallel", type = int, metavar = "WORKERS", help = "simulate the park's areas in this many worker processes, synchronized every cross-area walk time (kernel backend, implies --streams independent)")
+    parser.add_argument("--seeds", type = int, help = "run this many replications (seeds 1..N) without tracing and print means with 95%% confidence intervals")
+    parser.add_argument("--precision", type = float, help = "run replications (seeds 1, 2, ...) until the 95%% confidence half width of every --metrics metric is at most this fraction of its mean, then print means and the runs each metric needed")
+    parser.add_argument("--metrics", default = "meanLineDelay,discouragedPatrons,timeAverageLineLength", help = "comma separated metrics judged by --precision (default meanLineDelay,discouragedPatrons,timeAverageLineLength)")
+    parser.add_argument("--max-runs", type = int, default = 100, help = "most replications a --precision run makes (default 100)")
+    parser.add_argument("--warm-up", type = float, default = 0, help = "minutes after opening left out of the outputs, so the opening rush does not bias them: line figures only count what happens after it, patron figures only the patrons due to stay past it and what they do after it (default 0)")
+    parser.add_argument("--profile", action = "store_true", help = "print scheduler events and wall time per process and PEM, timed methods and Level waits (runs --seeds in this process)")
+    parser.add_argument("--what-if", help = "JSON file with a list of variants to finish from one shared simulation of the day up to --snapshot (see whatIf)")
+    parser.add_argument("--seed", type = int, default = 1, help = "seed of a --what-if or --parallel run (default 1)")
+    parser.add_argument("--snapshot", type = float, default = 2*60, help = "minutes after opening at which --what-if variants fork (default 120, i.e. 12PM)")
+    parser.add_argument("--workers", type = int, help = "worker processes for --seeds (default: one per core)")
+    args = parser.parse_args()
+    if (args.export != None):
+    	args.statistics = "monitor"
+    if (args.party_size != None):
+    	if (args.backend == "kernel"):
+    		parser.error("--party-size needs the simpy backend")
+    	try:
+    		checkPartySize(args.party_size, loadLayout(args.layout))
+    	except ValueError as error:
+    		parser.error(str(error))
+    if (args.parallel != None):
+    	if (args.backend != "kernel"):
+    		parser.error("--parallel needs the kernel backend")
+    	if (args.parallel < 1):
+    		parser.error("--parallel needs at least 1 worker")
+    	for option, value in [("--hourly", args.hourly), ("--live", args.live), ("--export", args.export), ("--what-if", args.what_if)]:
+    		if (value != None):
+    			parser.error(option + " cannot be used with --parallel")
+    	args.streams = "independent"
+    if (args.seeds != None and args.seeds < 1):
+    	parser.error("--seeds must be at least 1")
+    if (args.precision != None):
+    	if (args.precision <= 0):
+    		parser.error("--precision must be positive")
+    	if (args.max_runs < 1):
+    		parser.error("--max-runs must be at least 1")
+    	known = summaryMetrics + (["venueWakeups"] if args.backend == "simpy" else [])
+    	unknown = [metric for metric in args.metrics.split(",") if metric not in known]
+    	if (unknown):
+    		parser.error("unknown --metrics " + ", ".join(unknown) + ", choose from " + ", ".join(known))
+    if (args.warm_up > 0):
+    	if (args.statistics == "monitor"):
+    		parser.error("--warm-up needs --statistics online")
+    	if (args.parallel != None):
+    		parser.error("--warm-up cannot be used with --parallel")
+    if (args.profile):
+    	if (args.backend == "simpy"):
+    		try:
+    			checkSimPy()
+    		except RuntimeError as error:
+    			parser.error(str(error))
+    	profiler.enable()
+    	args.workers = 1
+    hourlyReport = None
+    if (args.hourly != None):
+    	if (args.seeds != None or args.precision != None or args.what_if != None):
+    		parser.error("--hourly reports a single run")
+    	hourlyReport = printHour
+    	if (args.hourly != "-"):
+    		hourlyReport = jsonLinesWriter(open(args.hourly, "w"))
+
+    if (args.what_if != None):
+    	with open(args.what_if) as variantFile:
+    		variants = json.load(variantFile)
+    	for summary in whatIf(args.seed, args.patrons, args.snapshot, variants, args.serving, args.statistics, args.backend, args.layout, args.workers, args.servers, args.party_size, args.streams, args.warm_up):
+    		print (summary["variant"])
+    		printRun(summary)
+    elif (args.seeds != None or args.precision != None):
+    	run = partial(runReplication, numberPatrons = args.patrons, servingMode = args.serving, statisticsMode = args.statistics, backend = args.backend, layoutPath = args.layout, servers = args.servers, partySize = args.party_size, liveAddress = args.live, streams = args.streams, parallel = args.parallel, warmUp = args.warm_up)
+    	if (args.precision != None):
+    		results, runsNeeded = replicateUntil(run, args.metrics.split(","), args.precision, args.max_runs, processes = args.workers)
+    		printSummary(summarize(results))
+    		print ("")
+    		printRunsNeeded(runsNeeded, len(results))
+    	else:
+    		printSummary(summarize(replicate(run, range(1, args.seeds + 1), args.workers)))
+    elif (args.parallel != None):
+    	summary = runParallelPark(args.patrons, loadLayout(args.layout), args.servers, args.seed, args.parallel)
+    	parallel = summary["parallel"]
+    	print ("Parallel kernel: %d scheduler events, %d workers, %d windows of %g minutes, %.3f s simulating on the slowest worker per window, %.3f s in all, %.3f s routing" % (
+    		summary["schedulerEvents"], parallel["workers"], parallel["windows"], parallel["lookahead"], parallel["criticalPathSeconds"], sum(parallel["workerSeconds"]),
+    		parallel["coordinatorSeconds"]))
+    	printRun(summary)
+    elif (args.backend == "kernel"):
+    	random.seed()
+    	liveFeed = None
+    	if (args.live != None):
+    		liveFeed = LiveFeed(args.live, "pid " + str(os.getpid()))
+    	summary = None
+    	try:
+    		summary = park.runPark(args.patrons, loadLayout(args.layout), args.servers, hourlyReport = hourlyReport, liveFeed = liveFeed, warmUp = args.warm_up)
+    	finally:
+    		if (liveFeed != None):
+    			liveFeed.close(summary)
+    	print ("Kernel backend: " + str(summary["schedulerEvents"]) + " scheduler events")
+    	printRun(summary)
+    else:
+    	random.seed()
+    	liveFeed = None
+    	if (args.live != None):
+    		liveFeed = LiveFeed(args.live, "pid " + str(os.getpid()))
+    	summary = None
+    	try:
+    		summary = runPark(args.patrons, args.serving, levelNames[args.trace], args.trace_file, args.statistics, args.export, args.layout, args.servers, args.party_size, hourlyReport, liveFeed, warmUp = args.warm_up)
+    	finally:
+    		if (liveFeed != None):
+    			liveFeed.close(summary)
+    	print ("Serving mode " + args.serving + ": " + str(summary["schedulerEvents"]) + " scheduler events, " + str(summary["venueWakeups"]) + " venue wakeups")
+    	printRun(summary)
+
+    if (args.profile):
+    	print ("")
+    	print (profiler.report())
 
 #total = 0
 #for v in Venues:
@@ -0,0 +1,159 @@
+# benchmark.py
+# Runs the standard park scenarios with fixed seeds and reports wall
+# time, scheduler events per second, events per patron and peak memory
+# for each. Every scenario runs in a fresh worker process so peak memory
+# belongs to that scenario alone. Results can be written as JSON and
+# compared with an earlier results file.
+#
+#   python benchmark.py --quick                   seconds, for pre-merge checks
+#   python benchmark.py --output results.json     full suite
+#   python benchmark.py --quick --compare old.json
+
+from multiprocessing import Pool
+import SimPy.Simulation
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+# One park scenario per patron count, run on both backends. The SimPy
+# backend is left out where a run would take minutes. A day of None is
+# the single venue trial of misc.py, which only runs on SimPy.
+quickScenarios = [
+    ("single-venue", "simpy", [None]),
+    ("park-5", "simpy", [5]),
+    ("park-5", "kernel", [5]),
+    ("park-1k", "simpy", [1000]),
+    ("park-1k", "kernel", [1000]),
+    ("multi-day", "simpy", [100, 200, 300]),
+    ("multi-day", "kernel", [100, 200, 300]),
+]
+fullScenarios = [
+    ("single-venue", "simpy", [None]),
+    ("park-5", "simpy", [5]),
+    ("park-5", "kernel", [5]),
+    ("park-1k", "simpy", [1000]),
+    ("park-1k", "kernel", [1000]),
+    ("park-10k", "simpy", [10000]),
+    ("park-10k", "kernel", [10000]),
+    ("park-100k", "simpy", [100000]),
+    ("park-100k", "kernel", [100000]),
+    ("multi-day", "simpy", [2000, 5000, 10000, 5000, 2000]),
+    ("multi-day", "kernel", [2000, 5000, 10000, 5000, 2000]),
+]
+
+# Runs function(*args) and returns its result and the number of scheduler
+# events SimPy dispatched meanwhile, the count Patron.simulateCountingEvents
+# keeps for park runs. Used for misc.py's single venue trial, which runs
+# its own simulate(), with its output left out of the results table.
+def countSchedulerEvents(function, *args):
+    step = SimPy.Simulation.Simulation.step
+    eventCount = [0]
+
+    def countedStep(self):
+        eventCount[0] = eventCount[0] + 1
+        step(self)
+
+    SimPy.Simulation.Simulation.step = countedStep
+    try:
+        with contextlib.redirect_stdout(io.StringIO()): # misc.py prints as it starts
+            result = function(*args)
+    finally:
+        SimPy.Simulation.Simulation.step = step
+    return result, eventCount[0]
+
+# Runs one scenario and returns its measurements. Called in a fresh
+# worker process.
+def runScenario(scenario):
+    name, backend, days, seed = scenario
+    import Patron
+    import misc
+
+    startMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    events = 0
+    patrons = 0
+    start = time.perf_counter()
+    for day in range(len(days)):
+        if (days[day] == None):
+            summary, schedulerEvents = countSchedulerEvents(misc.runTrial, seed + day)
+            summary["schedulerEvents"] = schedulerEvents
+            patrons = patrons + summary["patronsArrived"]
+        else:
+            summary = Patron.runReplication(seed + day, days[day], backend = backend)
+            patrons = patrons + days[day]
+        events = events + summary["schedulerEvents"]
+    wallTime = time.perf_counter() - start
+    peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {"scenario": name, "backend": backend, "days": len(days), "patrons": patrons,
+        "wallTime": wallTime, "schedulerEvents": events,
+        "eventsPerSecond": events / wallTime if wallTime > 0 else 0.0,
+        "eventsPerPatron": events / float(patrons) if patrons > 0 else 0.0,
+        "peakMemoryKiB": peakMemory, "modelMemoryKiB": peakMemory - startMemory}
+
+# Runs scenario in its own worker process
+def runIsolated(scenario):
+    pool = Pool(1)
+    try:
+        return pool.apply(runScenario, (scenario,))
+    finally:
+        pool.close()
+        pool.join()
+
+def gitRevision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+            stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def key(result):
+    return result["scenario"] + "/" + result["backend"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the amusement park simulation")
+    parser.add_argument("--quick", action = "store_true", help = "small scenarios that finish in seconds")
+    parser.add_argument("--seed", type = int, default = 1, help = "seed of the first day of every scenario (default 1)")
+    parser.add_argument("--repeat", type = int, default = 1, help = "run every scenario this many times and keep the fastest")
+    parser.add_argument("--only", help = "run only scenarios whose name contains this text")
+    parser.add_argument("--output", help = "write the results to this JSON file")
+    parser.add_argument("--compare", help = "show wall time against this earlier JSON results file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if (args.compare != None):
+        with open(args.compare) as baselineFile:
+            for result in json.load(baselineFile)["results"]:
+                baseline[key(result)] = result
+
+    scenarios = quickScenarios if args.quick else fullScenarios
+    results = []
+    print ("%-14s %-7s %9s %9s %12s %12s %10s %10s" % ("scenario", "backend", "patrons", "wall s",
+        "events", "events/s", "ev/patron", "peak MiB") + ("    vs old" if baseline else ""))
+    for name, backend, days in scenarios:
+        if (args.only != None and args.only not in name):
+            continue
+        runs = [runIsolated((name, backend, days, args.seed)) for i in range(args.repeat)]
+        result = min(runs, key = lambda run: run["wallTime"])
+        result["peakMemoryKiB"] = max([run["peakMemoryKiB"] for run in runs])
+        results.append(result)
+
+        line = "%-14s %-7s %9d %9.3f %12d %12.0f %10.1f %10.1f" % (name, backend, result["patrons"],
+            result["wallTime"], result["schedulerEvents"], result["eventsPerSecond"],
+            result["eventsPerPatron"], result["peakMemoryKiB"] / 1024.0)
+        if (key(result) in baseline):
+            line = line + "  %7.2fx" % (result["wallTime"] / baseline[key(result)]["wallTime"])
+        print (line)
+        sys.stdout.flush()
+
+    if (args.output != None):
+        report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": gitRevision(),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "quick": args.quick, "seed": args.seed, "repeat": args.repeat, "results": results}
+        with open(args.output, "w") as outFile:
+            json.dump(report, outFile, indent = 1)
@@ -0,0 +1,79 @@
+# crnbenchmark.py
+# Measures how much common random numbers cut the replications needed
+# to compare two park configurations. The difference in a metric
+# between a baseline park and one venue change is estimated three ways
+# from the same number of replications:
+#
+#   independent   baseline and change run with different seeds
+#   crn-global    same seed for both, every draw from the global generator
+#   crn-streams   same seed for both, independent streams per purpose and
+#                 per patron (lib/streams.py)
+#
+# and the variance of the difference gives the replications each design
+# needs for a confidence interval of the requested half width.
+#
+#   python crnbenchmark.py --runs 30 --change "Ride A0.capacity=10"
+#   python crnbenchmark.py --backend simpy --patrons 500 --metric patronsServed
+
+from lib.replicate import replicate, confidenceHalfWidth
+from functools import partial
+import Patron
+import argparse
+import json
+import math
+
+# Seeds of the second configuration in the independent design
+independentSeedOffset = 1000000
+
+def variance(values):
+    mean = sum(values) / float(len(values))
+    return sum([(value - mean) ** 2 for value in values]) / (len(values) - 1)
+
+# "Ride A0.capacity=10" -> {"Ride A0": {"capacity": 10}}
+def parseChange(text):
+    setting, value = text.split("=", 1)
+    venueName, name = setting.rsplit(".", 1)
+    return {venueName: {name: json.loads(value)}}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Variance reduction from common random numbers")
+    parser.add_argument("--runs", type = int, default = 30, help = "replications per configuration and design (default 30)")
+    parser.add_argument("--patrons", type = int, default = 1000, help = "patrons per day (default 1000)")
+    parser.add_argument("--servers", type = int, default = 2, help = "patrons every venue serves at once (default 2)")
+    parser.add_argument("--change", default = "Ride A0.capacity=10", help = "VENUE.SETTING=VALUE compared with the baseline park (default \"Ride A0.capacity=10\")")
+    parser.add_argument("--metric", default = "meanLineDelay", help = "summary metric compared (default meanLineDelay)")
+    parser.add_argument("--precision", type = float, default = 0.1, help = "target 95%% half width as a fraction of the difference (default 0.1)")
+    parser.add_argument("--backend", choices = ["simpy", "kernel"], default = "kernel", help = "simulation backend (default kernel)")
+    parser.add_argument("--workers", type = int, help = "worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    seeds = range(1, args.runs + 1)
+    change = parseChange(args.change)
+    def runAll(venueChanges, streams, seedOffset = 0):
+        run = partial(Patron.runReplication, numberPatrons = args.patrons, backend = args.backend, servers = args.servers,
+            venueChanges = venueChanges, streams = streams)
+        return [summary[args.metric] for summary in replicate(run, [seed + seedOffset for seed in seeds], args.workers)]
+
+    baselineGlobal = runAll(None, "global")
+    baselineStreams = runAll(None, "independent")
+    differences = {
+        "independent": [b - a for a, b in zip(baselineGlobal, runAll(change, "global", independentSeedOffset))],
+        "crn-global": [b - a for a, b in zip(baselineGlobal, runAll(change, "global"))],
+        "crn-streams": [b - a for a, b in zip(baselineStreams, runAll(change, "independent"))],
+    }
+
+    meanDifference = sum([sum(values) for values in differences.values()]) / float(len(differences) * args.runs)
+    target = abs(meanDifference) * args.precision
+    print ("%s, %d patrons, %d servers, %s backend: %s difference %.4f, target half width %.4f" % (args.change,
+        args.patrons, args.servers, args.backend, args.metric, meanDifference, target))
+    print ("%-12s %12s %12s %12s %14s %12s" % ("design", "difference", "half width", "variance", "runs needed", "reduction"))
+    baseVariance = variance(differences["independent"])
+    for design in ["independent", "crn-global", "crn-streams"]:
+        values = differences[design]
+        designVariance = variance(values)
+        runsNeeded = float("nan")
+        if (target > 0):
+            runsNeeded = math.ceil((1.96 / target) ** 2 * designVariance)
+        reduction = baseVariance / designVariance if designVariance > 0 else float("inf")
+        print ("%-12s %12.4f %12.4f %12.4f %14.0f %11.1fx" % (design, sum(values) / float(len(values)),
+            confidenceHalfWidth(values), designVariance, runsNeeded, reduction))
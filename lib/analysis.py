@@ -0,0 +1,98 @@
+""" Vectorized post-run analysis"""
+import json
+import os
+import sys
+
+import numpy
+
+## @package AmusementPark
+# Computes the venue line metrics from runs written by
+# columns.exportRun using NumPy array operations instead of a Python
+# loop over every Monitor sample. Column files are memory mapped and
+# runs are analyzed one at a time, so many runs can be analyzed from
+# disk without holding them all in memory.
+
+delayPercentiles = (50, 90, 95, 99)
+
+
+## lineMetrics
+#  Returns (time-average line length, minutes empty, minutes full) for
+#  one venue. Empty and full minutes use the same rule as
+#  linestats.monitorLineMinutes: the time between two samples counts
+#  towards the state recorded by the earlier sample.
+def lineMetrics(times, lengths, capacity, endTime):
+   if len(times) == 0:
+      return 0.0, 0.0, 0.0
+   elapsed = numpy.diff(times)
+   previous = lengths[:-1]
+   minutesEmpty = float(elapsed[previous == 0].sum())
+   minutesFull = float(elapsed[(previous != 0) & (previous >= capacity)].sum())
+
+   area = float((previous * elapsed).sum()) + \
+      float(lengths[-1]) * (endTime - float(times[-1]))
+   if endTime == times[0]:
+      return 0.0, minutesEmpty, minutesFull
+   return area / (endTime - float(times[0])), minutesEmpty, minutesFull
+
+
+## delayMetrics
+#  Returns the mean, maximum and percentiles of the minutes patrons
+#  spent in line
+def delayMetrics(delays):
+   metrics = {'served': int(len(delays))}
+   if len(delays) == 0:
+      metrics['meanLineDelay'] = 0.0
+      metrics['maxLineDelay'] = 0.0
+      for percentile in delayPercentiles:
+         metrics['p%dLineDelay' % (percentile,)] = 0.0
+      return metrics
+
+   metrics['meanLineDelay'] = float(delays.mean())
+   metrics['maxLineDelay'] = float(delays.max())
+   values = numpy.percentile(delays, delayPercentiles)
+   for i in range(len(delayPercentiles)):
+      metrics['p%dLineDelay' % (delayPercentiles[i],)] = float(values[i])
+   return metrics
+
+
+## analyzeRun
+#  Returns {venue name: metrics} for one exported run directory
+def analyzeRun(directory):
+   with open(os.path.join(directory, 'venues.json')) as inFile:
+      description = json.load(inFile)
+
+   results = {}
+   for venue in description['venues']:
+      prefix = os.path.join(directory, venue['prefix'])
+      times = numpy.load(prefix + '.level_t.npy', mmap_mode = 'r')
+      lengths = numpy.load(prefix + '.level_n.npy', mmap_mode = 'r')
+      delays = numpy.load(prefix + '.delay.npy', mmap_mode = 'r')
+
+      metrics = delayMetrics(delays)
+      timeAverage, minutesEmpty, minutesFull = lineMetrics(times, lengths,
+         venue['capacity'], description['endTime'])
+      metrics['timeAverageLineLength'] = timeAverage
+      metrics['minutesLineEmpty'] = minutesEmpty # Req. 0009
+      metrics['minutesLineFull'] = minutesFull # Req. 0010
+      results[venue['name']] = metrics
+   return results
+
+
+## analyzeRuns
+#  Yields (directory, analyzeRun(directory)) for each run directory,
+#  loading one run at a time
+def analyzeRuns(directories):
+   for directory in directories:
+      yield directory, analyzeRun(directory)
+
+
+if __name__ == '__main__':
+   for directory, results in analyzeRuns(sys.argv[1:]):
+      print (directory)
+      for name in sorted(results):
+         metrics = results[name]
+         print ("   %-16s %10.4f avg line %10.4f min empty %10.4f min full "
+            "%10.4f mean wait %10.4f p95 wait" % (name,
+            metrics['timeAverageLineLength'], metrics['minutesLineEmpty'],
+            metrics['minutesLineFull'], metrics['meanLineDelay'],
+            metrics['p95LineDelay']))
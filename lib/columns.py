@@ -0,0 +1,58 @@
+""" Columnar export of venue observations"""
+import json
+import os
+import struct
+import sys
+from array import array
+
+## @package AmusementPark
+# Writes each venue's line length history and line delays as typed
+# column files in NumPy's .npy format, so analysis.py can memory map
+# them instead of walking Monitor lists in Python. Writing needs only
+# the standard library; reading uses NumPy.
+
+
+## writeColumn
+#  Writes a sequence of floats to path as a one dimensional little
+#  endian float64 .npy file
+def writeColumn(path, values):
+   column = array('d', values)
+   if sys.byteorder != 'little':
+      column.byteswap()
+   header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d,), }" % (
+      len(column))
+   # The header is padded so the data starts on a 64 byte boundary
+   padding = (64 - (10 + len(header) + 1) % 64) % 64
+   header = header + ' ' * padding + '\n'
+   with open(path, 'wb') as outFile:
+      outFile.write(b'\x93NUMPY\x01\x00')
+      outFile.write(struct.pack('<H', len(header)))
+      outFile.write(header.encode('latin1'))
+      column.tofile(outFile)
+
+
+## exportRun
+#  Writes one run to directory: venues.json describes the venues and
+#  the run length, and for every venue i there are
+#     venue<i>.level_t.npy  times the line length changed
+#     venue<i>.level_n.npy  line length from that time on
+#     venue<i>.delay.npy    minutes each served patron spent in line
+#  venues is a list of (name, line capacity, level Monitor, delays).
+def exportRun(directory, venues, endTime):
+   if not os.path.isdir(directory):
+      os.makedirs(directory)
+
+   description = {'endTime': endTime, 'venues': []}
+   for i in range(len(venues)):
+      name, capacity, levelMonitor, delays = venues[i]
+      prefix = os.path.join(directory, 'venue%d' % (i,))
+      writeColumn(prefix + '.level_t.npy',
+         [sample[0] for sample in levelMonitor])
+      writeColumn(prefix + '.level_n.npy',
+         [sample[1] for sample in levelMonitor])
+      writeColumn(prefix + '.delay.npy', delays)
+      description['venues'].append({'name': name, 'capacity': capacity,
+         'prefix': 'venue%d' % (i,)})
+
+   with open(os.path.join(directory, 'venues.json'), 'w') as outFile:
+      json.dump(description, outFile)
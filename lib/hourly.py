@@ -0,0 +1,193 @@
+""" Hourly park and venue metrics"""
+import json
+from array import array
+
+## @package AmusementPark
+# Per-venue and park-wide counters for the current simulated hour,
+# updated in O(1) on every patron event and reported as soon as the
+# hour closes. Nothing is kept per event or per patron, and nothing is
+# kept of an hour once it has been reported, so a run of any length
+# streams its hourly report in constant memory. Covers the hourly side
+# of Req. 0002 - Req. 0008 and the hourly departure windows
+# (Req. 0025 - Req. 0034).
+#
+# Hours are counted from time 0, the park opening at 10AM. An hour is
+# closed by the first event at or after its end, or by advance() at the
+# end of a run, so every hour is reported exactly once even when
+# nothing happens in it.
+
+
+## HourlyMetrics
+# Counters of the current hour. Per-venue counters are typed arrays
+# indexed by venue id.
+class HourlyMetrics:
+   """ """
+   __slots__ = ('names', 'emit', 'hourLength', 'hour', 'hourEnd',
+      'inPark', 'present', 'parkArrivals', 'parkDepartures', 'arrivals',
+      'served', 'balked', 'waitSum', 'maxWait', 'visits', 'emptyLines',
+      'chosen')
+
+   ## __init__
+   #
+   #  names are the venue names by venue id. emit(report) is called
+   #  with the report of every hour as it closes, see report().
+   def __init__(self, names, emit, hourLength = 60.0):
+      self.names = list(names)
+      self.emit = emit
+      self.hourLength = hourLength
+      self.hour = 0
+      self.hourEnd = hourLength
+      self.inPark = 0 # Patrons in the park now
+      self.reset()
+
+   ## reset
+   #  Zeroes the counters for a new hour
+   def reset(self):
+      size = len(self.names)
+      self.present = self.inPark # Patrons in the park at some time this hour
+      self.parkArrivals = 0 # Req. 0024
+      self.parkDepartures = 0 # Req. 0025 - Req. 0034
+      self.arrivals = array('i', [0]) * size # Patrons who reached the venue
+      self.served = array('i', [0]) * size
+      self.balked = array('i', [0]) * size # Req. 0020
+      self.waitSum = array('d', [0.0]) * size # Req. 0002, Req. 0003
+      self.maxWait = array('d', [0.0]) * size
+      self.visits = array('i', [0]) * size # Req. 0004, Req. 0005
+      self.emptyLines = array('i', [0]) * size # Req. 0008
+      self.chosen = array('i', [0]) * size # Times chosen as next venue
+
+   ## advance
+   #  Reports and closes every hour that ends at or before time
+   def advance(self, time):
+      while time >= self.hourEnd:
+         self.emit(self.report())
+         self.hour = self.hour + 1
+         self.hourEnd = self.hourEnd + self.hourLength
+         self.reset()
+
+   ## parkArrival
+   #  count patrons entered the park at time
+   def parkArrival(self, time, count = 1):
+      if time >= self.hourEnd:
+         self.advance(time)
+      self.inPark = self.inPark + count
+      self.present = self.present + count
+      self.parkArrivals = self.parkArrivals + count
+
+   ## parkDeparture
+   #  count patrons left the park at time
+   def parkDeparture(self, time, count = 1):
+      if time >= self.hourEnd:
+         self.advance(time)
+      self.inPark = self.inPark - count
+      self.parkDepartures = self.parkDepartures + count
+
+   ## choose
+   #  A patron or party chose venueId as its next venue at time
+   def choose(self, time, venueId):
+      if time >= self.hourEnd:
+         self.advance(time)
+      self.chosen[venueId] = self.chosen[venueId] + 1
+
+   ## join
+   #  count patrons got in line at venueId at time. emptyLine is True
+   #  when the line was empty.
+   def join(self, time, venueId, emptyLine, count = 1):
+      if time >= self.hourEnd:
+         self.advance(time)
+      self.arrivals[venueId] = self.arrivals[venueId] + count
+      self.visits[venueId] = self.visits[venueId] + count
+      if emptyLine:
+         self.emptyLines[venueId] = self.emptyLines[venueId] + count
+
+   ## balk
+   #  count patrons found the line at venueId full at time
+   def balk(self, time, venueId, count = 1):
+      if time >= self.hourEnd:
+         self.advance(time)
+      self.arrivals[venueId] = self.arrivals[venueId] + count
+      self.balked[venueId] = self.balked[venueId] + count
+
+   ## serve
+   #  count patrons left the line at venueId at time after delay
+   #  minutes in it
+   def serve(self, time, venueId, delay, count = 1):
+      if time >= self.hourEnd:
+         self.advance(time)
+      self.served[venueId] = self.served[venueId] + count
+      self.waitSum[venueId] = self.waitSum[venueId] + delay * count
+      if delay > self.maxWait[venueId]:
+         self.maxWait[venueId] = delay
+
+   ## report
+   #  Returns the current hour as a dictionary of park-wide figures
+   #  and, under 'venues', per-venue lists indexed by venue id (names
+   #  under 'venues' 'name'). Waits are minutes in line of the patrons
+   #  served this hour; visitsPerPatron divides the visits by every
+   #  patron in the park at some time during the hour.
+   def report(self):
+      served = sum(self.served)
+      waitSum = sum(self.waitSum)
+      visits = sum(self.visits)
+      meanWait = 0.0
+      if served > 0:
+         meanWait = waitSum / served
+      visitsPerPatron = 0.0
+      if self.present > 0:
+         visitsPerPatron = visits / float(self.present)
+      return {
+         'hour': self.hour,
+         'start': self.hour * self.hourLength,
+         'end': self.hourEnd,
+         'patronsInPark': self.inPark,
+         'parkArrivals': self.parkArrivals,
+         'parkDepartures': self.parkDepartures,
+         'arrivals': sum(self.arrivals),
+         'served': served,
+         'balked': sum(self.balked),
+         'meanWait': meanWait,
+         'maxWait': max(self.maxWait) if self.names else 0.0,
+         'visits': visits,
+         'visitsPerPatron': visitsPerPatron,
+         'emptyLineSelections': sum(self.emptyLines),
+         'venues': {
+            'name': self.names,
+            'arrivals': self.arrivals.tolist(),
+            'served': self.served.tolist(),
+            'balked': self.balked.tolist(),
+            'meanWait': [self.waitSum[v] / self.served[v]
+               if self.served[v] else 0.0 for v in range(len(self.names))],
+            'maxWait': self.maxWait.tolist(),
+            'emptyLineSelections': self.emptyLines.tolist(),
+            'chosen': self.chosen.tolist(),
+         },
+      }
+
+
+## clockTime
+#  Returns the time of day of minutes after the 10AM opening, e.g. 1PM
+def clockTime(minutes):
+   hour = (10 + int(minutes // 60)) % 24
+   return '%d%s' % ((hour + 11) % 12 + 1, 'AM' if hour < 12 else 'PM')
+
+
+## printHour
+#  emit function that prints one park-wide line per hour
+def printHour(report):
+   print('%4s-%-4s %6d in park %6d in %6d out %7d served %6d balked '
+      '%7.2f mean wait %7.2f max wait %5.2f visits/patron' % (
+      clockTime(report['start']), clockTime(report['end']),
+      report['patronsInPark'], report['parkArrivals'],
+      report['parkDepartures'], report['served'], report['balked'],
+      report['meanWait'], report['maxWait'], report['visitsPerPatron']))
+
+
+## jsonLinesWriter
+#  Returns an emit function that writes every hour's report to
+#  outFile as one line of JSON and flushes it, so a reader can follow
+#  the file while the run goes on
+def jsonLinesWriter(outFile):
+   def writeHour(report):
+      outFile.write(json.dumps(report) + '\n')
+      outFile.flush()
+   return writeHour
@@ -0,0 +1,69 @@
+""" Discrete event simulation kernel"""
+from heapq import heappush, heappop
+
+## @package AmusementPark
+# A small alternative to SimPy.Simulation. Events are (time, sequence,
+# callback, argument) entries in a binary heap and are dispatched by
+# calling callback(argument) directly, with no generator to resume and
+# no command to decode. Every Simulation instance is independent, so
+# several can exist in one interpreter.
+#
+# Measured with benchmark.py on the default park, the park model on this
+# kernel (lib/park.py) dispatches 1.3x to 1.8x the events per second of
+# the SimPy model in Patron.py, e.g. 88k against 144k events/s for 1000
+# patrons and 84k against 131k for the three-day scenario. That is well
+# short of a 5x faster dispatch: most of the time per event is spent in
+# the model's callbacks, not in the heap. The model also needs about
+# 2.5x fewer events for the same day, so a day takes about 4x less wall
+# time.
+
+
+## Simulation
+# One simulation with its own clock and event heap
+class Simulation:
+   """ """
+   ## __init__
+   #
+   #  This method initializes an empty Simulation at time 0
+   def __init__(self):
+      self.now = 0.0
+      self.events = 0 # Events dispatched so far
+      self.queue = [ ]
+      self.sequence = 0 # Keeps events at the same time in scheduling order
+
+   ## schedule
+   #  Calls callback(argument) delay minutes from now
+   def schedule(self, delay, callback, argument = None):
+      heappush(self.queue, (self.now + delay, self.sequence, callback,
+         argument))
+      self.sequence = self.sequence + 1
+
+   ## scheduleAt
+   #  Calls callback(argument) at time, which must not be in the past
+   def scheduleAt(self, time, callback, argument = None):
+      if time < self.now:
+         raise ValueError('Attempt to schedule event in the past')
+      heappush(self.queue, (time, self.sequence, callback, argument))
+      self.sequence = self.sequence + 1
+
+   ## peek
+   #  Returns the time of the next event, or None if there is none
+   def peek(self):
+      if self.queue:
+         return self.queue[0][0]
+      return None
+
+   ## run
+   #  Dispatches events in time order until the next event is after
+   #  until or there are no events left, then sets the clock to until
+   def run(self, until):
+      queue = self.queue
+      dispatched = 0
+      while queue and queue[0][0] <= until:
+         time, sequence, callback, argument = heappop(queue)
+         self.now = time
+         dispatched = dispatched + 1
+         callback(argument)
+      self.events = self.events + dispatched
+      if until > self.now:
+         self.now = until
@@ -0,0 +1,131 @@
+""" Venue line statistics"""
+
+## @package AmusementPark
+# Satisfies Req. 0009 - monitor empty line time and Req. 0010 -
+# monitor full line time
+
+
+## monitorLineMinutes
+#  Walks every (time, patrons in line) sample recorded by a monitored
+#  Level and returns (minutes the line was empty, minutes the line was
+#  full). Only the time between samples is counted.
+def monitorLineMinutes(bufferMon, capacity):
+   lastSampleEmpty = False
+   lastSampleFull = False
+   cumulativeTimeWithEmptyLine = 0.0
+   cumulativeTimeWithFullLine = 0.0
+   lastTime = 0.0
+   for sample in bufferMon:
+      currentTime = sample[0]
+
+      if lastSampleEmpty:
+         cumulativeTimeWithEmptyLine = (cumulativeTimeWithEmptyLine +
+            (currentTime - lastTime))
+      elif lastSampleFull:
+         cumulativeTimeWithFullLine = (cumulativeTimeWithFullLine +
+            (currentTime - lastTime))
+
+      if sample[1] == 0:
+         lastSampleEmpty = True
+         lastSampleFull = False
+      elif sample[1] >= capacity:
+         lastSampleFull = True
+         lastSampleEmpty = False
+      else:
+         lastSampleFull = False
+         lastSampleEmpty = False
+
+      lastTime = currentTime
+
+   return cumulativeTimeWithEmptyLine, cumulativeTimeWithFullLine
+
+
+## LineStats
+# Running statistics for one venue line, updated on every change in
+# the number of patrons in line instead of keeping a Monitor history.
+# Memory per venue is constant however long the simulated horizon is.
+# The empty and full minutes follow monitorLineMinutes, and
+# timeAverage follows Monitor.timeAverage, so the results match the
+# post-hoc computation over a monitored Level.
+class LineStats:
+   """ """
+   __slots__ = ('capacity', 'length', 'startTime', 'lastTime', 'area',
+      'minutesEmpty', 'minutesFull', 'served', 'delaySum',
+      'delaySumSquares', 'maxDelay', 'discouraged')
+
+   ## __init__
+   #
+   #  This method starts the statistics for an empty line at time
+   def __init__(self, capacity, time = 0.0):
+      self.capacity = capacity
+      self.length = 0
+      self.startTime = time
+      self.lastTime = time
+      self.area = 0.0 # Integral of line length over time
+      self.minutesEmpty = 0.0 # Req. 0009
+      self.minutesFull = 0.0 # Req. 0010
+      self.served = 0
+      self.delaySum = 0.0
+      self.delaySumSquares = 0.0
+      self.maxDelay = 0.0
+      self.discouraged = 0
+
+   ## restart
+   #  Discards everything recorded before time, e.g. at the end of a
+   #  warm-up period, keeping the patrons in line
+   def restart(self, time):
+      self.change(time, self.length)
+      self.startTime = time
+      self.area = 0.0
+      self.minutesEmpty = 0.0
+      self.minutesFull = 0.0
+      self.served = 0
+      self.delaySum = 0.0
+      self.delaySumSquares = 0.0
+      self.maxDelay = 0.0
+      self.discouraged = 0
+
+   ## change
+   #  Called whenever a patron joins or leaves the line with the new
+   #  number of patrons in line. The interval since the previous change
+   #  is credited to the old length.
+   def change(self, time, length):
+      elapsed = time - self.lastTime
+      self.area = self.area + self.length * elapsed
+      if self.length == 0:
+         self.minutesEmpty = self.minutesEmpty + elapsed
+      elif self.length >= self.capacity:
+         self.minutesFull = self.minutesFull + elapsed
+      self.length = length
+      self.lastTime = time
+
+   ## observeDelay
+   #  Records the minutes a patron, or each of count patrons served
+   #  together, spent in line before being served
+   def observeDelay(self, delay, count = 1):
+      self.served = self.served + count
+      self.delaySum = self.delaySum + delay * count
+      self.delaySumSquares = self.delaySumSquares + delay * delay * count
+      if delay > self.maxDelay:
+         self.maxDelay = delay
+
+   ## discourage
+   #  Records a patron, or count patrons together, who walked away
+   #  because the line was full
+   def discourage(self, count = 1):
+      self.discouraged = self.discouraged + count
+
+   ## meanDelay
+   #  Average minutes spent in line by the patrons served so far
+   def meanDelay(self):
+      if self.served == 0:
+         return 0.0
+      return self.delaySum / self.served
+
+   ## timeAverage
+   #  Time-weighted average number of patrons in line up to time
+   def timeAverage(self, time):
+      if time == self.startTime:
+         return 0.0
+      area = self.area + self.length * (time - self.lastTime)
+      return area / (time - self.startTime)
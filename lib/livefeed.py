@@ -0,0 +1,148 @@
+""" Live metrics feed"""
+import collections
+import json
+import socket
+import threading
+
+## @package AmusementPark
+# Publishes snapshots of every venue's line while a simulation runs, so
+# a long run can be watched before it returns (see livewatch.py). The
+# simulation only builds a snapshot, a few columns of numbers, and hands
+# it to a bounded buffer. A background thread serializes the snapshots
+# and writes them as JSON lines to a Unix socket or to a file or named
+# pipe. The simulation never waits for the consumer: when the buffer is
+# full the oldest pending snapshot is dropped. Every snapshot carries
+# the running totals, so a dropped snapshot only coarsens the feed.
+#
+# Messages, one JSON object per line:
+#    {"type": "start", "run": ..., "venues": [names], "interval": minutes}
+#    {"type": "snapshot", "run": ..., "time": minutes, "lineLength": [...],
+#     "served": [...], "discouraged": [...], "meanDelay": [...],
+#     "maxDelay": [...], "dropped": snapshots dropped so far}
+#    {"type": "end", "run": ..., "summary": {...}}
+# Per-venue lists are indexed by venue id, as "venues" in the start
+# message.
+
+defaultInterval = 10.0 # Simulated minutes between snapshots
+
+## venueSnapshot
+#  Returns the snapshot message of venues, whose waitQueue and
+#  lineStats are read, at simulated time
+def venueSnapshot(run, time, venues):
+   stats = [venue.lineStats for venue in venues]
+   return {'type': 'snapshot', 'run': run, 'time': time,
+      'lineLength': [len(venue.waitQueue) for venue in venues],
+      'served': [line.served for line in stats],
+      'discouraged': [line.discouraged for line in stats], # Req. 0020
+      'meanDelay': [line.meanDelay() for line in stats],
+      'maxDelay': [line.maxDelay for line in stats]}
+
+
+## LiveFeed
+# Bounded buffer of messages and the thread that writes them out.
+# address is "unix:PATH" for a Unix socket that a consumer listens on,
+# anything else is a file or named pipe path the messages are appended
+# to.
+class LiveFeed:
+   """ """
+   ## __init__
+   #
+   #  run names this simulation in every message. At most maxPending
+   #  messages wait for the writer thread.
+   def __init__(self, address, run, interval = defaultInterval,
+      maxPending = 16):
+      self.address = address
+      self.run = run
+      self.interval = interval
+      self.maxPending = maxPending
+      self.pending = collections.deque()
+      self.condition = threading.Condition()
+      self.closed = False
+      self.dropped = 0
+      self.sent = 0
+      self.writer = threading.Thread(target = self.writeMessages,
+         name = 'live feed ' + str(run), daemon = True)
+      self.writer.start()
+
+   ## start
+   #  Publishes the start message with the venue names
+   def start(self, venueNames):
+      self.publish({'type': 'start', 'run': self.run,
+         'venues': list(venueNames), 'interval': self.interval})
+
+   ## snapshot
+   #  Publishes a snapshot of venues at simulated time
+   def snapshot(self, time, venues):
+      message = venueSnapshot(self.run, time, venues)
+      message['dropped'] = self.dropped
+      self.publish(message)
+
+   ## publish
+   #  Queues message for the writer thread without ever waiting for it.
+   #  When the buffer is full the oldest pending snapshot is dropped.
+   def publish(self, message):
+      with self.condition:
+         if len(self.pending) >= self.maxPending:
+            for index in range(len(self.pending)):
+               if self.pending[index]['type'] == 'snapshot':
+                  del self.pending[index]
+                  self.dropped = self.dropped + 1
+                  break
+         self.pending.append(message)
+         self.condition.notify()
+
+   ## close
+   #  Publishes the end message with summary and waits at most timeout
+   #  seconds for the writer to send what is pending
+   def close(self, summary = None, timeout = 5.0):
+      with self.condition:
+         self.pending.append({'type': 'end', 'run': self.run,
+            'summary': summary})
+         self.closed = True
+         self.condition.notify()
+      self.writer.join(timeout)
+
+   ## writeMessages
+   #  Writer thread: connects, then sends messages as they are queued
+   #  until the feed is closed. Messages published while nobody can be
+   #  reached are dropped.
+   def writeMessages(self):
+      output = None
+      try:
+         output = self.connect()
+         while True:
+            with self.condition:
+               while not self.pending and not self.closed:
+                  self.condition.wait()
+               if not self.pending:
+                  break
+               message = self.pending.popleft()
+            if output is None:
+               continue
+            try:
+               output.write((json.dumps(message) + '\n').encode('utf-8'))
+               output.flush()
+               self.sent = self.sent + 1
+            except (IOError, OSError):
+               output = None
+      finally:
+         if output is not None:
+            try:
+               output.close()
+            except (IOError, OSError):
+               pass
+
+   ## connect
+   #  Opens the feed's address for writing, None when it cannot be
+   #  reached
+   def connect(self):
+      try:
+         if self.address.startswith('unix:'):
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.connect(self.address[len('unix:'):])
+            return connection.makefile('wb')
+         # Opening a named pipe waits for a reader, which is why this is
+         # done on the writer thread
+         return open(self.address, 'ab')
+      except (IOError, OSError):
+         return None
@@ -0,0 +1,436 @@
+""" Area-sharded parallel park simulation"""
+import operator
+import pickle
+import time
+from array import array
+from multiprocessing import Pipe, Process
+
+from lib.park import Park
+from lib.patrontable import PatronTable
+from lib.schedule import daySchedule
+from lib.streams import RandomStreams
+
+## @package AmusementPark
+# Runs one park day of the kernel model (lib/park.py) with every area of
+# the park simulated separately, spread over worker processes. Walks
+# between areas take at least the lookahead (5 minutes, Req. 0036), so
+# the day is run in windows of that length: within a window every area
+# is simulated on its own, and a patron who walks to another area is
+# handed over at the end of the window as a timestamped message. The
+# walk ends after the window, so the patron is always delivered before
+# its arrival event (conservative synchronization).
+#
+# Every area keeps the full popularity sampler (Req. 0022). Its own
+# venues' line-full masks (Req. 0020) are current. The other areas'
+# masks are exchanged at the end of every window, so a patron choosing
+# a venue in another area sees that venue's line as it was at most one
+# window ago and may walk to a line that has since filled up.
+#
+# Patrons draw from their own streams (lib/streams.py), and every
+# exchange happens at the end of a window whichever worker hosts the
+# areas, so a seed gives the same day for any number of workers.
+#
+# No wall-clock speedup has been measured: the runs so far were on a
+# single core. On a generated park of 600 venues in 20 areas with 20000
+# patrons and 2 servers per venue, the serial kernel took 12.5 s and one
+# worker 19.2 s, the extra work coming from the handoffs and the stale
+# masks. Summing the processor time of the slowest worker in every
+# window, plus the routing time, gives an estimate of 2.7x faster than
+# serial for 8 workers and 3.6x for 20, assuming a core per worker and
+# no other overhead. These are estimates, not measurements.
+
+## crossAreaLookahead
+#  Returns the shortest walk between venues in different areas of
+#  layout, the lookahead of the simulation
+def crossAreaLookahead(layout):
+   firstVenues = [venues[0] for venues in layout.areaVenues]
+   lookahead = None
+   for fromVenue in firstVenues:
+      for toVenue in firstVenues:
+         if fromVenue != toVenue:
+            walk = layout.walkTime[fromVenue * layout.size + toVenue]
+            if lookahead is None or walk < lookahead:
+               lookahead = walk
+   if lookahead is None:
+      raise ValueError('A parallel run needs a park with more than one area')
+   if lookahead <= 0:
+      raise ValueError('Walks between areas must take time for a parallel '
+         'run')
+   return lookahead
+
+
+## assignAreas
+#  Splits the area ids of layout over workers, largest areas first onto
+#  the worker with the fewest venues so far
+def assignAreas(layout, workers):
+   workers = max(1, min(workers, len(layout.areaNames)))
+   assigned = [[ ] for worker in range(workers)]
+   venues = [0] * workers
+   for areaId in sorted(range(len(layout.areaNames)),
+      key = lambda areaId: -len(layout.areaVenues[areaId])):
+      worker = venues.index(min(venues))
+      assigned[worker].append(areaId)
+      venues[worker] = venues[worker] + len(layout.areaVenues[areaId])
+   return assigned
+
+
+## AreaPark
+# The kernel park seen from one area. Only the area's own venues are
+# ever entered. Patrons leaving for another area are put in outbox.
+class AreaPark(Park):
+   """ """
+   ## __init__
+   #
+   #  patrons and patronStreams are shared by the areas of one worker,
+   #  since a patron is only ever in one area at a time
+   def __init__(self, layout, servers, areaId, patrons, patronStreams):
+      Park.__init__(self, layout, servers)
+      self.areaId = areaId
+      self.patrons = patrons
+      self.patronStreams = patronStreams
+      self.outbox = [ ]
+      self.remoteFull = bytearray(layout.size) # Other areas' line-full flags
+      self.sentFull = bytearray(layout.size) # Own flags last sent to them
+
+   ## start
+   #  Schedules the first arrival when Vendor 0 is in this area. The
+   #  patrons' rows were added by the worker.
+   def start(self, arrivals, departures):
+      self.arrivals = arrivals
+      self.departures = departures
+      if self.layout.area[self.vendor0.venueId] == self.areaId and arrivals:
+         self.sim.scheduleAt(arrivals[0], self.releasePatron)
+
+   ## releasePatron
+   #  Lets the next scheduled patron into the park (Req. 0024)
+   def releasePatron(self, unused):
+      patronId = self.nextArrival
+      self.nextArrival = patronId + 1
+      if self.nextArrival < len(self.arrivals):
+         self.sim.scheduleAt(self.arrivals[self.nextArrival],
+            self.releasePatron)
+      self.enterVenue(patronId)
+
+   ## leaveVenue
+   #  Same as Park.leaveVenue, except that a patron walking to another
+   #  area is handed over instead of scheduled here
+   def leaveVenue(self, patronId):
+      patrons = self.patrons
+      # Req. 0025 - Req. 0034
+      if self.sim.now >= patrons.departureTime[patronId]:
+         return
+      nextVenue = self.chooseNextVenue(patronId)
+      arrival = self.sim.now + self.walkTime[patrons.lastVenue[patronId] *
+         self.layout.size + nextVenue.venueId] # Req. 0035, Req. 0036
+      if nextVenue.area == self.areaId:
+         self.sim.scheduleAt(arrival, self.enterVenue, patronId)
+      else:
+         avoidVenues = patrons.avoidVenues[patronId]
+         self.outbox.append((arrival, patronId, nextVenue.venueId,
+            patrons.lastVenue[patronId], patrons.lineFull[patronId],
+            tuple(avoidVenues) if avoidVenues is not None else None,
+            self.patronStreams.states[patronId]))
+
+   ## receive
+   #  Takes over a patron handed over by another area
+   def receive(self, message):
+      arrival, patronId, venueId, lastVenue, lineFull, avoidVenues, \
+         streamState = message
+      patrons = self.patrons
+      patrons.nextVenue[patronId] = venueId
+      patrons.lastVenue[patronId] = lastVenue
+      patrons.lineFull[patronId] = lineFull
+      patrons.avoidVenues[patronId] = list(avoidVenues) \
+         if avoidVenues is not None else None
+      self.patronStreams.states[patronId] = streamState
+      self.sim.scheduleAt(arrival, self.enterVenue, patronId)
+
+   ## lineFull
+   #  Returns (venue id, line is full) of every venue in this area
+   #  whose line has filled up or stopped being full since the last call
+   def lineFull(self):
+      changes = [ ]
+      for venueId in self.layout.areaVenues[self.areaId]:
+         venue = self.venueTable[venueId]
+         full = len(venue.waitQueue) >= venue.lineCapacity
+         if full != self.sentFull[venueId]:
+            self.sentFull[venueId] = full
+            changes.append((venueId, full))
+      return changes
+
+   ## updateRemote
+   #  Applies the line-full flags of other areas' venues to the sampler
+   def updateRemote(self, flags):
+      for venueId, full in flags:
+         if self.layout.area[venueId] == self.areaId or \
+            self.remoteFull[venueId] == full:
+            continue
+         self.remoteFull[venueId] = full
+         sampleIndex = self.venueTable[venueId].sampleIndex
+         if sampleIndex is not None:
+            if full:
+               self.sampler.mask(sampleIndex) # Req. 0020
+            else:
+               self.sampler.unmask(sampleIndex)
+
+
+## AreaWorker
+# The areas simulated by one worker
+class AreaWorker:
+   """ """
+   ## __init__
+   #
+   #  This method builds areaIds of layout for a day with the given
+   #  schedule and applies venueChanges as runPark does. workerOfArea
+   #  is the worker index of every area id.
+   def __init__(self, layout, servers, areaIds, workerOfArea, arrivals,
+      departures, seed, venueChanges = None):
+      self.layout = layout
+      self.workerOfArea = workerOfArea
+      self.patrons = PatronTable()
+      self.patronStreams = RandomStreams(seed).patronStreams()
+      vendor0 = 0
+      for patronId in range(len(arrivals)):
+         # Req. 0023
+         self.patrons.add(vendor0, arrivals[patronId], departures[patronId])
+         self.patronStreams.add()
+      self.areas = {}
+      for areaId in areaIds:
+         area = AreaPark(layout, servers, areaId, self.patrons,
+            self.patronStreams)
+         for name, changes in (venueChanges or {}).items():
+            area.setVenue(name, **changes)
+         area.start(arrivals, departures)
+         self.areas[areaId] = area
+      self.busy = 0.0
+
+   ## advance
+   #  Delivers the patrons in parcels, applies the other areas'
+   #  line-full changes and simulates every area up to until. Returns
+   #  (parcels by worker index, this worker's line-full changes,
+   #  processor seconds spent). A parcel is a pickled list of patrons
+   #  handed over, made and opened here so the coordinator only has to
+   #  pass bytes on. Processor time is what the worker would take with
+   #  a core of its own, even when several workers share one.
+   def advance(self, until, parcels, flags):
+      start = time.process_time()
+      messages = [ ]
+      for parcel in parcels:
+         messages.extend(pickle.loads(parcel))
+      # Deliveries in arrival order, so the day does not depend on the
+      # order the workers answered in
+      messages.sort(key = lambda message: message[:2])
+      areaOf = self.layout.area
+      for message in messages:
+         self.areas[areaOf[message[2]]].receive(message)
+
+      outboxes = {}
+      lineFull = [ ]
+      for area in self.areas.values():
+         area.updateRemote(flags)
+         area.sim.run(until)
+         for message in area.outbox:
+            worker = self.workerOfArea[areaOf[message[2]]]
+            if worker not in outboxes:
+               outboxes[worker] = [ ]
+            outboxes[worker].append(message)
+         area.outbox = [ ]
+         lineFull.extend(area.lineFull())
+      parcels = dict([(worker, pickle.dumps(messages, pickle.HIGHEST_PROTOCOL))
+         for worker, messages in outboxes.items()])
+      seconds = time.process_time() - start
+      self.busy = self.busy + seconds
+      return parcels, lineFull, seconds
+
+   ## results
+   #  Returns this worker's venue statistics and patron counters
+   def results(self, until):
+      venues = [ ]
+      events = 0
+      for area in self.areas.values():
+         events = events + area.sim.events
+         for venueId in area.layout.areaVenues[area.areaId]:
+            stats = area.venueTable[venueId].lineStats
+            venues.append((stats.served, stats.delaySum, stats.discouraged,
+               stats.timeAverage(until), stats.minutesEmpty,
+               stats.minutesFull))
+      patrons = self.patrons
+      return {'venues': venues, 'events': events, 'busy': self.busy,
+         'venuesVisited': patrons.venuesVisited,
+         'noAvailableVenue': patrons.noAvailableVenue,
+         'emptyLines': patrons.emptyLines, 'timeInLine': patrons.timeInLine}
+
+
+## workerMain
+#  Worker process: answers ('advance', until, parcels, flags) and
+#  ('results', until) requests on connection until ('stop',)
+def workerMain(connection, arguments):
+   worker = AreaWorker(*arguments)
+   while True:
+      request = connection.recv()
+      if request[0] == 'advance':
+         connection.send(worker.advance(*request[1:]))
+      elif request[0] == 'results':
+         connection.send(worker.results(request[1]))
+      else:
+         break
+   connection.close()
+
+
+## LocalWorker
+# An AreaWorker in this process with the same interface as a worker
+# process, used when there is only one worker
+class LocalWorker:
+   """ """
+   def __init__(self, arguments):
+      self.worker = AreaWorker(*arguments)
+      self.reply = None
+
+   def send(self, request):
+      if request[0] == 'advance':
+         self.reply = self.worker.advance(*request[1:])
+      elif request[0] == 'results':
+         self.reply = self.worker.results(request[1])
+
+   def recv(self):
+      return self.reply
+
+   def close(self):
+      pass
+
+
+## runParallelPark
+#  Simulates one park day of numberPatrons patrons in layout with the
+#  areas spread over workers processes and returns its summary, with
+#  the same keys as Park.summary() plus 'parallel': the workers, the
+#  lookahead, the number of windows, the processor seconds every
+#  worker spent simulating, the seconds the slowest worker of each
+#  window spent summed over the windows (the simulating part of the run
+#  time with one core per worker) and the seconds this process spent
+#  routing messages. The run draws from the streams of seed. Raises
+#  ValueError when workers is less than 1.
+def runParallelPark(numberPatrons, layout, servers = None, seed = 1,
+   workers = 2, until = 12 * 60, venueChanges = None):
+   if workers < 1:
+      raise ValueError('Parallel runs need at least 1 worker, not %s' % (
+         workers,))
+   lookahead = crossAreaLookahead(layout)
+   streams = RandomStreams(seed)
+   arrivals, departures = daySchedule(numberPatrons,
+      streams.stream('arrivals'), streams.stream('departures'))
+   assigned = assignAreas(layout, workers)
+   workerOfArea = [0] * len(layout.areaNames)
+   for worker in range(len(assigned)):
+      for areaId in assigned[worker]:
+         workerOfArea[areaId] = worker
+
+   connections = [ ]
+   processes = [ ]
+   for areaIds in assigned:
+      arguments = (layout, servers, areaIds, workerOfArea, arrivals,
+         departures, seed, venueChanges)
+      if len(assigned) == 1:
+         connections.append(LocalWorker(arguments))
+         continue
+      parentEnd, childEnd = Pipe()
+      process = Process(target = workerMain, args = (childEnd, arguments))
+      process.daemon = True
+      process.start()
+      childEnd.close()
+      connections.append(parentEnd)
+      processes.append(process)
+
+   try:
+      start = time.process_time()
+      inboxes = [[ ] for connection in connections]
+      flags = [ ]
+      windows = 0
+      criticalPath = 0.0
+      now = 0.0
+      while now < until:
+         now = min(now + lookahead, until)
+         for worker in range(len(connections)):
+            connections[worker].send(('advance', now, inboxes[worker], flags))
+         inboxes = [[ ] for connection in connections]
+         flags = [ ]
+         slowest = 0.0
+         for connection in connections:
+            parcels, lineFull, seconds = connection.recv()
+            slowest = max(slowest, seconds)
+            flags.extend(lineFull)
+            for worker, parcel in parcels.items():
+               inboxes[worker].append(parcel)
+         criticalPath = criticalPath + slowest
+         windows = windows + 1
+      coordinator = time.process_time() - start
+
+      results = [ ]
+      for connection in connections:
+         connection.send(('results', until))
+         results.append(connection.recv())
+   finally:
+      for connection in connections:
+         try:
+            connection.send(('stop',))
+         except (IOError, OSError):
+            pass
+         connection.close()
+      for process in processes:
+         process.join()
+
+   summary = mergeResults(results, numberPatrons, layout.size)
+   summary['parallel'] = {'workers': len(assigned), 'lookahead': lookahead,
+      'windows': windows, 'workerSeconds': [result['busy']
+      for result in results], 'criticalPathSeconds': criticalPath,
+      'coordinatorSeconds': coordinator}
+   if not processes:
+      # The only worker ran in this process
+      summary['parallel']['coordinatorSeconds'] = coordinator - \
+         results[0]['busy']
+   return summary
+
+
+## mergeResults
+#  Combines the workers' results into the summary of the day. A
+#  patron's counters are split over the areas it visited and add up.
+def mergeResults(results, numberPatrons, numberVenues):
+   patrons = PatronTable()
+   for patronId in range(numberPatrons):
+      patrons.add(0)
+   for column, typecode in (('venuesVisited', 'i'), ('noAvailableVenue', 'i'),
+      ('emptyLines', 'i'), ('timeInLine', 'd')):
+      total = getattr(patrons, column)
+      for result in results:
+         total = array(typecode, map(operator.add, total, result[column]))
+      setattr(patrons, column, total)
+
+   patronsServed = 0
+   totalLineDelay = 0.0
+   discouragedPatrons = 0
+   lineLength = 0.0
+   minutesEmpty = 0.0
+   minutesFull = 0.0
+   events = 0
+   for result in results:
+      events = events + result['events']
+      for served, delaySum, discouraged, average, empty, full in \
+         result['venues']:
+         patronsServed = patronsServed + served
+         totalLineDelay = totalLineDelay + delaySum
+         discouragedPatrons = discouragedPatrons + discouraged
+         lineLength = lineLength + average
+         minutesEmpty = minutesEmpty + empty
+         minutesFull = minutesFull + full
+
+   meanLineDelay = 0.0
+   if patronsServed > 0:
+      meanLineDelay = totalLineDelay / patronsServed
+   summary = patrons.dailyOutputs() # Req. 0002 - Req. 0008
+   summary.update({'patronsServed': patronsServed,
+      'meanLineDelay': meanLineDelay,
+      'discouragedPatrons': discouragedPatrons,
+      'timeAverageLineLength': lineLength / numberVenues,
+      'minutesLineEmpty': minutesEmpty / numberVenues,
+      'minutesLineFull': minutesFull / numberVenues,
+      'schedulerEvents': events})
+   return summary
@@ -0,0 +1,404 @@
+""" Amusement park model on the heapq kernel"""
+import random
+
+from lib.hourly import HourlyMetrics
+from lib.kernel import Simulation
+from lib.linestats import LineStats
+from lib.parklayout import loadLayout
+from lib.patrontable import PatronTable
+from lib.profiling import profiler
+from lib.sampler import PopularitySampler
+from lib.schedule import daySchedule
+from lib.waitline import WaitLine
+
+## @package AmusementPark
+# The Venue/Patron/VenueService model of Patron.py written as kernel
+# callbacks instead of SimPy processes. Patrons are rows of a
+# PatronTable and every step of a patron's day (arriving at a venue,
+# finishing service, leaving the park) is one heap event. The model
+# draws from the global random generator in the same places as
+# Patron.py, so with unlimited servers a seed gives the same daily
+# outputs as a SimPy run while dispatching far fewer events.
+
+## randint
+#  Same value and the same use of the global generator as
+#  random.randint(low, n): as many random.getrandbits() calls as
+#  randrange makes, without the Python level calls randint and
+#  randrange add to every draw. The generator is looked up on every
+#  draw, so random.seed() and friends are always seen.
+def randint(low, n):
+   span = n - low + 1
+   bits = span.bit_length()
+   value = random.getrandbits(bits)
+   while value >= span:
+      value = random.getrandbits(bits)
+   return low + value
+
+
+## ParkVenue
+# Venue state for the kernel model
+class ParkVenue:
+   """ """
+   __slots__ = ('venueId', 'name', 'type', 'number', 'area',
+      'lineCapacity', 'numPatronsPerHour', 'popularity', 'serviceTime',
+      'servers', 'busy', 'waitQueue', 'lineStats', 'sampleIndex',
+      'timesChosen')
+
+   ## __init__
+   #
+   #  This method creates venue venueId of a ParkLayout. servers is how
+   #  many patrons can be served at once, None means no limit as in
+   #  Patron.py
+   def __init__(self, layout, venueId, servers = None):
+      self.venueId = venueId
+      self.name = layout.names[venueId]
+      self.type = layout.types[venueId]
+      self.number = layout.numbers[venueId]
+      self.area = layout.area[venueId]
+      self.lineCapacity = layout.capacity[venueId]
+      self.numPatronsPerHour = layout.patronsPerHour[venueId]
+      self.popularity = layout.popularity[venueId]
+      self.serviceTime = layout.serviceTime[venueId] # Req. 0016
+      self.servers = servers
+      self.busy = 0 # Patrons being served
+      self.waitQueue = WaitLine()
+      self.lineStats = LineStats(self.lineCapacity, 0.0) # Req. 0009, Req. 0010
+      self.sampleIndex = None
+      self.timesChosen = 0
+
+
+## Park
+# One simulated park day on its own Simulation instance
+class Park:
+   """ """
+   ## __init__
+   #
+   #  This method creates Vendor 0 and the venues of layout, a
+   #  ParkLayout (the default park when None). hourlyReport(report) is
+   #  called with the figures of every simulated hour as it closes (see
+   #  lib/hourly.py). liveFeed is a LiveFeed (lib/livefeed.py) to
+   #  publish venue snapshots to while the park runs. randomStreams is a
+   #  RandomStreams (lib/streams.py) to draw from instead of the global
+   #  generator.
+   def __init__(self, layout = None, servers = None, hourlyReport = None,
+      liveFeed = None, randomStreams = None):
+      if layout is None:
+         layout = loadLayout()
+      self.sim = Simulation()
+      self.patrons = PatronTable()
+      self.layout = layout
+      self.walkTime = layout.walkTime # Req. 0035, Req. 0036
+      self.venueTable = [ParkVenue(layout, venueId, servers)
+         for venueId in range(layout.size)] # Every venue including Vendor 0
+      self.vendor0 = self.venueTable[0]
+      self.venues = self.venueTable[1:]
+      self.sampler = PopularitySampler(
+         [venue.popularity for venue in self.venues]) # Req. 0022
+      for i in range(len(self.venues)):
+         self.venues[i].sampleIndex = i
+
+      self.arrivals = [ ]
+      self.departures = [ ]
+      self.nextArrival = 0
+      self.randomStreams = randomStreams
+      self.patronStreams = None # Each patron's venue choice stream
+      if randomStreams is not None:
+         self.patronStreams = randomStreams.patronStreams()
+      self.hourly = None
+      if hourlyReport is not None:
+         self.hourly = HourlyMetrics(layout.names, hourlyReport)
+      self.liveFeed = liveFeed
+      if liveFeed is not None:
+         liveFeed.start(layout.names)
+         self.sim.schedule(liveFeed.interval, self.publishLive)
+
+   ## run
+   #  Simulates numberPatrons patrons until the park closes
+   def run(self, numberPatrons, until = 12 * 60):
+      self.start(numberPatrons)
+      self.advance(until)
+
+   ## start
+   #  Schedules the day's numberPatrons patrons without simulating any
+   #  of it
+   def start(self, numberPatrons):
+      if self.randomStreams is not None:
+         self.arrivals, self.departures = daySchedule(numberPatrons,
+            self.randomStreams.stream('arrivals'),
+            self.randomStreams.stream('departures'))
+      else:
+         self.arrivals, self.departures = daySchedule(numberPatrons)
+      if numberPatrons > 0:
+         self.sim.scheduleAt(self.arrivals[0], self.releasePatron)
+
+   ## advance
+   #  Simulates up to time until. A day can be advanced in several
+   #  steps, e.g. to a what-if snapshot and then to closing time.
+   def advance(self, until):
+      if profiler.enabled:
+         profiler.runKernel(self.sim, until)
+      else:
+         self.sim.run(until)
+      if self.hourly is not None:
+         self.hourly.advance(self.sim.now)
+
+   ## endWarmUp
+   #  Discards the line statistics and patron counters recorded so far,
+   #  so the summary only covers the rest of the day
+   def endWarmUp(self, unused):
+      for venue in self.venueTable:
+         venue.lineStats.restart(self.sim.now)
+      self.patrons.resetCounters(self.sim.now)
+
+   ## setVenue
+   #  Applies a what-if change to the venue called name: line capacity,
+   #  minutes of service or popularity. Patrons already in line stay in
+   #  it when the capacity shrinks.
+   def setVenue(self, name, capacity = None, serviceTime = None,
+      popularity = None):
+      venues = [venue for venue in self.venueTable if venue.name == name]
+      if not venues:
+         raise ValueError('No venue called ' + name)
+      venue = venues[0]
+      if capacity is not None:
+         length = len(venue.waitQueue)
+         wasFull = length >= venue.lineCapacity
+         venue.lineStats.change(self.sim.now, length)
+         venue.lineCapacity = capacity
+         venue.lineStats.capacity = capacity
+         if venue.sampleIndex is not None and wasFull != (length >= capacity):
+            if wasFull:
+               self.sampler.unmask(venue.sampleIndex) # Req. 0020
+            else:
+               self.sampler.mask(venue.sampleIndex)
+      if serviceTime is not None:
+         venue.serviceTime = serviceTime
+      if popularity is not None and venue.sampleIndex is not None:
+         venue.popularity = popularity
+         self.sampler.setWeight(venue.sampleIndex, popularity) # Req. 0022
+
+   ## publishLive
+   #  Publishes a snapshot of every venue and schedules the next one
+   def publishLive(self, unused):
+      self.liveFeed.snapshot(self.sim.now, self.venueTable)
+      self.sim.schedule(self.liveFeed.interval, self.publishLive)
+
+   ## releasePatron
+   #  Lets the next scheduled patron into the park and schedules the
+   #  one after it (Req. 0024)
+   def releasePatron(self, unused):
+      i = self.nextArrival
+      patronId = self.patrons.add(self.vendor0.venueId, self.arrivals[i],
+         self.departures[i]) # Req. 0023
+      if self.patronStreams is not None:
+         self.patronStreams.add()
+      self.nextArrival = i + 1
+      if self.nextArrival < len(self.arrivals):
+         self.sim.scheduleAt(self.arrivals[self.nextArrival],
+            self.releasePatron)
+      if self.hourly is not None:
+         self.hourly.parkArrival(self.sim.now)
+      self.enterVenue(patronId)
+
+   ## enterVenue
+   #  The patron has reached its next venue and gets in line if there
+   #  is room
+   def enterVenue(self, patronId):
+      patrons = self.patrons
+      now = self.sim.now
+      venue = self.venueTable[patrons.nextVenue[patronId]]
+      patrons.lastVenue[patronId] = venue.venueId
+      line = venue.waitQueue
+      length = len(line)
+
+      if length < venue.lineCapacity:
+         if length == 0: # Req. 0008
+            patrons.emptyLines[patronId] = patrons.emptyLines[patronId] + 1
+         line.join(patronId, now)
+         if self.hourly is not None:
+            self.hourly.join(now, venue.venueId, length == 0)
+         length = length + 1
+         venue.lineStats.change(now, length)
+         if length == venue.lineCapacity and venue.sampleIndex is not None:
+            self.sampler.mask(venue.sampleIndex) # Req. 0020
+         # Req. 0004, Req. 0005
+         patrons.venuesVisited[patronId] = patrons.venuesVisited[patronId] + 1
+         patrons.avoidVenues[patronId] = None
+         patrons.lineFull[patronId] = False
+         if venue.servers is None or venue.busy < venue.servers:
+            self.serveNext(venue)
+      else:
+         patrons.lineFull[patronId] = True
+         venue.lineStats.discourage()
+         if self.hourly is not None:
+            self.hourly.balk(now, venue.venueId)
+         self.leaveVenue(patronId)
+
+   ## serveNext
+   #  Takes the patron at the front of the venue's line and schedules
+   #  the end of its service
+   def serveNext(self, venue):
+      now = self.sim.now
+      patronId, lineArrivalTime = venue.waitQueue.leave()
+      length = len(venue.waitQueue)
+      if length == venue.lineCapacity - 1 and venue.sampleIndex is not None:
+         self.sampler.unmask(venue.sampleIndex) # Req. 0020
+      venue.lineStats.change(now, length)
+      venue.lineStats.observeDelay(now - lineArrivalTime)
+      if self.hourly is not None:
+         self.hourly.serve(now, venue.venueId, now - lineArrivalTime)
+      self.patrons.timeInLine[patronId] = self.patrons.timeInLine[patronId] + \
+         now - lineArrivalTime # Req. 0002, Req. 0003
+      venue.busy = venue.busy + 1
+      self.sim.schedule(venue.serviceTime, self.serviceDone, patronId)
+
+   ## serviceDone
+   #  The patron has been served; the server takes the next patron in
+   #  line, if any
+   def serviceDone(self, patronId):
+      venue = self.venueTable[self.patrons.nextVenue[patronId]]
+      venue.busy = venue.busy - 1
+      self.leaveVenue(patronId)
+      if len(venue.waitQueue) > 0:
+         self.serveNext(venue)
+
+   ## leaveVenue
+   #  The patron leaves the park if its departure time has passed,
+   #  otherwise it chooses and walks to its next venue
+   def leaveVenue(self, patronId):
+      # Req. 0025 - Req. 0034
+      if self.sim.now >= self.patrons.departureTime[patronId]:
+         if self.hourly is not None:
+            self.hourly.parkDeparture(self.sim.now)
+         return
+      nextVenue = self.chooseNextVenue(patronId)
+      walkTime = self.walkTime[self.patrons.lastVenue[patronId] *
+         self.layout.size + nextVenue.venueId] # Req. 0035, Req. 0036
+      self.sim.schedule(walkTime, self.enterVenue, patronId)
+
+   ## chooseNextVenue
+   #  Same choice as Patron.chooseNextVenue in Patron.py
+   def chooseNextVenue(self, patronId):
+      patrons = self.patrons
+      sampler = self.sampler
+      venueTable = self.venueTable
+      lastVenue = venueTable[patrons.lastVenue[patronId]]
+      patronStreams = self.patronStreams
+      if patronStreams is not None:
+         randomNumber = patronStreams.randint(patronId, 1, 100)
+      else:
+         randomNumber = randint(1, 100)
+      if randomNumber <= 5 and not patrons.lineFull[patronId] and \
+         lastVenue is not self.vendor0: # Req. 0021
+         return lastVenue
+
+      avoidVenues = patrons.avoidVenues[patronId]
+      if lastVenue is not self.vendor0:
+         if avoidVenues is None:
+            avoidVenues = [ ]
+            patrons.avoidVenues[patronId] = avoidVenues
+         avoidVenues.append(lastVenue.venueId)
+      if avoidVenues is None:
+         avoidVenues = [ ]
+
+      for venueId in avoidVenues:
+         sampler.mask(venueTable[venueId].sampleIndex)
+      totalPopularity = sampler.total()
+
+      if totalPopularity == 0: # Req. 0007
+         patrons.noAvailableVenue[patronId] = \
+            patrons.noAvailableVenue[patronId] + 1
+         for venueId in avoidVenues:
+            sampler.unmask(venueTable[venueId].sampleIndex)
+         avoidVenues = [ ]
+         patrons.avoidVenues[patronId] = None
+         totalPopularity = sampler.total()
+
+      if totalPopularity == 0:
+         # Every line in the park is full, so walk to a venue by
+         # popularity alone and hope for room on arrival
+         nextVenue = self.chooseVenueIgnoringLines(patronId)
+      elif patronStreams is not None:
+         nextVenue = self.venues[sampler.find(patronStreams.randint(patronId,
+            1, totalPopularity))]
+      else:
+         nextVenue = self.venues[sampler.find(randint(1, totalPopularity))]
+
+      for venueId in avoidVenues:
+         sampler.unmask(venueTable[venueId].sampleIndex)
+      patrons.nextVenue[patronId] = nextVenue.venueId
+      nextVenue.timesChosen = nextVenue.timesChosen + 1
+      if self.hourly is not None:
+         self.hourly.choose(self.sim.now, nextVenue.venueId)
+      return nextVenue
+
+   def chooseVenueIgnoringLines(self, patronId):
+      totalPopularity = sum([venue.popularity for venue in self.venues])
+      if self.patronStreams is not None:
+         randomNumber = self.patronStreams.randint(patronId, 1,
+            totalPopularity)
+      else:
+         randomNumber = randint(1, totalPopularity)
+      currentPopularity = 0
+      for venue in self.venues:
+         currentPopularity = currentPopularity + venue.popularity
+         if randomNumber <= currentPopularity:
+            return venue
+
+   ## summary
+   #  Outputs of the run with the same keys as parkSummary() in
+   #  Patron.py
+   def summary(self):
+      patronsServed = 0
+      totalLineDelay = 0.0
+      discouragedPatrons = 0
+      lineLength = 0.0
+      minutesEmpty = 0.0
+      minutesFull = 0.0
+      for venue in self.venueTable:
+         stats = venue.lineStats
+         patronsServed = patronsServed + stats.served
+         totalLineDelay = totalLineDelay + stats.delaySum
+         discouragedPatrons = discouragedPatrons + stats.discouraged
+         lineLength = lineLength + stats.timeAverage(self.sim.now)
+         minutesEmpty = minutesEmpty + stats.minutesEmpty
+         minutesFull = minutesFull + stats.minutesFull
+
+      meanLineDelay = 0.0
+      if patronsServed > 0:
+         meanLineDelay = totalLineDelay / patronsServed
+      venues = len(self.venueTable)
+      summary = self.patrons.dailyOutputs() # Req. 0002 - Req. 0008
+      summary.update({'patronsServed': patronsServed,
+         'meanLineDelay': meanLineDelay,
+         'discouragedPatrons': discouragedPatrons,
+         'timeAverageLineLength': lineLength / venues,
+         'minutesLineEmpty': minutesEmpty / venues,
+         'minutesLineFull': minutesFull / venues,
+         'schedulerEvents': self.sim.events})
+      return summary
+
+
+# Methods timed by Patron.py --profile on top of the per-callback costs
+profiler.watch(Park, 'chooseNextVenue')
+profiler.watch(Park, 'serveNext')
+
+
+## runPark
+#  Simulates one park day on the kernel and returns its summary. layout
+#  is a ParkLayout, the default park when None. venueChanges maps venue
+#  names to setVenue() changes made before the park opens.
+#  hourlyReport, liveFeed and randomStreams are passed to Park. The
+#  summary leaves out the first warmUp minutes of the day.
+def runPark(numberPatrons, layout = None, servers = None,
+   until = 12 * 60, venueChanges = None, hourlyReport = None,
+   liveFeed = None, randomStreams = None, warmUp = 0.0):
+   park = Park(layout, servers, hourlyReport, liveFeed, randomStreams)
+   park.start(numberPatrons)
+   if warmUp > 0:
+      park.sim.scheduleAt(warmUp, park.endWarmUp)
+   if venueChanges is not None:
+      for name, changes in venueChanges.items():
+         park.setVenue(name, **changes)
+   park.advance(until)
+   return park.summary()
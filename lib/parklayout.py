@@ -0,0 +1,196 @@
+""" Park layout"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import random
+import time
+from array import array
+
+## @package AmusementPark
+# The venues in the park, shared by every simulation backend. A layout
+# is a JSON file (see layouts/default.json) that is compiled once into
+# integer venue ids, typed columns, a per-area venue index and a dense
+# walk-time matrix. The compiled layout is cached next to the file in
+# binary form and reused for as long as the file's contents do not
+# change, so large parks start up without parsing and compiling again.
+#
+# Layout file:
+#    serviceTimes  minutes to serve a patron by venue type (Req. 0016)
+#    walkTimes     sameArea and otherArea minutes (Req. 0035, Req. 0036)
+#                  and optional "between": [[area, area, minutes], ...]
+#    vendor0       the venue every patron visits first (Req. 0023)
+#    venues        type, number, capacity, patronsPerHour, popularity
+#                  and optionally area. Without an area the first
+#                  character of the number is the venue's area.
+
+defaultLayoutPath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+   'layouts', 'default.json')
+
+cacheVersion = 1 # Changed whenever the compiled form changes
+
+loadedLayouts = {} # path -> (contents hash, ParkLayout)
+
+
+## ParkLayout
+# A compiled park layout. Venue id 0 is Vendor 0 and the layout's
+# venues follow in file order, which is also the order both backends
+# create them in. Per-venue values are columns indexed by venue id.
+class ParkLayout:
+   """ """
+   ## __init__
+   #
+   #  This method compiles the decoded contents of a layout file
+   def __init__(self, description):
+      self.serviceTimes = dict(description['serviceTimes'])
+      walkTimes = description['walkTimes']
+      venues = [description['vendor0']] + list(description['venues'])
+
+      self.size = len(venues)
+      self.types = [venue['type'] for venue in venues]
+      self.numbers = [venue['number'] for venue in venues]
+      self.names = [venue['type'] + ' ' + venue['number'] for venue in venues]
+      self.capacity = array('i', [venue['capacity'] for venue in venues])
+      self.patronsPerHour = array('i',
+         [venue['patronsPerHour'] for venue in venues])
+      # Vendor 0 is never chosen as a next venue (Req. 0023)
+      self.popularity = array('i',
+         [0] + [venue['popularity'] for venue in venues[1:]])
+      self.serviceTime = array('d',
+         [self.serviceTimes.get(venue['type'], 0) for venue in venues])
+
+      self.areaNames = [ ]
+      areaIds = {}
+      self.area = array('i')
+      for venue in venues:
+         areaName = venue.get('area', venue['number'][0])
+         if areaName not in areaIds:
+            areaIds[areaName] = len(self.areaNames)
+            self.areaNames.append(areaName)
+         self.area.append(areaIds[areaName])
+      self.areaVenues = [array('i') for areaName in self.areaNames]
+      for venueId in range(self.size):
+         self.areaVenues[self.area[venueId]].append(venueId)
+
+      # Minutes between areas, then between every pair of venues
+      areas = len(self.areaNames)
+      areaWalk = [[walkTimes['otherArea']] * areas for i in range(areas)]
+      for i in range(areas):
+         areaWalk[i][i] = walkTimes['sameArea']
+      for first, second, minutes in walkTimes.get('between', [ ]):
+         areaWalk[areaIds[first]][areaIds[second]] = minutes
+         areaWalk[areaIds[second]][areaIds[first]] = minutes
+      self.walkTime = array('d')
+      for fromVenue in range(self.size):
+         row = areaWalk[self.area[fromVenue]]
+         self.walkTime.extend([row[self.area[toVenue]]
+            for toVenue in range(self.size)])
+
+   ## venue
+   #  Returns (type, number, line capacity, patrons per hour,
+   #  popularity) of venueId
+   def venue(self, venueId):
+      return (self.types[venueId], self.numbers[venueId],
+         self.capacity[venueId], self.patronsPerHour[venueId],
+         self.popularity[venueId])
+
+   ## venues
+   #  Returns the description of every venue except Vendor 0
+   def venues(self):
+      return [self.venue(venueId) for venueId in range(1, self.size)]
+
+
+## CacheUnpickler
+# Reads a layout cache. A cache only holds numbers, strings, lists,
+# dicts and arrays, so any other global a pickle names is refused
+# instead of imported, and a stray file next to the layout cannot run
+# code.
+class CacheUnpickler(pickle.Unpickler):
+   """ """
+   def find_class(self, module, name):
+      if module == 'array' and name in ('array', '_array_reconstructor'):
+         return pickle.Unpickler.find_class(self, module, name)
+      raise pickle.UnpicklingError('Layout caches cannot hold %s.%s' % (
+         module, name))
+
+
+## loadLayout
+#  Returns the compiled layout of the file at path, from the binary
+#  cache when it was compiled from the same contents. A cache that
+#  cannot be read or does not match is rebuilt.
+def loadLayout(path = defaultLayoutPath):
+   with open(path, 'rb') as layoutFile:
+      contents = layoutFile.read()
+   contentsHash = hashlib.sha1(contents).hexdigest()
+
+   loaded = loadedLayouts.get(path)
+   if loaded is not None and loaded[0] == contentsHash:
+      return loaded[1]
+
+   cachePath = path + '.cache'
+   layout = None
+   try:
+      with open(cachePath, 'rb') as cacheFile:
+         version, cachedHash, columns = CacheUnpickler(cacheFile).load()
+      if version == cacheVersion and cachedHash == contentsHash and \
+         isinstance(columns, dict):
+         layout = ParkLayout.__new__(ParkLayout)
+         layout.__dict__.update(columns)
+   except Exception:
+      # Missing, stale, truncated or foreign caches are all rebuilt
+      layout = None
+
+   if layout is None:
+      layout = ParkLayout(json.loads(contents.decode('utf-8')))
+      # Written under a temporary name first so a reader never sees a
+      # partial cache. A read-only directory just means no cache.
+      try:
+         temporaryPath = '%s.%d' % (cachePath, os.getpid())
+         with open(temporaryPath, 'wb') as cacheFile:
+            pickle.dump((cacheVersion, contentsHash, layout.__dict__),
+               cacheFile, pickle.HIGHEST_PROTOCOL)
+         os.replace(temporaryPath, cachePath)
+      except (IOError, OSError):
+         pass
+
+   loadedLayouts[path] = (contentsHash, layout)
+   return layout
+
+
+## generateLayout
+#  Returns a layout file description with numberVenues venues spread
+#  over numberAreas areas, for trying out large parks
+def generateLayout(numberVenues, numberAreas, rng = random):
+   types = ['Ride', 'Attraction', 'Vendor']
+   venues = [ ]
+   for i in range(numberVenues):
+      venues.append({'type': types[i % 3],
+         'number': 'A%d-%d' % (i % numberAreas, i // numberAreas),
+         'area': 'A%d' % (i % numberAreas), 'capacity': 20,
+         'patronsPerHour': 30, 'popularity': rng.randint(1, 10)})
+   return {'serviceTimes': {'Vendor': 3, 'Ride': 6, 'Attraction': 10},
+      'walkTimes': {'sameArea': 2, 'otherArea': 5},
+      'vendor0': {'type': 'Vendor', 'number': '0', 'capacity': 50,
+         'patronsPerHour': 50},
+      'venues': venues}
+
+
+if __name__ == '__main__':
+   parser = argparse.ArgumentParser(description = 'Compile or generate '
+      'park layout files')
+   parser.add_argument('layout', help = 'layout file')
+   parser.add_argument('--generate', type = int, nargs = 2,
+      metavar = ('VENUES', 'AREAS'), help = 'write a generated layout with '
+      'this many venues and areas to the file first')
+   args = parser.parse_args()
+
+   if args.generate is not None:
+      with open(args.layout, 'w') as outFile:
+         json.dump(generateLayout(args.generate[0], args.generate[1]),
+            outFile, indent = 1)
+
+   start = time.perf_counter()
+   layout = loadLayout(args.layout)
+   print('%d venues in %d areas loaded in %.4f seconds' % (layout.size,
+      len(layout.areaNames), time.perf_counter() - start))
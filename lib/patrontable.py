@@ -0,0 +1,132 @@
+""" Patron state table"""
+from array import array
+
+try:
+   import numpy
+except ImportError:
+   numpy = None
+
+## @package AmusementPark
+# Patron state kept as one typed array per field (struct of arrays)
+# indexed by an integer patron id, with venues referred to by their
+# integer venue id. A patron costs a few dozen bytes here instead of
+# an instance dictionary full of boxed integers and object references,
+# and the daily outputs are reductions over whole columns.
+
+
+## PatronTable
+# Columns of per-patron state. Req. 0002 - Req. 0008 outputs are
+# computed by dailyOutputs().
+class PatronTable:
+   """ """
+   __slots__ = ('arrivalTime', 'departureTime', 'nextVenue', 'lastVenue',
+      'venuesVisited', 'noAvailableVenue', 'emptyLines', 'lineFull',
+      'timeInLine', 'avoidVenues', 'measuredFrom')
+
+   ## __init__
+   #
+   #  This method initializes an empty PatronTable
+   def __init__(self):
+      self.arrivalTime = array('d') # Req. 0024
+      self.departureTime = array('d') # Req. 0025 - Req. 0034
+      self.nextVenue = array('i') # Venue id the patron is walking to or is at
+      self.lastVenue = array('i') # Venue id that last served the patron
+      self.venuesVisited = array('i') # Req. 0004, Req. 0005
+      self.noAvailableVenue = array('i') # Req. 0007
+      self.emptyLines = array('i') # Req. 0008
+      self.lineFull = array('b') # Last venue's line was full
+      self.timeInLine = array('d') # Req. 0002, Req. 0003
+      # Venue ids the patron found full since it was last served, None
+      # while there are none
+      self.avoidVenues = []
+      # Patrons due to leave by this time are left out of dailyOutputs
+      self.measuredFrom = None
+
+   def __len__(self):
+      return len(self.nextVenue)
+
+   ## add
+   #  Adds a patron whose first venue is firstVenue and returns its id.
+   #  By default the patron stays until the park closes at 10PM.
+   def add(self, firstVenue, arrivalTime = 0.0, departureTime = 12 * 60.0):
+      self.arrivalTime.append(arrivalTime)
+      self.departureTime.append(departureTime)
+      self.nextVenue.append(firstVenue)
+      self.lastVenue.append(firstVenue)
+      self.venuesVisited.append(0)
+      self.noAvailableVenue.append(0)
+      self.emptyLines.append(0)
+      self.lineFull.append(0)
+      self.timeInLine.append(0.0)
+      self.avoidVenues.append(None)
+      return len(self.nextVenue) - 1
+
+   ## resetCounters
+   #  Zeroes the Req. 0002 - Req. 0008 counters of every patron at time,
+   #  e.g. at the end of a warm-up period. From then on dailyOutputs only
+   #  covers the patrons due to stay past time.
+   def resetCounters(self, time):
+      self.measuredFrom = time
+      patrons = len(self)
+      self.venuesVisited = array('i', [0]) * patrons
+      self.noAvailableVenue = array('i', [0]) * patrons
+      self.emptyLines = array('i', [0]) * patrons
+      self.timeInLine = array('d', [0.0]) * patrons
+
+   ## dailyOutputs
+   #  Returns the Req. 0002 - Req. 0008 outputs for the patrons in the
+   #  table, after resetCounters only for those due to stay past its
+   #  time. Uses NumPy views of the columns when NumPy is installed.
+   def dailyOutputs(self):
+      if self.measuredFrom is None:
+         measured = None
+         patrons = len(self)
+      elif numpy is not None:
+         measured = numpy.frombuffer(self.departureTime,
+            dtype = numpy.float64) > self.measuredFrom
+         patrons = int(measured.sum())
+      else:
+         measured = [departure > self.measuredFrom
+            for departure in self.departureTime]
+         patrons = sum(measured)
+      if patrons == 0:
+         return {'averageTimeInLine': 0.0, 'averageTimeInLinePerVisit': 0.0,
+            'averageVenuesVisited': 0.0, 'maxVenuesVisited': 0,
+            'noAvailableVenue': 0, 'emptyLineSelections': 0}
+
+      if numpy is not None:
+         columns = [numpy.frombuffer(self.timeInLine, dtype = numpy.float64),
+            numpy.frombuffer(self.venuesVisited, dtype = numpy.intc),
+            numpy.frombuffer(self.noAvailableVenue, dtype = numpy.intc),
+            numpy.frombuffer(self.emptyLines, dtype = numpy.intc)]
+         if measured is not None:
+            columns = [column[measured] for column in columns]
+         timeInLine = float(columns[0].sum())
+         visits = int(columns[1].sum())
+         maxVisits = int(columns[1].max())
+         noAvailableVenue = int(columns[2].sum())
+         emptyLines = int(columns[3].sum())
+      else:
+         columns = [self.timeInLine, self.venuesVisited,
+            self.noAvailableVenue, self.emptyLines]
+         if measured is not None:
+            columns = [[value for value, keep in zip(column, measured) if keep]
+               for column in columns]
+         timeInLine = sum(columns[0])
+         visits = sum(columns[1])
+         maxVisits = max(columns[1])
+         noAvailableVenue = sum(columns[2])
+         emptyLines = sum(columns[3])
+
+      timeInLinePerVisit = 0.0
+      if visits > 0:
+         timeInLinePerVisit = timeInLine / visits
+
+      return {
+         'averageTimeInLine': timeInLine / patrons, # Req. 0002
+         'averageTimeInLinePerVisit': timeInLinePerVisit, # Req. 0003
+         'averageVenuesVisited': visits / float(patrons), # Req. 0004
+         'maxVenuesVisited': maxVisits, # Req. 0005
+         'noAvailableVenue': noAvailableVenue, # Req. 0007
+         'emptyLineSelections': emptyLines, # Req. 0008
+      }
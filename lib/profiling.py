@@ -0,0 +1,315 @@
+""" Simulation profiling hooks"""
+import inspect
+import time
+from heapq import heappop
+
+## @package AmusementPark
+# Counts scheduler events and measures wall time per process class and
+# PEM (or per kernel callback), times selected hot methods, and records
+# how long processes wait on Level puts and gets. Nothing is patched
+# while the profiler is off, so a run that is not profiled only pays
+# for one check of profiler.enabled when the simulation starts.
+#
+# SimPy runs are profiled by replacing parts of SimPy's scheduler that
+# are not public: a process's _nextpoint and a Simulation's _timestamps,
+# _dispatch, _commandwords and _t. These are only known to work with
+# SimPy 2.3.1, the version the model is pinned to, and instrument()
+# refuses any other version (see checkSimPy). Kernel runs need no
+# patching.
+
+# SimPy version whose internals instrument() patches
+supportedSimPy = '2.3.1'
+
+
+## checkSimPy
+#  Raises RuntimeError unless the installed SimPy is supportedSimPy and
+#  sim, a SimPy Simulation, has the internals instrument() patches
+def checkSimPy(sim = None):
+   import SimPy
+   version = getattr(SimPy, '__version__', 'unknown')
+   if version != supportedSimPy:
+      raise RuntimeError('Profiling SimPy runs needs SimPy %s, whose '
+         'scheduler internals it patches, but SimPy %s is installed' % (
+         supportedSimPy, version))
+   if sim is not None:
+      missing = [name for name in ('_timestamps', '_dispatch',
+         '_commandwords', '_t') if not hasattr(sim, name)]
+      if missing:
+         raise RuntimeError('Cannot profile this SimPy simulation, it has '
+            'no %s' % ', '.join(missing))
+
+
+## ProcessCost
+# Events and wall time attributed to one process class and PEM
+class ProcessCost:
+   """ """
+   __slots__ = ('events', 'seconds', 'starts')
+
+   def __init__(self):
+      self.events = 0
+      self.seconds = 0.0
+      self.starts = 0 # PEMs started, i.e. processes activated
+
+
+## LevelWaits
+# Put and get requests on one Level. Line lengths are sampled when a
+# request is made and waits run from the request until the requesting
+# process is resumed.
+class LevelWaits:
+   """ """
+   __slots__ = ('requests', 'amountSum', 'maxAmount', 'queuedSum',
+      'waits', 'waitSum', 'maxWait')
+
+   def __init__(self):
+      self.requests = {'put': 0, 'get': 0}
+      self.amountSum = 0.0
+      self.maxAmount = 0
+      self.queuedSum = 0 # Processes already blocked on the Level
+      self.waits = {'put': 0, 'get': 0}
+      self.waitSum = {'put': 0.0, 'get': 0.0}
+      self.maxWait = {'put': 0.0, 'get': 0.0}
+
+
+## Profiler
+# Collects costs across runs until reset() is called
+class Profiler:
+   """ """
+   ## __init__
+   #
+   #  This method initializes a disabled Profiler
+   def __init__(self):
+      self.enabled = False
+      self.watched = [ ] # (owner, attribute name, original)
+      self.patched = False
+      self.reset()
+
+   ## reset
+   #  Forgets everything recorded so far
+   def reset(self):
+      self.processes = {} # (class name, PEM name) -> ProcessCost
+      self.calls = {} # method name -> [calls, seconds]
+      self.levels = {} # Level name -> LevelWaits
+      self.pending = {} # process -> (LevelWaits, 'put' or 'get', time)
+      self.runSeconds = 0.0
+
+   ## enable
+   #  Turns profiling on. Simulations started from now on are
+   #  instrumented and watched methods are timed immediately.
+   def enable(self):
+      self.enabled = True
+      if not self.patched:
+         for owner, name, original in self.watched:
+            setattr(owner, name, self.timed(name if inspect.ismodule(owner)
+               else owner.__name__ + '.' + name, original))
+         self.patched = True
+
+   ## disable
+   #  Turns profiling off and restores watched methods. An instrumented
+   #  simulation that is still running stops recording.
+   def disable(self):
+      self.enabled = False
+      if self.patched:
+         for owner, name, original in self.watched:
+            setattr(owner, name, original)
+         self.patched = False
+
+   ## watch
+   #  Times every call of owner.name (a method of a class or a function
+   #  of a module) while the profiler is on
+   def watch(self, owner, name):
+      original = getattr(owner, name)
+      self.watched.append((owner, name, original))
+      if self.patched:
+         setattr(owner, name, self.timed(name if inspect.ismodule(owner)
+            else owner.__name__ + '.' + name, original))
+
+   ## timed
+   #  Returns function wrapped to add its calls and wall time to label
+   def timed(self, label, function):
+      self.calls.setdefault(label, [0, 0.0])
+      clock = time.perf_counter
+
+      def timedFunction(*args, **kwargs):
+         start = clock()
+         try:
+            return function(*args, **kwargs)
+         finally:
+            entry = self.calls.get(label)
+            if entry is None: # reset() since the method was patched
+               entry = self.calls[label] = [0, 0.0]
+            entry[0] = entry[0] + 1
+            entry[1] = entry[1] + clock() - start
+      return timedFunction
+
+   ## processCost
+   #  Returns the ProcessCost of process's class and current PEM
+   def processCost(self, process):
+      generator = process._nextpoint
+      key = (process.__class__.__name__,
+         generator.gi_code.co_name if generator is not None else '?')
+      cost = self.processes.get(key)
+      if cost is None:
+         cost = self.processes[key] = ProcessCost()
+      if generator is not None and \
+         inspect.getgeneratorstate(generator) == inspect.GEN_CREATED:
+         cost.starts = cost.starts + 1
+      return cost
+
+   ## instrument
+   #  Returns a replacement for sim.step, a SimPy Simulation, that
+   #  attributes every event to the process it resumes, and wraps the
+   #  put and get commands of sim to record Level waits. release(sim)
+   #  must be called when the run is over. Raises RuntimeError for a
+   #  SimPy other than supportedSimPy.
+   def instrument(self, sim):
+      checkSimPy(sim)
+      step = sim.step
+      timestamps = sim._timestamps
+      clock = time.perf_counter
+      pending = self.pending
+
+      def profiledStep():
+         if not self.enabled:
+            return step()
+         # Drop cancelled notices here, as step() would, so the notice
+         # at the top is the process step() resumes
+         while timestamps and timestamps[0][3]:
+            heappop(timestamps)
+         if not timestamps:
+            return step()
+         process = timestamps[0][2]
+         cost = self.processCost(process)
+         request = pending.pop(process, None)
+         if request is not None:
+            waits, kind, requestTime = request
+            wait = timestamps[0][0] - requestTime
+            waits.waits[kind] = waits.waits[kind] + 1
+            waits.waitSum[kind] = waits.waitSum[kind] + wait
+            if wait > waits.maxWait[kind]:
+               waits.maxWait[kind] = wait
+         start = clock()
+         result = step()
+         elapsed = clock() - start
+         cost.events = cost.events + 1
+         cost.seconds = cost.seconds + elapsed
+         self.runSeconds = self.runSeconds + elapsed
+         return result
+
+      dispatch = dict(sim._dispatch)
+      for command in list(dispatch.keys()):
+         kind = sim._commandwords.get(command)
+         if kind in ('put', 'get'):
+            dispatch[command] = self.levelCommand(sim, kind, dispatch[command])
+      sim._dispatch = dispatch
+      return profiledStep
+
+   ## levelCommand
+   #  Returns a wrapper of the SimPy put or get command function that
+   #  records the request on the Level's LevelWaits
+   def levelCommand(self, sim, kind, command):
+      def recordedCommand(arguments):
+         if self.enabled:
+            request, process = arguments
+            level = request[2]
+            waits = self.levels.get(level.name)
+            if waits is None:
+               waits = self.levels[level.name] = LevelWaits()
+            waits.requests[kind] = waits.requests[kind] + 1
+            waits.amountSum = waits.amountSum + level.amount
+            if level.amount > waits.maxAmount:
+               waits.maxAmount = level.amount
+            waits.queuedSum = waits.queuedSum + len(level.putQ) + \
+               len(level.getQ)
+            self.pending[process] = (waits, kind, sim._t)
+         command(arguments)
+      return recordedCommand
+
+   ## release
+   #  Undoes instrument(sim)
+   def release(self, sim):
+      if '_dispatch' in sim.__dict__:
+         del sim._dispatch
+      self.pending.clear()
+
+   ## runKernel
+   #  Same as sim.run(until) for a lib/kernel.py Simulation, attributing
+   #  every event to its callback
+   def runKernel(self, sim, until):
+      queue = sim.queue
+      clock = time.perf_counter
+      processes = self.processes
+      dispatched = 0
+      while queue and queue[0][0] <= until:
+         eventTime, sequence, callback, argument = heappop(queue)
+         sim.now = eventTime
+         dispatched = dispatched + 1
+         if not self.enabled:
+            callback(argument)
+            continue
+         key = ('callback', getattr(callback, '__qualname__',
+            callback.__name__))
+         cost = processes.get(key)
+         if cost is None:
+            cost = processes[key] = ProcessCost()
+         start = clock()
+         callback(argument)
+         elapsed = clock() - start
+         cost.events = cost.events + 1
+         cost.seconds = cost.seconds + elapsed
+         self.runSeconds = self.runSeconds + elapsed
+      sim.events = sim.events + dispatched
+      if until > sim.now:
+         sim.now = until
+
+   ## report
+   #  Returns the profile as text: processes and watched methods sorted
+   #  by wall time, then Levels sorted by total wait. Watched methods
+   #  run inside some process's events, so their time is also part of
+   #  a process row.
+   def report(self):
+      rows = [ ]
+      for (className, pemName), cost in self.processes.items():
+         name = pemName if className == 'callback' else \
+            className + '.' + pemName
+         rows.append(('event', name, cost.events, cost.seconds,
+            None if className == 'callback' else cost.starts))
+      for name, (calls, seconds) in self.calls.items():
+         if calls > 0:
+            rows.append(('call', name, calls, seconds, None))
+      rows.sort(key = lambda row: row[3], reverse = True)
+
+      total = self.runSeconds
+      lines = ['%-5s %-36s %10s %10s %9s %7s %8s' % ('kind', 'name', 'count',
+         'seconds', 'us each', '% run', 'started')]
+      for kind, name, count, seconds, starts in rows:
+         lines.append('%-5s %-36s %10d %10.4f %9.2f %7.1f %8s' % (kind, name,
+            count, seconds, 1e6 * seconds / count if count else 0.0,
+            100.0 * seconds / total if total > 0 else 0.0,
+            '' if starts is None else str(starts)))
+      lines.append('%-5s %-36s %10d %10.4f' % ('', 'total',
+         sum([cost.events for cost in self.processes.values()]), total))
+
+      if self.levels:
+         lines.append('')
+         lines.append('%-22s %7s %7s %9s %7s %9s %9s %9s %9s' % ('level',
+            'puts', 'gets', 'mean len', 'max len', 'blocked', 'put wait',
+            'get wait', 'max wait'))
+         levels = sorted(self.levels.items(), key = lambda item:
+            item[1].waitSum['put'] + item[1].waitSum['get'], reverse = True)
+         for name, waits in levels:
+            requests = waits.requests['put'] + waits.requests['get']
+            lines.append('%-22s %7d %7d %9.2f %7d %9.2f %9.2f %9.2f %9.2f' % (
+               name, waits.requests['put'], waits.requests['get'],
+               waits.amountSum / requests if requests else 0.0,
+               waits.maxAmount,
+               waits.queuedSum / float(requests) if requests else 0.0,
+               waits.waitSum['put'] / waits.waits['put']
+                  if waits.waits['put'] else 0.0,
+               waits.waitSum['get'] / waits.waits['get']
+                  if waits.waits['get'] else 0.0,
+               max(waits.maxWait['put'], waits.maxWait['get'])))
+      return '\n'.join(lines)
+
+
+# The profiler used by Patron.py and lib/park.py
+profiler = Profiler()
@@ -0,0 +1,277 @@
+""" Analytical venue queue estimates"""
+import math
+
+from lib.schedule import arrivalWindow, departurePercentages, departureStart
+
+## @package AmusementPark
+# Closed form and numerical steady state results for a venue seen as a
+# finite capacity queue: Poisson arrivals, a fixed service time
+# (Req. 0016), servers patrons served at once and a line of at most
+# lineCapacity patrons (Req. 0017). Patrons who find the line full walk
+# away (Req. 0020). An estimate costs microseconds to milliseconds, so
+# a large configuration space can be screened before the promising
+# configurations are simulated. The estimates assume a steady state,
+# while the park fills up in the morning and empties in the evening, so
+# they should be checked against simulation (see sweep.py --screen).
+#
+# Measured against the mean of 5 kernel runs of the default layout, for
+# 100, 1000 and 3000 patrons, 1, 2 and 4 servers and Ride A0 capacity
+# 5 or 20, the relative errors of estimatePark were:
+#                            all        1000 and 3000 patrons
+#    patronsServed            -11% to +20%     -1% to +6%
+#    averageVenuesVisited     -13% to +18%    -13% to +5%
+#    meanLineDelay            +12% to +99%    +12% to +27%
+#    timeAverageLineLength     +1% to +124%    +1% to +32%
+#    discouragedPatrons       -18% to +685%    +4% to +58%
+# Lightly loaded parks are the worst cases: at 100 patrons with one
+# server, meanLineDelay is nearly doubled and discouragedPatrons is
+# about 7 times too high, because lines there only form in the morning
+# rush. Line delay is overestimated in every configuration measured.
+# The estimates are only good enough to rank configurations for a
+# closer look, not to stand in for simulation.
+
+
+## VenueEstimate
+# Steady state figures of one venue
+class VenueEstimate:
+   """ """
+   __slots__ = ('arrivalRate', 'blockProbability', 'meanLineDelay',
+      'meanLineLength', 'emptyFraction', 'fullFraction')
+
+   def __init__(self, arrivalRate, blockProbability, meanLineDelay,
+      meanLineLength, emptyFraction, fullFraction):
+      self.arrivalRate = arrivalRate # Patrons per minute trying to join
+      self.blockProbability = blockProbability # Req. 0020
+      self.meanLineDelay = meanLineDelay # Minutes in line, served patrons
+      self.meanLineLength = meanLineLength
+      self.emptyFraction = emptyFraction # Req. 0009
+      self.fullFraction = fullFraction # Req. 0010
+
+   ## throughput
+   #  Patrons served per minute
+   def throughput(self):
+      return self.arrivalRate * (1.0 - self.blockProbability)
+
+
+## lineEstimate
+#  Builds a VenueEstimate from the time average probabilities of n
+#  patrons at the venue (in line or being served)
+def lineEstimate(arrivalRate, probabilities, servers):
+   capacity = len(probabilities) - 1
+   lineLength = 0.0
+   emptyFraction = 0.0
+   for n in range(len(probabilities)):
+      if n <= servers:
+         emptyFraction = emptyFraction + probabilities[n]
+      else:
+         lineLength = lineLength + (n - servers) * probabilities[n]
+   blockProbability = probabilities[capacity]
+   throughput = arrivalRate * (1.0 - blockProbability)
+   meanLineDelay = 0.0
+   if throughput > 0:
+      meanLineDelay = lineLength / throughput # Little's law
+   fullFraction = blockProbability if capacity > servers else 0.0
+   return VenueEstimate(arrivalRate, blockProbability, meanLineDelay,
+      lineLength, emptyFraction, fullFraction)
+
+
+## mmck
+#  M/M/c/K: exponential service with mean serviceTime, servers servers
+#  and room for lineCapacity patrons in line
+def mmck(arrivalRate, serviceTime, servers, lineCapacity):
+   offered = arrivalRate * serviceTime
+   capacity = servers + lineCapacity
+   terms = [1.0]
+   for n in range(1, capacity + 1):
+      terms.append(terms[-1] * offered / min(n, servers))
+   total = sum(terms)
+   return lineEstimate(arrivalRate, [term / total for term in terms], servers)
+
+
+## md1k
+#  M/D/1/K: one server with a fixed serviceTime and room for
+#  lineCapacity patrons in line. Solved exactly from the chain embedded
+#  at departures, where a_k is the chance of k arrivals during one
+#  service, and converted to time averages.
+def md1k(arrivalRate, serviceTime, lineCapacity):
+   capacity = lineCapacity + 1
+   offered = arrivalRate * serviceTime
+   if offered == 0:
+      return lineEstimate(arrivalRate, [1.0] + [0.0] * capacity, 1)
+
+   a = [math.exp(-offered)]
+   for k in range(1, capacity):
+      a.append(a[-1] * offered / k)
+
+   # Departure epoch probabilities pi_0 .. pi_(K-1), unnormalized. Once
+   # they fall to rounding error the recursion only amplifies the error,
+   # so the rest of the tail is taken as zero. Under heavy load they
+   # grow geometrically and are rescaled before they overflow.
+   pi = [1.0]
+   peak = 1.0
+   for j in range(capacity - 1):
+      value = pi[j] - pi[0] * a[j]
+      for i in range(1, j + 1):
+         value = value - pi[i] * a[j - i + 1]
+      value = value / a[0]
+      if value < 1e-12 * peak:
+         pi.extend([0.0] * (capacity - 1 - j))
+         break
+      pi.append(value)
+      peak = max(peak, value)
+      if peak > 1e100:
+         pi = [term / peak for term in pi]
+         peak = 1.0
+   if not all([math.isfinite(value) and value >= 0 for value in pi]):
+      # The recursion loses precision for heavy loads and long lines
+      estimate = mmck(arrivalRate, serviceTime, 1, lineCapacity)
+      estimate.meanLineDelay = estimate.meanLineDelay / 2.0
+      estimate.meanLineLength = estimate.meanLineLength / 2.0
+      return estimate
+   total = sum(pi)
+   pi = [value / total for value in pi]
+
+   scale = 1.0 / (pi[0] + offered)
+   probabilities = [value * scale for value in pi]
+   probabilities.append(max(0.0, 1.0 - scale))
+   return lineEstimate(arrivalRate, probabilities, 1)
+
+
+## mdckApproximation
+#  M/D/c/K: the servers are treated as one server c times as fast, with
+#  the c - 1 extra places in service added to the line. This is exact
+#  for a full line, where every patron waits for c services to finish
+#  per place ahead of it, and too optimistic when lines are short.
+def mdckApproximation(arrivalRate, serviceTime, servers, lineCapacity):
+   return md1k(arrivalRate, serviceTime / float(servers),
+      lineCapacity + servers - 1)
+
+
+## estimateVenue
+#  Returns the VenueEstimate of a venue with a fixed service time.
+#  servers None means no limit, as in Patron.py, so nobody waits.
+def estimateVenue(arrivalRate, serviceTime, servers, lineCapacity):
+   if servers is None:
+      return VenueEstimate(arrivalRate, 0.0, 0.0, 0.0, 1.0, 0.0)
+   if servers == 1:
+      return md1k(arrivalRate, serviceTime, lineCapacity)
+   return mdckApproximation(arrivalRate, serviceTime, servers, lineCapacity)
+
+
+## meanPatronsInPark
+#  Time average number of patrons in the park over the 12 hour day
+#  (Req. 0024 - Req. 0034)
+def meanPatronsInPark(numberPatrons, dayLength = 12 * 60.0):
+   meanArrival = (arrivalWindow[0] + arrivalWindow[1]) / 2.0
+   meanDeparture = sum([percentage * (departureStart + 60.0 * hour + 30.0)
+      for hour, percentage in enumerate(departurePercentages)]) / 100.0
+   return numberPatrons * (meanDeparture - meanArrival) / dayLength
+
+
+## estimatePark
+#  Estimates parkSummary() of a day with numberPatrons patrons in
+#  layout, a ParkLayout. Patrons choose venues by popularity
+#  (Req. 0022), so the arrival rate at each venue is the patrons in the
+#  park times the venue's share of popularity over the mean time
+#  between choices, which itself depends on the line delays. The two
+#  are solved together for the fixed point. Vendor 0 sees every
+#  patron once during the arrival window. Returns (summary, estimates)
+#  with estimates[venueId] a VenueEstimate.
+def estimatePark(layout, numberPatrons, servers = None, venueChanges = None,
+   dayLength = 12 * 60.0, iterations = 60, tolerance = 1e-6):
+   capacity = list(layout.capacity)
+   serviceTime = list(layout.serviceTime)
+   popularity = list(layout.popularity)
+   for name, changes in (venueChanges or {}).items():
+      venueId = layout.names.index(name)
+      capacity[venueId] = changes.get('capacity', capacity[venueId])
+      serviceTime[venueId] = changes.get('serviceTime', serviceTime[venueId])
+      if venueId > 0:
+         popularity[venueId] = changes.get('popularity', popularity[venueId])
+
+   venues = range(1, layout.size)
+   totalPopularity = float(sum([popularity[v] for v in venues]))
+   share = [0.0] + [popularity[v] / totalPopularity for v in venues]
+   meanWalk = 0.0
+   for fromVenue in venues:
+      row = fromVenue * layout.size
+      for toVenue in venues:
+         meanWalk = meanWalk + share[fromVenue] * share[toVenue] * \
+            layout.walkTime[row + toVenue] # Req. 0035, Req. 0036
+   inPark = meanPatronsInPark(numberPatrons, dayLength)
+
+   windowLength = arrivalWindow[1] - arrivalWindow[0]
+   vendor0 = estimateVenue(numberPatrons / windowLength, serviceTime[0],
+      servers, capacity[0])
+
+   ## venueEstimates
+   #  Estimates of every venue when patrons choose a venue every cycle
+   #  minutes on average
+   def venueEstimates(cycle):
+      return [vendor0] + [estimateVenue(inPark * share[v] / cycle,
+         serviceTime[v], servers, capacity[v]) for v in venues]
+
+   ## nextCycle
+   #  Mean minutes between choices implied by estimates: the walk plus,
+   #  unless the line is full, the line delay and the service
+   def nextCycle(estimates):
+      cycle = meanWalk
+      for v in venues:
+         cycle = cycle + share[v] * (1.0 - estimates[v].blockProbability) * \
+            (estimates[v].meanLineDelay + serviceTime[v])
+      return cycle
+
+   # A longer cycle means fewer arrivals and shorter lines, so the cycle
+   # the estimates imply falls as the assumed cycle grows and the fixed
+   # point can be found by bisection between the walk alone and the
+   # cycle implied by that
+   low = meanWalk
+   high = max(low, nextCycle(venueEstimates(low)))
+   for iteration in range(iterations):
+      if high - low <= tolerance * high:
+         break
+      middle = (low + high) / 2.0
+      if nextCycle(venueEstimates(middle)) > middle:
+         low = middle
+      else:
+         high = middle
+   estimates = venueEstimates((low + high) / 2.0)
+
+   served = [estimate.throughput() * dayLength for estimate in estimates]
+   served[0] = numberPatrons * (1.0 - vendor0.blockProbability)
+   patronsServed = sum(served)
+   delay = sum([served[v] * estimates[v].meanLineDelay
+      for v in range(layout.size)])
+   discouraged = sum([estimate.arrivalRate * estimate.blockProbability *
+      dayLength for estimate in estimates[1:]]) + \
+      numberPatrons * vendor0.blockProbability
+   # Vendor 0 is only busy during the arrival window
+   vendor0Busy = windowLength / dayLength
+   lineLength = vendor0.meanLineLength * vendor0Busy + \
+      sum([estimate.meanLineLength for estimate in estimates[1:]])
+   empty = (1.0 - vendor0Busy * (1.0 - vendor0.emptyFraction)) + \
+      sum([estimate.emptyFraction for estimate in estimates[1:]])
+   full = vendor0.fullFraction * vendor0Busy + \
+      sum([estimate.fullFraction for estimate in estimates[1:]])
+
+   summary = {
+      'averageTimeInLine': delay / numberPatrons if numberPatrons else 0.0,
+      'averageVenuesVisited': patronsServed / numberPatrons
+         if numberPatrons else 0.0,
+      'patronsServed': patronsServed,
+      'meanLineDelay': delay / patronsServed if patronsServed else 0.0,
+      'discouragedPatrons': discouraged,
+      'timeAverageLineLength': lineLength / layout.size,
+      'minutesLineEmpty': dayLength * empty / layout.size,
+      'minutesLineFull': dayLength * full / layout.size,
+   }
+   return summary, estimates
+
+
+## relativeError
+#  Returns (estimate - simulated) / simulated, or the absolute error
+#  when the simulated value is zero
+def relativeError(estimate, simulated):
+   if simulated == 0:
+      return estimate - simulated
+   return (estimate - simulated) / abs(simulated)
@@ -0,0 +1,113 @@
+""" Parallel replications"""
+import math
+from multiprocessing import Pool, cpu_count
+
+## @package AmusementPark
+# SimPy 2 keeps one global simulation per process, so replications
+# cannot run side by side in one interpreter. Each seed is instead run
+# in a separate worker process and only the small summary dictionary
+# each run returns is sent back.
+
+# Two sided 95% Student t critical values for 1 to 30 degrees of freedom
+tCritical95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306,
+   2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+   2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048,
+   2.045, 2.042]
+
+
+## replicate
+#  Calls runFunction(seed) for every seed and returns the summaries in
+#  seed order. runFunction must be a module level function (or a
+#  functools.partial of one) so it can be sent to the workers. With
+#  processes=1 the runs happen in this process.
+def replicate(runFunction, seeds, processes = None):
+   seeds = list(seeds)
+   if processes == 1:
+      return [runFunction(currentSeed) for currentSeed in seeds]
+
+   pool = Pool(processes)
+   try:
+      results = pool.map(runFunction, seeds)
+   finally:
+      pool.close()
+      pool.join()
+   return results
+
+
+## replicateUntil
+#  Sequential stopping: calls runFunction(seed) for seeds 1, 2, ... until
+#  the 95% confidence half width of every one of metrics is at most
+#  precision times its mean, or maxRuns runs are done. No metric is
+#  judged before minRuns runs. Runs go in batches of one run per worker
+#  process. Returns (summaries in seed order, {metric: runs the metric
+#  needed, None when maxRuns were not enough}). Raises ValueError when
+#  maxRuns is less than 1 or when a metric is not in the summaries,
+#  the latter as soon as the first summary is back.
+def replicateUntil(runFunction, metrics, precision, maxRuns, minRuns = 5,
+   processes = None):
+   metrics = list(metrics)
+   if maxRuns < 1:
+      raise ValueError('maxRuns must be at least 1, not %s' % (maxRuns,))
+   if not metrics:
+      raise ValueError('No metrics to judge')
+   results = []
+   runsNeeded = dict((metric, None) for metric in metrics)
+   pool = None
+   batch = 1
+   if processes != 1:
+      pool = Pool(processes)
+      batch = processes or cpu_count()
+   try:
+      while len(results) < maxRuns and None in runsNeeded.values():
+         seeds = range(len(results) + 1,
+            min(len(results) + batch, maxRuns) + 1)
+         if pool is None:
+            results.extend([runFunction(currentSeed) for currentSeed in seeds])
+         else:
+            results.extend(pool.map(runFunction, seeds))
+         unknown = [metric for metric in metrics if metric not in results[0]]
+         if unknown:
+            raise ValueError('Unknown metrics %s, a summary has %s' % (
+               ', '.join(unknown), ', '.join(sorted(results[0]))))
+         # Judged run by run, so the runs needed do not depend on the batch
+         for metric in metrics:
+            n = max(minRuns, len(results) - len(seeds) + 1)
+            while runsNeeded[metric] is None and n <= len(results):
+               values = [result[metric] for result in results[:n]]
+               mean = sum(values) / float(n)
+               if confidenceHalfWidth(values) <= precision * abs(mean):
+                  runsNeeded[metric] = n
+               n = n + 1
+   finally:
+      if pool is not None:
+         pool.close()
+         pool.join()
+   return results, runsNeeded
+
+
+## confidenceHalfWidth
+#  Returns the half width of the 95% confidence interval of the mean of
+#  values
+def confidenceHalfWidth(values):
+   n = len(values)
+   if n < 2:
+      return float('nan')
+   mean = sum(values) / float(n)
+   variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+   if n - 1 <= len(tCritical95):
+      t = tCritical95[n - 2]
+   else:
+      t = 1.96
+   return t * math.sqrt(variance / n)
+
+
+## summarize
+#  Merges the summaries of several runs into
+#  {metric: (mean, 95% confidence half width, number of runs)}
+def summarize(results):
+   merged = {}
+   for metric in results[0]:
+      values = [result[metric] for result in results]
+      merged[metric] = (sum(values) / float(len(values)),
+         confidenceHalfWidth(values), len(values))
+   return merged
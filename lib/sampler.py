@@ -0,0 +1,89 @@
+""" Weighted venue sampler"""
+
+## @package AmusementPark
+# Patrons choose their next venue with frequency proportional to the
+# venue's popularity (Req. 0022).
+
+
+## PopularitySampler
+# A Fenwick (binary indexed) tree over venue popularities. Changing a
+# weight and drawing a venue both take O(log V) time, so a venue can be
+# excluded from a draw by masking its weight to zero instead of copying
+# the venue list and removing entries from it.
+class PopularitySampler:
+   """ """
+   ## __init__
+   #
+   #  This method builds the tree from a list of integer weights, one
+   #  per venue, in O(V)
+   def __init__(self, weights):
+      self.size = len(weights)
+      self.weights = list(weights)
+      self.masks = [0] * self.size # Number of active masks per venue
+      self.tree = [0] + self.weights
+      for i in range(1, self.size + 1):
+         parent = i + (i & -i)
+         if parent <= self.size:
+            self.tree[parent] = self.tree[parent] + self.tree[i]
+
+      self.topStep = 1
+      while self.topStep * 2 <= self.size:
+         self.topStep = self.topStep * 2
+
+   ## _add
+   #  Adds delta to the weight of the venue at index
+   def _add(self, index, delta):
+      i = index + 1
+      while i <= self.size:
+         self.tree[i] = self.tree[i] + delta
+         i = i + (i & -i)
+
+   ## total
+   #  Returns the sum of all unmasked weights
+   def total(self):
+      total = 0
+      i = self.size
+      while i > 0:
+         total = total + self.tree[i]
+         i = i - (i & -i)
+      return total
+
+   ## setWeight
+   #  Changes the popularity of the venue at index
+   def setWeight(self, index, weight):
+      if self.masks[index] == 0:
+         self._add(index, weight - self.weights[index])
+      self.weights[index] = weight
+
+   ## mask
+   #  Temporarily sets the weight of the venue at index to zero. Masks
+   #  nest, so a venue masked for two reasons (e.g. a patron is avoiding
+   #  it and its line is full) stays masked until both are removed.
+   def mask(self, index):
+      self.masks[index] = self.masks[index] + 1
+      if self.masks[index] == 1:
+         self._add(index, -self.weights[index])
+
+   ## unmask
+   #  Removes one mask placed on the venue at index
+   def unmask(self, index):
+      self.masks[index] = self.masks[index] - 1
+      if self.masks[index] == 0:
+         self._add(index, self.weights[index])
+
+   ## find
+   #  Returns the index of the first venue whose cumulative weight is
+   #  at least target, for 1 <= target <= total(). This is the venue a
+   #  linear walk over the unmasked venues would pick for the same
+   #  target, so draws made with randint(1, total()) are unchanged for
+   #  a given seed.
+   def find(self, target):
+      position = 0
+      step = self.topStep
+      while step > 0:
+         nextPosition = position + step
+         if nextPosition <= self.size and self.tree[nextPosition] < target:
+            position = nextPosition
+            target = target - self.tree[nextPosition]
+         step = step // 2
+      return position
@@ -0,0 +1,83 @@
+""" Daily patron schedule"""
+import random
+
+## @package AmusementPark
+# Samples the arrival and departure time of every patron for a day in
+# one pass, so a single generator process can release patrons in
+# arrival order instead of every patron waiting in its own process.
+# Times are minutes after the park opens at 10AM.
+
+arrivalWindow = (0.0, 120.0) # Req. 0024 - arrivals between 10AM and 12PM
+
+# Req. 0025 - Req. 0034 - percentage of patrons departing in each hour
+# from 12PM to 10PM
+departurePercentages = [1, 2, 3, 4, 10, 10, 5, 10, 10, 45]
+departureStart = 120.0 # 12PM
+
+
+## departureCounts
+#  Splits numberPatrons over the departure hours in proportion to
+#  departurePercentages. Hours get their whole share first and the
+#  remaining patrons go to the hours with the largest remainders, so
+#  the counts always add up to numberPatrons.
+def departureCounts(numberPatrons):
+   shares = [numberPatrons * percentage / 100.0
+      for percentage in departurePercentages]
+   counts = [int(share) for share in shares]
+   remainders = sorted(range(len(shares)),
+      key = lambda hour: shares[hour] - counts[hour], reverse = True)
+   for hour in remainders[:numberPatrons - sum(counts)]:
+      counts[hour] = counts[hour] + 1
+   return counts
+
+
+## daySchedule
+#  Returns (arrivals, departures) for numberPatrons patrons, where
+#  arrivals is sorted and departures[i] is the departure time of the
+#  patron arriving at arrivals[i]. Every arrival is before 12PM and
+#  every departure after it, so any pairing is valid. Departures are
+#  drawn from departureRng when given, so they do not depend on the
+#  arrival draws (see lib/streams.py).
+def daySchedule(numberPatrons, rng = random, departureRng = None):
+   uniform = rng.random
+   start, end = arrivalWindow
+   arrivals = sorted([start + (end - start) * uniform()
+      for i in range(numberPatrons)])
+
+   if departureRng is not None:
+      rng = departureRng
+      uniform = rng.random
+   departures = []
+   counts = departureCounts(numberPatrons)
+   for hour in range(len(counts)):
+      hourStart = departureStart + 60.0 * hour
+      departures.extend([hourStart + 60.0 * uniform()
+         for i in range(counts[hour])])
+   rng.shuffle(departures)
+   return arrivals, departures
+
+
+## largestParty
+#  Returns the largest party partySizes draws for a mean party size of
+#  meanSize. Raises ValueError when meanSize is less than 1.
+def largestParty(meanSize):
+   if meanSize < 1:
+      raise ValueError('Parties need a mean size of at least 1, not %s' % (
+         meanSize,))
+   return int(round(2 * meanSize - 1))
+
+
+## partySizes
+#  Splits numberPatrons into parties whose sizes are uniform between 1
+#  and largestParty(meanSize). That averages meanSize when 2 * meanSize
+#  is a whole number, except for the last party, which is cut short if
+#  needed so the sizes add up to numberPatrons.
+def partySizes(numberPatrons, meanSize, rng = random):
+   largest = largestParty(meanSize)
+   sizes = []
+   remaining = numberPatrons
+   while remaining > 0:
+      size = min(rng.randint(1, largest), remaining)
+      sizes.append(size)
+      remaining = remaining - size
+   return sizes
@@ -0,0 +1,104 @@
+""" Independent random number streams"""
+import hashlib
+import random
+from array import array
+
+## @package AmusementPark
+# By default every draw of a run comes from Python's one global
+# generator, so changing a single venue shifts every later draw: the
+# patron who used to get the next number gets another one, and two
+# configurations run with the same seed soon share nothing but the
+# schedule. Independent streams give each purpose its own generator,
+# derived from the run's seed and the purpose's name, and give every
+# patron its own stream for venue choices (Req. 0021, Req. 0022). A
+# patron then makes the same choices in two configurations until its
+# own day differs, so comparisons with the same seeds (common random
+# numbers) need far fewer replications for the same confidence.
+#
+# With unlimited servers no lines form, and the SimPy model in Patron.py
+# and the kernel model in lib/park.py give identical results for a seed.
+# With a servers limit they do not: the two backends handle events at
+# the same simulated time in a different order, e.g. whether a freed
+# server takes the next patron before or after the served patron
+# chooses its next venue. Lines then fill and empty at slightly
+# different moments, and each backend's runs are only comparable with
+# its own.
+#
+# Service and walk times are fixed (Req. 0016, Req. 0035, Req. 0036)
+# and draw nothing.
+
+mask64 = (1 << 64) - 1
+
+
+## streamSeed
+#  Returns the 64 bit seed of stream name of a run seeded with seed
+def streamSeed(seed, name):
+   digest = hashlib.sha256(('%s/%s' % (seed, name)).encode('utf-8')).digest()
+   return int.from_bytes(digest[:8], 'little')
+
+
+## splitmix64
+#  Returns a well mixed 64 bit value of x, used to seed a patron's
+#  stream from its id
+def splitmix64(x):
+   x = (x + 0x9E3779B97F4A7C15) & mask64
+   x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & mask64
+   x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & mask64
+   return x ^ (x >> 31)
+
+
+## RandomStreams
+# The streams of one run. stream() returns the same random.Random for
+# the same name.
+class RandomStreams:
+   """ """
+   ## __init__
+   #
+   #  This method derives every stream from seed
+   def __init__(self, seed):
+      self.seed = seed
+      self.streams = {}
+
+   ## stream
+   #  Returns the generator for purpose name, e.g. 'arrivals'
+   def stream(self, name):
+      if name not in self.streams:
+         self.streams[name] = random.Random(streamSeed(self.seed, name))
+      return self.streams[name]
+
+   ## patronStreams
+   #  Returns new per-patron streams for purpose name
+   def patronStreams(self, name = 'choices'):
+      return PatronStreams(streamSeed(self.seed, name))
+
+
+## PatronStreams
+# One stream per patron id, kept as a column of 64 bit generator states
+# in the struct of arrays style of PatronTable: 8 bytes per patron
+# instead of a random.Random each. Every stream is a 64 bit linear
+# congruential generator whose top 53 bits make a draw.
+class PatronStreams:
+   """ """
+   __slots__ = ('seed', 'states')
+
+   ## __init__
+   #
+   #  This method starts with no patrons
+   def __init__(self, seed):
+      self.seed = seed
+      self.states = array('Q')
+
+   ## add
+   #  Adds the stream of the next patron id, the id PatronTable.add
+   #  gives the same patron
+   def add(self):
+      self.states.append(splitmix64((self.seed +
+         0x9E3779B97F4A7C15 * len(self.states)) & mask64))
+
+   ## randint
+   #  Same as random.randint(low, high) drawn from patronId's stream
+   def randint(self, patronId, low, high):
+      state = (self.states[patronId] * 6364136223846793005 +
+         1442695040888963407) & mask64
+      self.states[patronId] = state
+      return low + (((state >> 11) * (high - low + 1)) >> 53)
@@ -0,0 +1,212 @@
+""" Parameter sweeps with memoized results"""
+import hashlib
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+## @package AmusementPark
+# Runs every (parameters, seed) cell of a parameter grid and keeps each
+# result in a content addressed cache on disk. A cell's key is a hash of
+# its parameters, its seed and the model version, so a cell is only
+# ever simulated once per model version, and a grid that grows by one
+# value only runs the new cells. The cache can be held to a size limit
+# by evicting the least recently used results.
+
+
+## modelVersion
+#  Returns a hash of the contents of the files at paths. Results cached
+#  under another model version are never reused.
+def modelVersion(paths):
+   version = hashlib.sha256()
+   for path in sorted(paths):
+      with open(path, 'rb') as sourceFile:
+         contents = sourceFile.read()
+      version.update(os.path.basename(path).encode('utf-8') + b'\0')
+      version.update(hashlib.sha256(contents).digest())
+   return version.hexdigest()
+
+
+## expandGrid
+#  Returns one parameter dictionary for every combination of the values
+#  in grid, a dictionary of parameter name -> list of values. The order
+#  is the same for the same grid, with the last parameter varying
+#  fastest.
+def expandGrid(grid):
+   names = sorted(grid)
+   return [dict(zip(names, values))
+      for values in itertools.product(*[grid[name] for name in names])]
+
+
+## ResultCache
+# Results stored one JSON file per cell as <directory>/<key[:2]>/<key>.json.
+# A file's modification time is its last use, so eviction is least
+# recently used.
+class ResultCache:
+   """ """
+   ## __init__
+   #
+   #  maxBytes is the size evict() keeps the cache under, None for no
+   #  limit
+   def __init__(self, directory, maxBytes = None):
+      self.directory = directory
+      self.maxBytes = maxBytes
+      self.hits = 0
+      self.misses = 0
+
+   ## key
+   #  Returns the content address of a cell
+   def key(self, params, seed, version):
+      cell = json.dumps({'params': params, 'seed': seed, 'model': version},
+         sort_keys = True, separators = (',', ':'))
+      return hashlib.sha256(cell.encode('utf-8')).hexdigest()
+
+   def path(self, key):
+      return os.path.join(self.directory, key[:2], key + '.json')
+
+   ## get
+   #  Returns the result cached under key, or None. A file that is not
+   #  a record written by put(), e.g. a partial or foreign one, counts
+   #  as a miss.
+   def get(self, key):
+      path = self.path(key)
+      try:
+         with open(path) as resultFile:
+            result = json.load(resultFile)['result']
+         os.utime(path, None) # Mark as recently used
+      except (IOError, OSError, ValueError, KeyError, TypeError):
+         self.misses = self.misses + 1
+         return None
+      self.hits = self.hits + 1
+      return result
+
+   ## put
+   #  Stores result under key together with the cell that produced it
+   def put(self, key, params, seed, version, result):
+      path = self.path(key)
+      if not os.path.isdir(os.path.dirname(path)):
+         os.makedirs(os.path.dirname(path), exist_ok = True)
+      # Written under a temporary name first so a crash never leaves a
+      # partial result behind
+      temporaryPath = '%s.%d' % (path, os.getpid())
+      with open(temporaryPath, 'w') as resultFile:
+         json.dump({'params': params, 'seed': seed, 'model': version,
+            'result': result}, resultFile, sort_keys = True)
+      os.replace(temporaryPath, path)
+
+   ## entries
+   #  Returns (modification time, size, path) of every cached result
+   def entries(self):
+      entries = [ ]
+      if not os.path.isdir(self.directory):
+         return entries
+      for subdirectory in os.listdir(self.directory):
+         subdirectory = os.path.join(self.directory, subdirectory)
+         if not os.path.isdir(subdirectory):
+            continue
+         for name in os.listdir(subdirectory):
+            if name.endswith('.json'):
+               path = os.path.join(subdirectory, name)
+               status = os.stat(path)
+               entries.append((status.st_mtime, status.st_size, path))
+      return entries
+
+   ## size
+   #  Returns the number of cached results and their total bytes
+   def size(self):
+      entries = self.entries()
+      return len(entries), sum([entry[1] for entry in entries])
+
+   ## evict
+   #  Removes the least recently used results until the cache is no
+   #  larger than maxBytes (default: the cache's own limit) and returns
+   #  how many were removed
+   def evict(self, maxBytes = None):
+      if maxBytes is None:
+         maxBytes = self.maxBytes
+      if maxBytes is None:
+         return 0
+      entries = sorted(self.entries())
+      total = sum([entry[1] for entry in entries])
+      removed = 0
+      for modified, size, path in entries:
+         if total <= maxBytes:
+            break
+         try:
+            os.remove(path)
+         except OSError:
+            continue
+         total = total - size
+         removed = removed + 1
+      return removed
+
+
+## runCell
+#  Pool worker: runs one (params, seed) cell
+def runCell(arguments):
+   runFunction, index, params, seed = arguments
+   return index, runFunction(params, seed)
+
+
+## sweep
+#  Returns [(params, seed, result)] for every cell of grid and seed.
+#  Cached cells are read from cache and the rest are run with
+#  runFunction(params, seed) in a pool of processes (in this process
+#  when processes is 1) and cached as each one finishes. runFunction
+#  must be a module level function and its result must be JSON
+#  serializable. The cache is evicted down to its size limit at the
+#  end.
+def sweep(runFunction, grid, seeds, cache, version, processes = None):
+   return sweepParams(runFunction, expandGrid(grid), seeds, cache, version,
+      processes)
+
+
+## sweepParams
+#  Same as sweep() for an explicit list of parameter dictionaries
+def sweepParams(runFunction, paramsList, seeds, cache, version,
+   processes = None):
+   cells = [(params, seed) for params in paramsList for seed in seeds]
+   results = [None] * len(cells)
+   missing = [ ]
+   for index in range(len(cells)):
+      params, seed = cells[index]
+      result = cache.get(cache.key(params, seed, version))
+      if result is None:
+         missing.append((runFunction, index, params, seed))
+      else:
+         results[index] = result
+
+   def store(index, result):
+      params, seed = cells[index]
+      cache.put(cache.key(params, seed, version), params, seed, version,
+         result)
+      results[index] = result
+
+   if missing and processes == 1:
+      for arguments in missing:
+         store(*runCell(arguments))
+   elif missing:
+      pool = Pool(processes)
+      try:
+         for index, result in pool.imap_unordered(runCell, missing):
+            store(index, result)
+      finally:
+         pool.close()
+         pool.join()
+
+   cache.evict()
+   return [(cells[index][0], cells[index][1], results[index])
+      for index in range(len(cells))]
+
+
+## screen
+#  Estimates every parameter dictionary in paramsList with
+#  estimateFunction(params), which returns a dictionary of metrics, and
+#  returns (kept, estimates): the keep dictionaries with the lowest
+#  (highest when maximize) estimated metric, best first, and the
+#  estimate of every dictionary in paramsList order
+def screen(estimateFunction, paramsList, metric, keep, maximize = False):
+   estimates = [estimateFunction(params) for params in paramsList]
+   order = sorted(range(len(paramsList)),
+      key = lambda index: estimates[index][metric], reverse = maximize)
+   return [paramsList[index] for index in order[:keep]], estimates
@@ -0,0 +1,152 @@
+""" Simulation event tracing"""
+import json
+import struct
+import sys
+
+## @package AmusementPark
+# Patron and venue events are traced as fixed size binary records
+# (time, event code, patron id, venue id, value). Call sites check the
+# module level trace level before recording anything, so a disabled
+# level costs one comparison: no clock formatting and no string
+# building. Records are either written to a binary trace file, which
+# tracedump.py renders later, or rendered straight to stdout.
+
+# Trace levels
+TRACE_OFF = 0
+TRACE_EVENTS = 1  # Patron and venue events
+TRACE_VERBOSE = 2 # Also walk and service durations
+
+levelNames = {'off': TRACE_OFF, 'events': TRACE_EVENTS,
+   'verbose': TRACE_VERBOSE}
+
+# Event codes
+ENTER_LINE = 1
+LINE_FULL = 2
+RETURN_SAME = 3
+NO_VENUE = 4
+CHOOSE_VENUE = 5
+WALK = 6
+ARRIVE = 7
+SERVE = 8
+SERVICE_TIME = 9
+LEAVE = 10
+LEAVE_PARK = 11
+
+# time, event code, patron id, venue id, value (minutes)
+RECORD = struct.Struct('<dBiif')
+
+messages = {
+   ENTER_LINE: '%s Patron %s has entered the line for venue %s',
+   LINE_FULL: '%s Patron %s could not enter venue %s because the line was '
+      'full!',
+   RETURN_SAME: '%s Patron %s decided to return to the same venue, %s, '
+      'and begins walking there',
+   NO_VENUE: '%s Patron %s could not find a venue with room in its line',
+   CHOOSE_VENUE: '%s Patron %s has chosen %s as the next venue and begins '
+      'walking there',
+   WALK: '        Patron %s walks for %d minutes to reach venue %s',
+   ARRIVE: '%s Patron %s arrives at venue %s',
+   SERVE: '%s Venue %s is now serving patron %s',
+   SERVICE_TIME: '        Venue %s serves patron %s for %d minutes',
+   LEAVE: '%s Patron %s leaves venue %s',
+   LEAVE_PARK: '%s Patron %s leaves the park',
+}
+
+level = TRACE_OFF
+traceFile = None
+tracePath = None
+
+
+## formatTime
+#  Converts minutes since the park opened at 10AM to a clock time
+#  such as "10:05AM"
+def formatTime(time):
+   hour = int(time / 60) + 10
+   period = "AM"
+
+   if hour >= 12:
+      period = "PM"
+
+   if hour > 12:
+      hour = hour - 12
+
+   if hour < 10: # Just for formatting purposes
+      period = period + " "
+
+   minutes = int(time % 60)
+
+   if minutes < 10:
+      strMinutes = "0" + str(minutes)
+   else:
+      strMinutes = str(minutes)
+
+   return str(hour) + ":" + strMinutes + period
+
+
+## render
+#  Returns the human readable line for one trace record
+def render(time, code, patronName, venueName, value):
+   if code == WALK:
+      return messages[code] % (patronName, value, venueName)
+   if code == SERVICE_TIME:
+      return messages[code] % (venueName, patronName, value)
+   if code == SERVE:
+      return messages[code] % (formatTime(time), venueName, patronName)
+   if code == NO_VENUE or code == LEAVE_PARK:
+      return messages[code] % (formatTime(time), patronName)
+   return messages[code] % (formatTime(time), patronName, venueName)
+
+
+## start
+#  Enables tracing at traceLevel. Records go to the binary file at
+#  path, or are rendered to stdout when path is None.
+def start(traceLevel, path = None):
+   global level, traceFile, tracePath
+   level = traceLevel
+   tracePath = path
+   if path is not None and traceLevel > TRACE_OFF:
+      traceFile = open(path, 'wb', 1 << 20)
+
+
+## stop
+#  Disables tracing. When writing to a file, the venue and patron
+#  names are saved next to it (path + '.names') so the ids in the
+#  records can be rendered later.
+def stop(venueNames, patronNames):
+   global level, traceFile
+   level = TRACE_OFF
+   if traceFile is not None:
+      traceFile.close()
+      traceFile = None
+      with open(tracePath + '.names', 'w') as namesFile:
+         json.dump({'venues': venueNames, 'patrons': patronNames},
+            namesFile)
+
+
+## record
+#  Records one event. Callers check level first, e.g.
+#     if trace.level >= TRACE_EVENTS:
+#        trace.record(now(), ENTER_LINE, patron, venue)
+#  where patron and venue are the Patron and Venue instances.
+def record(time, code, patron, venue, value = 0):
+   if traceFile is not None:
+      traceFile.write(RECORD.pack(time, code,
+         patron.patronId if patron is not None else -1,
+         venue.venueId if venue is not None else -1, value))
+   else:
+      sys.stdout.write(render(time, code,
+         patron.name if patron is not None else '',
+         venue.name if venue is not None else '', value) + '\n')
+
+
+## readRecords
+#  Yields (time, code, patronId, venueId, value) for every record in a
+#  binary trace file
+def readRecords(path):
+   with open(path, 'rb') as inFile:
+      while True:
+         chunk = inFile.read(RECORD.size * 4096)
+         if not chunk:
+            break
+         for fields in RECORD.iter_unpack(chunk):
+            yield fields
@@ -1,48 +1,59 @@
 """ Venue sample"""
 from SimPy.Simulation import *
 from random import expovariate, seed, random, gauss
+from heapq import heappush, heappop
+from lib.waitline import WaitLine
+from lib.linestats import LineStats
 
 ## @package AmusementPark
 # This package partially satisfies the objectives of Amusement
 # Park Project
 
 
-## PatronInfo
-# Instances of this class store information used to by venues to
-# control interactions with patrons
-class PatronInfo:
+## VenueServer
+#
+#  Each Venue owns one VenueServer for the whole simulation instead
+#  of activating a "one-shot" VenueSevice process per patron. Patrons
+#  in service are kept in a heap ordered by the time their service
+#  completes. The server sleeps until the earliest completion,
+#  reactivates that patron and then waits for the next one, so the
+#  number of live objects stays flat however long the day runs.
+class VenueServer(Process):
    """ """
    ## __init__
    #
-   #  This method initializes PatronInfo instances
-   def __init__(self, lineArrivalTime, patron):
-      #print "PatronInfo.start()"
-      self.lineArrivalTime = lineArrivalTime
-      self.lineDepartureTime = 0 # Invalid value
-      self.patron = patron
-
-   def setlineDepartureTime(aTime):
-      self.lineDepartureTime = aTime
-
-
-## VenueSevice
-#
-#  Each instance of VenueSevice waits a specified amount of time
-#  and then reactivates a patron. Each VenueSevice instance is
-#  "one-shot" meaning the VenueSevice passivates itself after
-#  "completing service" i.e. reactivating a single patron.
-class VenueSevice(Process):
-
-   ## start Process Execution Method (PEM)
-   #  Start processing messages and run until simulation exit.
-   def reactivatePatronAfterDelay(self, patron, delay):
+   #  This method initializes VenueServer instances
+   def __init__(self, name):
+      Process.__init__(self, name = name)
+      self.inService = [ ] # heap of (completion time, sequence, patron)
+      self.sequence = 0
+
+   ## serve
+   #  Called by the venue to start serving a patron for delay minutes.
+   #  The server is woken if it is idle or this patron finishes first.
+   def serve(self, patron, delay):
       """ """
-      #print "VenueSevice.start()"
-
-      yield hold, self, delay
-      #print "reactivate(patron)"
-      reactivate(patron)
-      yield passivate, self
+      completionTime = now() + delay
+      wakeServer = len(self.inService) == 0 or \
+         completionTime < self.inService[0][0]
+      heappush(self.inService, (completionTime, self.sequence, patron))
+      self.sequence = self.sequence + 1
+      if wakeServer:
+         reactivate(self)
+
+   ## run Process Execution Method (PEM)
+   #  Release patrons as their service completes and run until
+   #  simulation exit.
+   def run(self):
+      """ """
+      while True:
+         if len(self.inService) == 0:
+            yield passivate, self
+         elif self.inService[0][0] > now():
+            yield hold, self, self.inService[0][0] - now()
+         else:
+            completionTime, sequence, patron = heappop(self.inService)
+            reactivate(patron)
 
 
 ## Venue
@@ -54,9 +65,11 @@ class Venue(Process):
    ## start
    #  This Process Execution Method (PEM) executes until the
    #  the simulation ends. The venue will serve up to the
-   #  specified maximum number of patrons per hour.
+   #  specified maximum number of patrons per hour. Line statistics
+   #  are kept online in self.lineStats; keepHistory also records
+   #  every observation in Monitors for post-run analysis.
    def start(self, maxLineLength, setTimeToServe,
-      numPatronsPerHour):
+      numPatronsPerHour, keepHistory = False):
       """ """
 
       # Holds value to satisfy Req. 0015 - max num patrons per hour
@@ -67,94 +80,62 @@ class Venue(Process):
       self.setTimeToServe = setTimeToServe
 
       # Satisfies Req. 0014 - venue must have queue for patrons
-      self.waitQueue = [ ] # Stores patrons currently in line
+      # Stores patrons currently in line and when they joined it
+      self.waitQueue = WaitLine()
       self.lineLevel = Level(name='numInLine', unitName='patrons',
             capacity=maxLineLength, initialBuffered=0,
             putQType=FIFO, getQType=FIFO,
-            monitored=True, monitorType=Monitor)
+            monitored=keepHistory, monitorType=Monitor)
 
       # Satisfies Req. 0017 - venue must have max queue length
       self.maxLineLength = maxLineLength
 
 
-      self.lineDelayMonitor = Monitor(name = 'lineDelay')
-      self.lineEmptyMonitor = Monitor(name = 'lineEmpty')
-      self.lineFullMonitory = Monitor(name = 'lineFull')
-      self.discouragedPatronsMonitor = Monitor(
-            name = 'discouragedPatrons')
-
-      print "Venue.start()"
-
-      while True:
-         lineEmpty = False
+      # Satisfies Req. 0009 and Req. 0010 - empty and full line time
+      # are updated each time a patron joins or leaves the line
+      self.lineStats = LineStats(maxLineLength, now())
+      self.keepHistory = keepHistory
+      if keepHistory:
+         self.lineDelayMonitor = Monitor(name = 'lineDelay')
+         self.discouragedPatronsMonitor = Monitor(
+               name = 'discouragedPatrons')
 
-         if len(self.waitQueue) == 0 && self.lineEmpty == False:
-            self.tempLineEmptyTimeStart = now()
-            lineEmpty = True
+      # One reusable service process per venue
+      self.server = VenueServer(name = 'venueServer')
+      activate(self.server, self.server.run())
 
-         # This should be relocated to where Patron inserts self into queue
-         elif len(self.waitQueue) == self.maxLineLength && \
-            self.lineFull == False:
-            tempLineFullTimeStart = now()
-            self.lineFull = True
+      print ("Venue.start()")
 
+      while True:
          # get the next available patron to serve
          yield get, self, self.lineLevel, 1
 
 
-         currentPatronInfo = self.waitQueue.pop()
-
-         currentPatronInfo.lineDepartureTime = now()
-
-         # Monitors time that line is empty
-         # This must be re-checked because even if a patron enters and
-         # is removed from the line, the line might have instantly put
-         # the patron on the ride.
-         if len(self.waitQueue) == 0:
-            self.lineEmpty = True
-            self.tempLineEmptyTimeStart = now()
-         # Records data for Req. 0009 - monitor empty line time
-         # This should be relocated to where Patron inserts self into queue
-         elif tempLineEmptyTimeStart != False:
-            self.tempLineEmptyTimeEnd = now()
-            # Observe time line has been empty to this point
-            self.lineEmptyMonitor.observe(self.tempLineEmptyTimeStart -
-               self.tempLineEmptyTimeEnd)
-         # Records data for Req. 0010 - monitor (vendor 0) line full time
-         elif self.lineFull == True:
-            tempLineFullTimeEnd = now()
-
-            self.lineFullMonitor.observe(tempLineFullTimeStart -
-               tempLineFullTimeEnd)
-            self.lineFull == False
+         currentPatron, lineArrivalTime = self.waitQueue.leave()
+
+         lineDepartureTime = now()
+
+         self.lineStats.change(lineDepartureTime, len(self.waitQueue))
 
          # Observe time patron spent in line for this venue
-         self.lineDelayMonitor.observe(
-            currentPatronInfo.lineDepartureTime -
-            currentPatronInfo.lineArrivalTime)
+         self.lineStats.observeDelay(lineDepartureTime - lineArrivalTime)
+         if self.keepHistory:
+            self.lineDelayMonitor.observe(
+               lineDepartureTime - lineArrivalTime)
 
          # Schedule reactivation of the patron after a
          # delay representing time spent serving the patron.
-         # The separate VenueService process is used so that
-         # the venue can potentially start serving the next
-         # patron in line before the service for the current
-         # patron completes
+         # The venue's VenueServer is used so that the venue can
+         # potentially start serving the next patron in line
+         # before the service for the current patron completes
          delay = self.setTimeToServe
-         service = VenueSevice()
-         activate(service, service.reactivatePatronAfterDelay(
-            currentPatronInfo.patron, delay))
+         self.server.serve(currentPatron, delay)
 
          # Satisfies Req. 0015 - not serving more than maxNumPatronsPerHour
          # maxNumPatronsPerHour can only be served if queue is never
-         # empty.
-         yield hold, self, 1 / self.maxNumPatronsPerHour
-
-         while len(self.waitQueue) == 0
-            yield hold, self, 0.001   # Yield a small amount of time
-                                     # to avoid spinning fast and
-                                     # wasting CPU when the venue has
-                                     # already served as many patrons
-                                     # as possible within the last hour
+         # empty. The get above waits for the next patron, so an
+         # empty line costs no events.
+         yield hold, self, 60.0 / self.maxNumPatronsPerHour
 
 
 
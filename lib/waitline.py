@@ -0,0 +1,51 @@
+""" Venue wait line"""
+from collections import deque
+
+## @package AmusementPark
+# Satisfies Req. 0014 - venue must have queue for patrons
+
+
+## WaitLine
+# First-in first-out line of patrons waiting at a venue. Patrons and
+# the times they joined the line are kept in two parallel deques, so
+# joining and leaving are O(1) and no per-patron record object has to
+# be allocated to remember when a patron got in line. An entry can be a
+# party of several patrons who take that many places in line. The line
+# keeps its own length in patrons, so the number of patrons in line can
+# be read without a Level.
+class WaitLine:
+   """ """
+   __slots__ = ('patrons', 'arrivalTimes', 'sizes', 'people')
+
+   ## __init__
+   #
+   #  This method initializes an empty WaitLine
+   def __init__(self):
+      self.patrons = deque()
+      self.arrivalTimes = deque()
+      self.sizes = deque()
+      self.people = 0 # Patrons in line, counting every member of a party
+
+   def __len__(self):
+      return self.people
+
+   ## join
+   #  Puts a patron, or a party of size patrons, at the back of the line
+   #  at time lineArrivalTime
+   def join(self, patron, lineArrivalTime, size = 1):
+      self.patrons.append(patron)
+      self.arrivalTimes.append(lineArrivalTime)
+      self.sizes.append(size)
+      self.people = self.people + size
+
+   ## leave
+   #  Removes the patron or party at the front of the line and returns
+   #  (patron, lineArrivalTime)
+   def leave(self):
+      self.people = self.people - self.sizes.popleft()
+      return self.patrons.popleft(), self.arrivalTimes.popleft()
+
+   ## front
+   #  Returns the patron at the front of the line without removing it
+   def front(self):
+      return self.patrons[0]
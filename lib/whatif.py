@@ -0,0 +1,109 @@
+""" Forked what-if runs"""
+import os
+import pickle
+import random
+import signal
+import sys
+import traceback
+
+## @package AmusementPark
+# A simulation is run once up to a snapshot time and every variant is
+# then finished in a child process forked from that point. The child
+# starts with a copy-on-write copy of the whole interpreter: the event
+# queue, every process generator, venue lines, the patron table and the
+# random generator state. So the shared morning is simulated once, and
+# every variant continues from the same random stream (common random
+# numbers). Python reseeds the global random generator in a forked
+# child, so its state is saved before forking and restored in the
+# child. SimPy process generators cannot be copied any other way, so
+# this needs os.fork and is not available on Windows.
+
+
+## forkVariants
+#  Calls runVariant(variant) for every variant, each in its own child
+#  process forked from the current state, and returns the results in
+#  variant order. At most processes children run at once (default: one
+#  per core). The results must be picklable. Nothing a variant changes
+#  is seen by the caller or by other variants. Raises RuntimeError when
+#  a variant fails, after stopping the children still running.
+def forkVariants(variants, runVariant, processes = None):
+   if not hasattr(os, 'fork'):
+      raise OSError('What-if runs need os.fork, which this platform lacks')
+   if processes is None:
+      processes = os.cpu_count() or 1
+   variants = list(variants)
+   # Anything still buffered would otherwise be written again by every
+   # child that prints
+   sys.stdout.flush()
+   sys.stderr.flush()
+   randomState = random.getstate()
+   results = [None] * len(variants)
+   running = {} # child pid -> (variant index, read end of its pipe)
+   nextVariant = 0
+
+   try:
+      while nextVariant < len(variants) or running:
+         while nextVariant < len(variants) and len(running) < processes:
+            readEnd, writeEnd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+               os.close(readEnd)
+               random.setstate(randomState)
+               runChild(runVariant, variants[nextVariant], writeEnd)
+            os.close(writeEnd)
+            running[pid] = (nextVariant, readEnd)
+            nextVariant = nextVariant + 1
+
+         # Results are collected in start order while later children keep
+         # running
+         pid = next(iter(running))
+         index, readEnd = running.pop(pid)
+         with os.fdopen(readEnd, 'rb') as pipe:
+            payload = pipe.read()
+         os.waitpid(pid, 0)
+         if not payload:
+            raise RuntimeError('What-if variant %d exited without a result' % (
+               index,))
+         status, value = pickle.loads(payload)
+         if status == 'error':
+            raise RuntimeError('What-if variant %d failed:\n%s' % (
+               index, value))
+         results[index] = value
+   except BaseException:
+      stopChildren(running)
+      raise
+   return results
+
+
+## stopChildren
+#  Terminates and reaps every child still in running, a dictionary of
+#  child pid -> (variant index, read end of its pipe), so a failed run
+#  leaves neither variants running on nor zombie processes behind
+def stopChildren(running):
+   for pid, (index, readEnd) in running.items():
+      try:
+         os.kill(pid, signal.SIGTERM)
+      except OSError:
+         pass
+      os.close(readEnd)
+      os.waitpid(pid, 0)
+   running.clear()
+
+
+## runChild
+#  Runs one variant in a forked child, sends ('ok', result) or
+#  ('error', traceback) to the parent and exits without running any of
+#  the parent's cleanup
+def runChild(runVariant, variant, writeEnd):
+   exitCode = 0
+   try:
+      try:
+         payload = pickle.dumps(('ok', runVariant(variant)))
+      except BaseException:
+         payload = pickle.dumps(('error', traceback.format_exc()))
+         exitCode = 1
+      sys.stdout.flush()
+      with os.fdopen(writeEnd, 'wb') as pipe:
+         pipe.write(payload)
+   finally:
+      os._exit(exitCode)
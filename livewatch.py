@@ -0,0 +1,127 @@
+# livewatch.py
+# Listens on a Unix socket for the live feeds of park simulations (see
+# lib/livefeed.py) and shows one status line per run while they go on.
+# Any number of runs can feed the socket at once, e.g. every replication
+# of a --seeds run:
+#
+#   python livewatch.py /tmp/park.sock --runs 8 &
+#   python Patron.py --seeds 8 --patrons 2000 --live unix:/tmp/park.sock
+#
+# Throughput is patrons served per simulated minute since the previous
+# snapshot the watcher received, so it stays right when the feed drops
+# snapshots for a slow watcher.
+
+import argparse
+import asyncio
+import json
+import os
+
+class RunState:
+
+    def __init__(self, run):
+    	self.run = run
+    	self.venues = []
+    	self.time = 0.0
+    	self.served = 0
+    	self.throughput = 0.0
+    	self.lineLength = 0
+    	self.meanDelay = 0.0
+    	self.maxDelay = 0.0
+    	self.discouraged = 0
+    	self.dropped = 0
+    	self.longestLine = ""
+    	self.summary = None
+
+    def update(self, message):
+    	if (message["type"] == "start"):
+    		self.venues = message["venues"]
+    	elif (message["type"] == "snapshot"):
+    		served = sum(message["served"])
+    		if (message["time"] > self.time):
+    			self.throughput = (served - self.served) / (message["time"] - self.time)
+    		self.time = message["time"]
+    		self.served = served
+    		self.lineLength = sum(message["lineLength"])
+    		delaySum = sum([count * delay for count, delay in zip(message["served"], message["meanDelay"])])
+    		self.meanDelay = delaySum / served if served else 0.0
+    		self.maxDelay = max(message["maxDelay"])
+    		self.discouraged = sum(message["discouraged"])
+    		self.dropped = message["dropped"]
+    		longest = max(range(len(message["lineLength"])), key = lambda venueId: message["lineLength"][venueId])
+    		if (longest < len(self.venues)):
+    			self.longestLine = "%s (%d)" % (self.venues[longest], message["lineLength"][longest])
+    	elif (message["type"] == "end"):
+    		self.summary = message["summary"]
+
+    def status(self):
+    	if (self.summary != None):
+    		return "%-12s done: %d patrons served, %.2f mean line delay, %d discouraged" % (self.run,
+    			self.summary["patronsServed"], self.summary["meanLineDelay"], self.summary["discouragedPatrons"])
+    	return "%-12s %6.0f min %8d served %7.2f/min %6d in line %7.2f mean delay %7.2f max delay %7d discouraged %4d dropped  longest %s" % (
+    		self.run, self.time, self.served, self.throughput, self.lineLength, self.meanDelay, self.maxDelay,
+    		self.discouraged, self.dropped, self.longestLine)
+
+class Watcher:
+
+    def __init__(self, expectedRuns):
+    	self.runs = {}
+    	self.expectedRuns = expectedRuns
+    	self.finished = asyncio.Event()
+
+    # One connection per run, read until the run closes its feed
+    async def readFeed(self, reader, writer):
+    	try:
+    		while True:
+    			line = await reader.readline()
+    			if (not line):
+    				break
+    			message = json.loads(line)
+    			if (message["run"] not in self.runs):
+    				self.runs[message["run"]] = RunState(message["run"])
+    			state = self.runs[message["run"]]
+    			state.update(message)
+    			if (message["type"] == "end"):
+    				print (state.status())
+    				self.checkFinished()
+    				break
+    	finally:
+    		writer.close()
+
+    def checkFinished(self):
+    	ended = len([state for state in self.runs.values() if state.summary != None])
+    	if (self.expectedRuns != None and ended >= self.expectedRuns):
+    		self.finished.set()
+
+    async def showRuns(self, refresh):
+    	while not self.finished.is_set():
+    		await asyncio.sleep(refresh)
+    		running = [state for state in self.runs.values() if state.summary == None]
+    		if (running):
+    			print ("")
+    			for state in running:
+    				print (state.status())
+
+async def watch(path, expectedRuns, refresh):
+    watcher = Watcher(expectedRuns)
+    if (os.path.exists(path)):
+    	os.remove(path)
+    server = await asyncio.start_unix_server(watcher.readFeed, path = path)
+    try:
+    	async with server:
+    		display = asyncio.ensure_future(watcher.showRuns(refresh))
+    		await watcher.finished.wait()
+    		display.cancel()
+    finally:
+    	if (os.path.exists(path)):
+    		os.remove(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Watch the live feeds of running park simulations")
+    parser.add_argument("socket", help = "Unix socket path to listen on, runs publish to unix:PATH")
+    parser.add_argument("--runs", type = int, help = "exit once this many runs have ended (default: run until interrupted)")
+    parser.add_argument("--refresh", type = float, default = 1.0, help = "seconds between status lines (default 1)")
+    args = parser.parse_args()
+    try:
+    	asyncio.run(watch(args.socket, args.runs, args.refresh))
+    except KeyboardInterrupt:
+    	pass
@@ -1,6 +1,12 @@
 #This document contains classes not intended to be part of venue.py
 # but can be moved to other appropriate lib/whatever.py files.
 
+from SimPy.Simulation import *
+from random import expovariate, seed
+from lib.venue import Venue
+from lib.replicate import replicate, summarize
+from lib.streams import RandomStreams
+
 
 ## PatronGenerator
 # This process generates new Patron instances at a periodic rate
@@ -9,16 +15,21 @@ class PatronGenerator(Process):
    """ """
    ## start
    #
-   def start(self, venue):
-      print "PatronGenerator.start()"
-      i = 0
+   #  Interarrival times are drawn from arrivals, a random.Random, or
+   # from the global generator when it is None
+   def start(self, venue, arrivals = None):
+      print ("PatronGenerator.start()")
+      self.generated = 0 # Patrons sent to the venue so far
+      interarrival = expovariate
+      if arrivals is not None:
+         interarrival = arrivals.expovariate
       while True:
-         delay = expovariate(1.0/2.5) # Req. ????
+         delay = interarrival(1.0/2.5) # Req. ????
          yield hold, self, delay
 
-         newPatron = Patron(name = "Patron%02d"%(i,))
+         newPatron = Patron(name = "Patron%02d"%(self.generated,))
          activate(newPatron, newPatron.gotoVenue(venue))
-         i = i + 1
+         self.generated = self.generated + 1
 
 ## Simulation
 #  The Simulation starts, runs for a predetermined period of
@@ -26,62 +37,42 @@ class PatronGenerator(Process):
 # Req. ????
 theseeds = [1, ] # random number generator seeds for each trial
 
-## Experiment/Result printer
-#
-for currentSeed in theseeds:
+## runTrial
+#  Runs one trial for currentSeed and returns its summary. SimPy keeps
+# one global simulation per process, so replicate() runs each trial in
+# its own worker process and only this small dictionary is sent back.
+# streams is "global" to draw arrivals from the global generator, or
+# "independent" for the 'arrivals' stream of lib/streams.py, as in
+# Patron.runReplication.
+def runTrial(currentSeed, streams = "global"):
    seed(currentSeed)
+   arrivals = None
+   if streams == "independent":
+      arrivals = RandomStreams(currentSeed).stream('arrivals')
+   elif streams != "global":
+      raise ValueError("Unknown random streams " + str(streams))
 
    initialize()
    venue = Venue()
    activate(venue, venue.start(maxLineLength=10,
       setTimeToServe = 6, numPatronsPerHour = 21))
    generator = PatronGenerator(name = "PatronGenerator")
-   activate(generator, generator.start(venue))
+   activate(generator, generator.start(venue, arrivals))
    simulate(until = 12 * 60) # Req. ????
 
-   print "%8d: Venue's line capacity"%(
-      venue.lineLevel.capacity)
-   print "%8d: Total number of patrons served"%(
-      venue.lineDelayMonitor.count())
-   print "%8.4f: Average minutes spent in venue's line"%(
-      venue.lineDelayMonitor.mean())
-   print "%8d: Number of patrons who walked away because line was full"%(
-      venue.discouragedPatronsMonitor.count())
-   print "%8.4f: Time Average number of patrons in line"%(
-      venue.lineLevel.bufferMon.timeAverage())
-
-   # Calculate total elapsed time when line was full or empty
-   lastSampleEmpty = False
-   lastSampleFull = False
-   cumulativeTimeWithEmptyLine = 0.0
-   cumulativeTimeWithFullLine = 0.0
-   for sample in venue.lineLevel.bufferMon:
-      currentTime = sample[0]
-
-      if lastSampleEmpty:
-         cumulativeTimeWithEmptyLine = (cumulativeTimeWithEmptyLine +
-            (currentTime - lastTime))
-      elif lastSampleFull:
-         cumulativeTimeWithFullLine = (cumulativeTimeWithFullLine +
-            (currentTime - lastTime))
-
-      if sample[1] == 0:
-         lastSampleEmpty = True
-         lastSampleFull = False
-      elif sample[1] >= venue.lineLevel.capacity:
-         lastSampleFull = True
-         lastSampleEmpty = False
-      else:
-         lastSampleFull = False
-         lastSampleEmpty = False
-
-      lastTime = currentTime
-
-   print "%8.4f: Total elapsed minutes when line was empty"%(
-      cumulativeTimeWithEmptyLine)
-   print "%8.4f: Total elapsed minutes when line was full"%(
-      cumulativeTimeWithFullLine)
-
+   # Line statistics are kept online by the venue, so no Monitor
+   # history has to be walked to find the empty and full line time
+   lineStats = venue.lineStats
+   return {
+      'lineCapacity': venue.lineLevel.capacity,
+      'patronsArrived': generator.generated,
+      'patronsServed': lineStats.served,
+      'meanLineDelay': lineStats.meanDelay(),
+      'discouragedPatrons': lineStats.discouraged,
+      'timeAverageLineLength': lineStats.timeAverage(now()),
+      'minutesLineEmpty': lineStats.minutesEmpty,
+      'minutesLineFull': lineStats.minutesFull,
+   }
 
 ## Patron
 # Patron instances get into line at a venue and then passivate
@@ -106,13 +97,38 @@ class Patron(Process):
          # venue is done serving them.
          # Req. ????
          #print "Putting patron in line"
-         newPatronInfo = PatronInfo(now(), self);
-         venue.waitQueue.append(newPatronInfo)
+         venue.waitQueue.join(self, now())
+         venue.lineStats.change(now(), len(venue.waitQueue))
          yield put, self, venue.lineLevel, 1
       else:
          #print "Line was full so a patron walked away"
-         venue.discouragedPatronsMonitor.observe(now())
+         venue.lineStats.discourage()
+         if venue.keepHistory:
+            venue.discouragedPatronsMonitor.observe(now())
 
       yield passivate, self
       #print "Awake again"
-      yield passivate, self
\ No newline at end of file
+      yield passivate, self
+
+
+## Experiment/Result printer
+#  Each metric is printed as its mean over all seeds followed by the
+# half width of its 95% confidence interval
+if __name__ == '__main__':
+   summary = summarize(replicate(runTrial, theseeds))
+
+   print ("%8d: Venue's line capacity"%(
+      summary['lineCapacity'][0]))
+   print ("%8d: Total number of patrons served +/- %.4f"%(
+      summary['patronsServed'][0], summary['patronsServed'][1]))
+   print ("%8.4f: Average minutes spent in venue's line +/- %.4f"%(
+      summary['meanLineDelay'][0], summary['meanLineDelay'][1]))
+   print ("%8d: Number of patrons who walked away because line was full +/- %.4f"%(
+      summary['discouragedPatrons'][0], summary['discouragedPatrons'][1]))
+   print ("%8.4f: Time Average number of patrons in line +/- %.4f"%(
+      summary['timeAverageLineLength'][0],
+      summary['timeAverageLineLength'][1]))
+   print ("%8.4f: Total elapsed minutes when line was empty +/- %.4f"%(
+      summary['minutesLineEmpty'][0], summary['minutesLineEmpty'][1]))
+   print ("%8.4f: Total elapsed minutes when line was full +/- %.4f"%(
+      summary['minutesLineFull'][0], summary['minutesLineFull'][1]))
@@ -0,0 +1,122 @@
+# sweep.py
+# Runs a parameter sweep of the park with Patron.runSweepCell and prints
+# the mean and 95% confidence interval of each metric for every
+# parameter combination. Results are cached in --cache, so running a
+# sweep again only simulates the cells that are new or whose model
+# changed.
+#
+#   python sweep.py --param patrons=500,1000 --param servers=2 --param "Ride A0.capacity=5,10,20" --seeds 5
+#   python sweep.py grid.json --seeds 10 --max-cache-mb 50
+#   python sweep.py grid.json --screen meanLineDelay --keep 5
+#
+# With --screen every combination is first estimated analytically
+# (lib/queueing.py) and only the --keep best are simulated. The
+# estimate and its relative error against the simulated mean are
+# printed next to each simulated metric. The estimates can be far off.
+# Served counts come within 20%, but meanLineDelay was measured 12% to
+# 99% too high and discouragedPatrons up to 685% too high, the worst at
+# 100 patrons (see lib/queueing.py for the table). So keep a generous
+# --keep, since a screen can drop a configuration that simulation
+# would rank first.
+#
+# Venues serve any number of patrons at once unless a "servers" parameter
+# limits them. Without it lines never form, and capacity settings change
+# nothing.
+#
+# A grid file is a JSON object of parameter name -> list of values, see
+# Patron.runSweepCell for the parameter names.
+
+from lib.sweep import ResultCache, modelVersion, expandGrid, sweepParams, screen
+from lib.queueing import relativeError
+from lib.replicate import summarize
+import Patron
+import argparse
+import glob
+import json
+import os
+
+defaultMetrics = ["patronsServed", "meanLineDelay", "discouragedPatrons", "averageVenuesVisited"]
+
+# "name=1,2,3" -> ("name", [1, 2, 3]), keeping values that are not numbers as strings
+def parseParam(text):
+    name, values = text.split("=", 1)
+    parsed = []
+    for value in values.split(","):
+        try:
+            parsed.append(json.loads(value))
+        except ValueError:
+            parsed.append(value)
+    return name, parsed
+
+# The model version covers the simulation sources and every layout file the sweep can use
+def sweepModelVersion(grid):
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(here, "Patron.py")] + glob.glob(os.path.join(here, "lib", "*.py"))
+    paths = paths + glob.glob(os.path.join(here, "lib", "layouts", "*.json"))
+    paths = paths + grid.get("layout", [])
+    return modelVersion(paths)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Parameter sweep of the amusement park simulation")
+    parser.add_argument("grid", nargs = "?", help = "JSON file of parameter name -> list of values")
+    parser.add_argument("--param", action = "append", default = [], help = "NAME=V1,V2,... adds or replaces one parameter of the grid")
+    parser.add_argument("--seeds", type = int, default = 5, help = "seeds 1..N for every parameter combination (default 5)")
+    parser.add_argument("--cache", default = ".sweepcache", help = "result cache directory (default .sweepcache)")
+    parser.add_argument("--max-cache-mb", type = float, help = "evict least recently used results beyond this size")
+    parser.add_argument("--workers", type = int, help = "worker processes (default: one per core)")
+    parser.add_argument("--metrics", default = ",".join(defaultMetrics), help = "comma separated metrics to print")
+    parser.add_argument("--screen", metavar = "METRIC", help = "estimate every combination analytically and only simulate the --keep with the lowest METRIC")
+    parser.add_argument("--keep", type = int, default = 5, help = "combinations --screen sends to simulation (default 5)")
+    parser.add_argument("--maximize", action = "store_true", help = "--screen keeps the highest METRIC instead")
+    parser.add_argument("--output", help = "also write every cell's result to this JSON file")
+    args = parser.parse_args()
+
+    grid = {}
+    if (args.grid != None):
+        with open(args.grid) as gridFile:
+            grid = json.load(gridFile)
+    for text in args.param:
+        name, values = parseParam(text)
+        grid[name] = values
+
+    maxBytes = None
+    if (args.max_cache_mb != None):
+        maxBytes = int(args.max_cache_mb * 1024 * 1024)
+    cache = ResultCache(args.cache, maxBytes)
+    paramsList = expandGrid(grid)
+    estimates = {}
+    if (args.screen != None):
+        kept, screened = screen(Patron.estimateSweepCell, paramsList, args.screen, args.keep, args.maximize)
+        for params, estimate in zip(paramsList, screened):
+            estimates[json.dumps(params, sort_keys = True)] = estimate
+        print ("Screened %d combinations on %s, simulating %d" % (len(paramsList), args.screen, len(kept)))
+        paramsList = kept
+    cells = sweepParams(Patron.runSweepCell, paramsList, range(1, args.seeds + 1), cache, sweepModelVersion(grid), args.workers)
+    print ("%d cells: %d cached, %d simulated" % (len(cells), cache.hits, cache.misses))
+
+    # Group the seeds of each parameter combination
+    combinations = []
+    results = {}
+    for params, seed, result in cells:
+        key = json.dumps(params, sort_keys = True)
+        if (key not in results):
+            combinations.append(key)
+            results[key] = []
+        results[key].append(result)
+
+    metrics = args.metrics.split(",")
+    for key in combinations:
+        print ("")
+        print (", ".join(["%s=%s" % item for item in sorted(json.loads(key).items())]) or "defaults")
+        summary = summarize(results[key])
+        for metric in metrics:
+            mean, halfWidth, runs = summary[metric]
+            line = "%14.4f +/- %-10.4f %s (%d runs)" % (mean, halfWidth, metric, runs)
+            if (key in estimates and metric in estimates[key]):
+                estimate = estimates[key][metric]
+                line = line + "   estimate %.4f (%+.1f%%)" % (estimate, 100 * relativeError(estimate, mean))
+            print (line)
+
+    if (args.output != None):
+        with open(args.output, "w") as outFile:
+            json.dump([{"params": params, "seed": seed, "result": result} for params, seed, result in cells], outFile, indent = 1)
@@ -0,0 +1,38 @@
+# Exported .npy line columns analyzed with NumPy against the online figures (lib/columns.py, lib/analysis.py)
+import pytest
+numpy = pytest.importorskip("numpy")
+import Patron
+from lib.analysis import analyzeRun, lineMetrics, delayMetrics
+from lib.columns import writeColumn
+from lib.linestats import monitorLineMinutes
+
+def testWriteColumnLoadsWithNumpy(tmp_path):
+    path = str(tmp_path / "column.npy")
+    writeColumn(path, [0.5, 2.0, -1.25])
+    assert numpy.load(path).tolist() == [0.5, 2.0, -1.25]
+    writeColumn(path, [])
+    assert numpy.load(path).shape == (0,)
+
+def testLineMetricsByHand():
+    times = numpy.array([0.0, 1.0, 3.0, 4.0])
+    lengths = numpy.array([0.0, 1.0, 2.0, 0.0])
+    assert lineMetrics(times, lengths, 2, 5.0) == (pytest.approx(4.0 / 5.0), 1.0, 1.0)
+    assert delayMetrics(numpy.array([]))["meanLineDelay"] == 0.0
+
+def testExportedRunMatchesOnlineStatistics(tmp_path):
+    Patron.seed(5)
+    summary = Patron.runPark(400, statisticsMode = "monitor", exportDirectory = str(tmp_path), servers = 1)
+    results = analyzeRun(str(tmp_path))
+    assert sorted(results) == sorted(venue.name for venue in Patron.venueTable)
+    assert sum(metrics["served"] for metrics in results.values()) == summary["patronsServed"] > 0
+    for venue in Patron.venueTable:
+        metrics = results[venue.name]
+        stats = venue.lineStats
+        assert metrics["served"] == stats.served
+        assert metrics["meanLineDelay"] == pytest.approx(stats.meanDelay(), rel = 1e-12, abs = 1e-12)
+        assert metrics["maxLineDelay"] == pytest.approx(stats.maxDelay, abs = 1e-12)
+        assert metrics["timeAverageLineLength"] == pytest.approx(stats.timeAverage(Patron.now()), rel = 1e-12, abs = 1e-12)
+        assert metrics["minutesLineEmpty"] == pytest.approx(stats.minutesEmpty, abs = 1e-9)
+        assert metrics["minutesLineFull"] == pytest.approx(stats.minutesFull, abs = 1e-9)
+        empty, full = monitorLineMinutes(venue.lineLevel.bufferMon, venue.lineCapacity)
+        assert (metrics["minutesLineEmpty"], metrics["minutesLineFull"]) == (pytest.approx(empty, abs = 1e-9), pytest.approx(full, abs = 1e-9))
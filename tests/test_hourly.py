@@ -0,0 +1,45 @@
+# Hourly park and venue metrics (lib/hourly.py)
+import pytest
+import Patron
+from lib import park
+from lib.hourly import HourlyMetrics, clockTime
+from lib.parklayout import loadLayout
+
+def testHoursCloseOnceAtTheirBoundaries():
+    reports = []
+    hourly = HourlyMetrics(["Vendor 0", "Ride A0"], reports.append)
+    hourly.parkArrival(0.0)
+    hourly.join(59.999, 1, True)
+    assert reports == []
+    hourly.serve(60.0, 1, 0.001) # Exactly at the end of hour 0
+    assert [report["hour"] for report in reports] == [0]
+    hourly.parkDeparture(200.0) # Hour 2 has no events at all
+    assert [report["hour"] for report in reports] == [0, 1, 2]
+    hourly.advance(720.0)
+    hourly.advance(720.0)
+    assert [report["hour"] for report in reports] == list(range(12))
+    assert [(report["start"], report["end"]) for report in reports] == [(60.0 * hour, 60.0 * (hour + 1)) for hour in range(12)]
+    assert (reports[0]["parkArrivals"], reports[0]["visits"], reports[0]["served"]) == (1, 1, 0)
+    assert (reports[1]["served"], reports[1]["patronsInPark"]) == (1, 1)
+    empty = reports[2]
+    assert (empty["parkArrivals"], empty["parkDepartures"], empty["served"], empty["patronsInPark"]) == (0, 0, 0, 1)
+    assert (reports[3]["parkDepartures"], reports[3]["patronsInPark"], reports[11]["patronsInPark"]) == (1, 0, 0)
+
+def testClockTime():
+    assert [clockTime(minutes) for minutes in (0, 119, 120, 180, 720)] == ["10AM", "11AM", "12PM", "1PM", "10PM"]
+
+# The hours of a day add up to its summary on either backend
+@pytest.mark.parametrize("backend", ["simpy", "kernel"])
+def testHoursAddUpToTheDay(backend):
+    hours = []
+    Patron.seed(6)
+    if (backend == "kernel"):
+        summary = park.runPark(800, loadLayout(Patron.defaultLayoutPath), 2, hourlyReport = hours.append)
+    else:
+        summary = Patron.runPark(800, servers = 2, hourlyReport = hours.append)
+    assert [hour["hour"] for hour in hours] == list(range(12))
+    assert sum(hour["served"] for hour in hours) == summary["patronsServed"] > 0
+    assert sum(hour["balked"] for hour in hours) == summary["discouragedPatrons"] > 0
+    assert sum(hour["visits"] for hour in hours) == round(summary["averageVenuesVisited"] * 800)
+    assert sum(hour["emptyLineSelections"] for hour in hours) == summary["emptyLineSelections"]
+    assert sum(hour["parkArrivals"] for hour in hours) == 800
@@ -0,0 +1,40 @@
+# The heapq kernel and the park model on it (lib/kernel.py, lib/park.py)
+import random
+import pytest
+from lib.kernel import Simulation
+from lib import park
+import Patron
+
+def testRandintDrawsLikeRandomRandint():
+    for low, high in [(1, 1), (1, 2), (1, 6), (1, 100), (1, 64), (1, 65), (5, 1000)]:
+        random.seed(11)
+        expected = [random.randint(low, high) for draw in range(500)]
+        random.seed(11)
+        assert [park.randint(low, high) for draw in range(500)] == expected
+
+def testEventsRunInTimeThenScheduleOrder():
+    sim = Simulation()
+    seen = []
+    sim.scheduleAt(2.0, seen.append, "b")
+    sim.scheduleAt(1.0, seen.append, "a")
+    sim.scheduleAt(2.0, seen.append, "c")
+    sim.run(10.0)
+    assert seen == ["a", "b", "c"]
+    assert sim.events == 3
+
+def testScheduleInThePast():
+    sim = Simulation()
+    sim.scheduleAt(5.0, lambda unused: None)
+    sim.run(10.0)
+    with pytest.raises(ValueError):
+        sim.scheduleAt(1.0, lambda unused: None)
+
+# The kernel model draws from the global generator in the same places as Patron.py, so with unlimited servers
+# (no lines form) a seed gives the same daily outputs on both backends
+@pytest.mark.parametrize("currentSeed, numberPatrons", [(1, 5), (7, 400), (12, 2000)])
+def testKernelReproducesSimPyWithUnlimitedServers(currentSeed, numberPatrons):
+    simpy = Patron.runReplication(currentSeed, numberPatrons, backend = "simpy")
+    kernel = Patron.runReplication(currentSeed, numberPatrons, backend = "kernel")
+    assert kernel["schedulerEvents"] < simpy["schedulerEvents"]
+    del simpy["schedulerEvents"], simpy["venueWakeups"], kernel["schedulerEvents"]
+    assert simpy == kernel
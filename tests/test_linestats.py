@@ -0,0 +1,43 @@
+# Online line statistics against the Monitor history they replace (lib/linestats.py)
+import pytest
+from SimPy.Simulation import initialize, activate, simulate, now
+import Patron
+import misc
+from lib.linestats import LineStats, monitorLineMinutes
+from lib.venue import Venue
+
+def testLineStatsByHand():
+    stats = LineStats(2)
+    stats.change(1.0, 1)
+    stats.change(3.0, 2)
+    stats.change(4.0, 0)
+    stats.observeDelay(2.0)
+    stats.observeDelay(4.0, 2)
+    assert stats.minutesEmpty == 1.0
+    assert stats.minutesFull == 1.0
+    assert stats.timeAverage(5.0) == pytest.approx((2.0 + 2.0) / 5.0)
+    assert (stats.served, stats.meanDelay(), stats.maxDelay) == (3, pytest.approx(10.0 / 3), 4.0)
+
+@pytest.mark.parametrize("numberPatrons", [200, 3000])
+def testOnlineMatchesMonitor(numberPatrons):
+    online = Patron.runReplication(7, numberPatrons, statisticsMode = "online", servers = 1)
+    monitor = Patron.runReplication(7, numberPatrons, statisticsMode = "monitor", servers = 1)
+    assert online.keys() == monitor.keys()
+    for metric in online:
+        assert online[metric] == pytest.approx(monitor[metric], rel = 1e-12, abs = 1e-9)
+
+def testVenueHistoryMatchesLineStats():
+    misc.seed(3)
+    initialize()
+    venue = Venue(name = "Ride")
+    activate(venue, venue.start(maxLineLength = 10, setTimeToServe = 6, numPatronsPerHour = 21, keepHistory = True))
+    generator = misc.PatronGenerator(name = "PatronGenerator")
+    activate(generator, generator.start(venue))
+    simulate(until = 12 * 60)
+    stats = venue.lineStats
+    empty, full = monitorLineMinutes(venue.lineLevel.bufferMon, 10)
+    assert venue.lineDelayMonitor.count() == stats.served
+    assert venue.lineDelayMonitor.mean() == pytest.approx(stats.meanDelay())
+    assert venue.discouragedPatronsMonitor.count() == stats.discouraged > 0
+    assert venue.lineLevel.bufferMon.timeAverage() == pytest.approx(stats.timeAverage(now()))
+    assert (empty, full) == (pytest.approx(stats.minutesEmpty), pytest.approx(stats.minutesFull))
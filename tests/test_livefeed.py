@@ -0,0 +1,54 @@
+# Live venue snapshots through a bounded buffer (lib/livefeed.py)
+import json
+import os
+import time
+import pytest
+import Patron
+from lib.livefeed import LiveFeed
+
+def readMessages(path):
+    with open(path) as feedFile:
+        return [json.loads(line) for line in feedFile]
+
+# A named pipe nobody reads from keeps the writer thread waiting to open it
+def testFullBufferDropsOldestSnapshotsWithoutBlocking(tmp_path):
+    path = str(tmp_path / "feed")
+    os.mkfifo(path)
+    feed = LiveFeed(path, "blocked", maxPending = 4)
+    feed.start(["Vendor 0"])
+    slowest = 0.0
+    for minute in range(20):
+        started = time.perf_counter()
+        feed.publish({"type": "snapshot", "run": "blocked", "time": float(minute)})
+        slowest = max(slowest, time.perf_counter() - started)
+    assert slowest < 0.1
+    assert feed.dropped == 17
+    assert [message["type"] for message in feed.pending] == ["start", "snapshot", "snapshot", "snapshot"]
+    feed.close({"patronsServed": 1}, timeout = 0)
+    messages = readMessages(path) # Lets the writer open the pipe and send what is pending
+    feed.writer.join(5.0)
+    assert not feed.writer.is_alive()
+    assert [message["type"] for message in messages] == ["start", "snapshot", "snapshot", "snapshot", "end"]
+    assert [message["time"] for message in messages[1:4]] == [17.0, 18.0, 19.0]
+    assert messages[-1]["summary"] == {"patronsServed": 1}
+
+def testStartAndEndAreNeverDropped(tmp_path):
+    path = str(tmp_path / "feed")
+    os.mkfifo(path)
+    feed = LiveFeed(path, "blocked", maxPending = 2)
+    for run in range(3):
+        feed.publish({"type": "start", "run": run})
+    feed.publish({"type": "snapshot", "run": 0, "time": 0.0})
+    assert feed.dropped == 0
+    feed.close(None, timeout = 0)
+    messages = readMessages(path)
+    feed.writer.join(5.0)
+    assert [message["type"] for message in messages] == ["start", "start", "start", "snapshot", "end"]
+
+def testRunThatRaisesStillEndsItsFeed(tmp_path):
+    path = str(tmp_path / "feed.jsonl")
+    with pytest.raises(ValueError):
+        Patron.runReplication(1, 50, liveAddress = path, venueChanges = {"No Such Venue": {"capacity": 1}})
+    messages = readMessages(path)
+    assert messages[0]["type"] == "start"
+    assert messages[-1] == {"type": "end", "run": "seed 1", "summary": None}
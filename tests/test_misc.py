@@ -0,0 +1,23 @@
+# The one venue trial of misc.py run through lib/replicate.py
+import random
+import pytest
+import misc
+from lib.replicate import replicate, summarize
+
+def testTrialsAreSeededAndRunAnywhere():
+    inProcess = replicate(misc.runTrial, [1, 2, 3], 1)
+    assert replicate(misc.runTrial, [1, 2, 3], 2) == inProcess
+    assert inProcess[0] != inProcess[1]
+    summary = summarize(inProcess)
+    assert summary["lineCapacity"] == (10, 0.0, 3)
+    assert summary["patronsServed"][0] > 0
+    for trial in inProcess:
+        assert 0 < trial["minutesLineEmpty"] + trial["minutesLineFull"] < 12 * 60
+
+def testIndependentArrivalsIgnoreTheGlobalGenerator(monkeypatch):
+    independent = misc.runTrial(2, streams = "independent")
+    assert independent != misc.runTrial(2)
+    monkeypatch.setattr(misc, "seed", lambda currentSeed: random.seed(99))
+    assert misc.runTrial(2, streams = "independent") == independent
+    with pytest.raises(ValueError):
+        misc.runTrial(2, streams = "perPatron")
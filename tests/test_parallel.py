@@ -0,0 +1,30 @@
+# Park areas simulated in parallel worker processes (lib/parallel.py)
+import pytest
+import Patron
+from lib.parallel import runParallelPark, assignAreas
+from lib.parklayout import loadLayout
+
+def testAssignAreasCoversEveryAreaOnce():
+    layout = loadLayout(Patron.defaultLayoutPath)
+    for workers in [1, 2, 3, 100]:
+        assigned = assignAreas(layout, workers)
+        assert sorted([areaId for areas in assigned for areaId in areas]) == list(range(len(layout.areaNames)))
+
+def testSameDayForAnyNumberOfWorkers():
+    layout = loadLayout(Patron.defaultLayoutPath)
+    days = [runParallelPark(400, layout, 2, 5, workers) for workers in [1, 2, 3]]
+    for day in days[1:]:
+        for metric in days[0]:
+            if (metric != "parallel"):
+                # Only the order of float sums over the workers differs
+                assert day[metric] == pytest.approx(days[0][metric], rel = 1e-9)
+
+def testReplicationMatchesParallelPark():
+    summary = Patron.runReplication(5, 400, backend = "kernel", servers = 2, streams = "independent", parallel = 2)
+    day = runParallelPark(400, loadLayout(Patron.defaultLayoutPath), 2, 5, 2)
+    del day["parallel"]
+    assert summary == day
+
+def testNeedsAWorker():
+    with pytest.raises(ValueError):
+        runParallelPark(10, loadLayout(Patron.defaultLayoutPath), 2, 5, 0)
@@ -0,0 +1,47 @@
+# Park layouts and their compiled cache (lib/parklayout.py)
+import os
+import pickle
+import shutil
+import pytest
+from lib import parklayout
+from lib.parklayout import loadLayout, defaultLayoutPath
+
+@pytest.fixture
+def layoutPath(tmp_path):
+    path = str(tmp_path / "park.json")
+    shutil.copy(defaultLayoutPath, path)
+    parklayout.loadedLayouts.pop(path, None)
+    return path
+
+def reload(path):
+    parklayout.loadedLayouts.pop(path, None)
+    return loadLayout(path)
+
+def testCacheIsReused(layoutPath):
+    compiled = loadLayout(layoutPath)
+    assert os.path.exists(layoutPath + ".cache")
+    cached = reload(layoutPath)
+    assert cached.names == compiled.names
+    assert list(cached.walkTime) == list(compiled.walkTime)
+
+class Exploit:
+    def __reduce__(self):
+        return (os.remove, ("/nonexistent",))
+
+@pytest.mark.parametrize("contents", [b"", b"not a pickle", pickle.dumps((1, 2)), pickle.dumps(Exploit()),
+    pickle.dumps((parklayout.cacheVersion, "stale hash", {}))])
+def testBadCacheIsRebuilt(layoutPath, contents):
+    expected = loadLayout(layoutPath)
+    with open(layoutPath + ".cache", "wb") as cacheFile:
+        cacheFile.write(contents)
+    layout = reload(layoutPath)
+    assert layout.names == expected.names
+    assert list(layout.walkTime) == list(expected.walkTime)
+    assert reload(layoutPath).size == expected.size
+
+def testForeignGlobalsAreRefused(layoutPath):
+    with open(layoutPath + ".cache", "wb") as cacheFile:
+        pickle.dump(Exploit(), cacheFile)
+    with open(layoutPath + ".cache", "rb") as cacheFile:
+        with pytest.raises(pickle.UnpicklingError):
+            parklayout.CacheUnpickler(cacheFile).load()
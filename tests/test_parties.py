@@ -0,0 +1,44 @@
+# Patrons moving in parties (lib/schedule.py partySizes, Patron.py party mode)
+import random
+import pytest
+import Patron
+from lib.parklayout import loadLayout
+from lib.schedule import partySizes, largestParty
+
+@pytest.mark.parametrize("meanSize", [1, 2.5, 4])
+def testPartySizes(meanSize):
+    sizes = partySizes(503, meanSize, random.Random(3))
+    assert sum(sizes) == 503
+    assert all(1 <= size <= largestParty(meanSize) for size in sizes)
+
+def testPartySizesAverageMeanSize():
+    sizes = partySizes(100000, 2.5, random.Random(3))
+    assert sum(sizes[:-1]) / float(len(sizes) - 1) == pytest.approx(2.5, rel = 0.01)
+
+@pytest.mark.parametrize("meanSize", [0, 0.5, -2])
+def testMeanSizeBelowOneIsRejected(meanSize):
+    with pytest.raises(ValueError):
+        partySizes(10, meanSize)
+
+def testPartiesLargerThanTheShortestLineAreRejected():
+    layout = loadLayout(Patron.defaultLayoutPath)
+    Patron.checkPartySize(10.5, layout)
+    with pytest.raises(ValueError):
+        Patron.checkPartySize(11, layout)
+    with pytest.raises(ValueError):
+        Patron.runReplication(1, 100, partySize = 30)
+
+# Every patron of every party arrives, and every place a party took in line is served or still in line at closing
+@pytest.mark.parametrize("partySize", [1, 2.5, 4])
+def testPartiesConservePatrons(partySize):
+    hours = []
+    Patron.seed(2)
+    summary = Patron.runPark(600, servers = 1, partySize = partySize, hourlyReport = hours.append)
+    assert len(Patron.patronTable) == 600
+    assert sum(hour["parkArrivals"] for hour in hours) == 600
+    assert sum(hour["parkDepartures"] for hour in hours) + hours[-1]["patronsInPark"] == 600
+    inLine = sum(len(venue.waitQueue) for venue in Patron.venueTable)
+    joined = sum(Patron.patronTable.venuesVisited)
+    assert joined == summary["patronsServed"] + inLine
+    assert summary["patronsServed"] == sum(hour["served"] for hour in hours)
+    assert summary["discouragedPatrons"] == sum(hour["balked"] for hour in hours)
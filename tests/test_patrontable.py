@@ -0,0 +1,77 @@
+# Struct-of-arrays patron state and its daily outputs, with and without NumPy (lib/patrontable.py)
+import random
+import pytest
+from lib import patrontable
+from lib.patrontable import PatronTable
+
+@pytest.fixture(params = ["numpy", "pure"])
+def numpyMode(request, monkeypatch):
+    if (request.param == "numpy"):
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(patrontable, "numpy", None)
+    return request.param
+
+def fillTable(patrons, seed):
+    rng = random.Random(seed)
+    table = PatronTable()
+    for patron in range(patrons):
+        patronId = table.add(0, rng.uniform(0, 120), rng.uniform(120, 720))
+        table.timeInLine[patronId] = rng.uniform(0, 300)
+        table.venuesVisited[patronId] = rng.randint(0, 30)
+        table.noAvailableVenue[patronId] = rng.randint(0, 2)
+        table.emptyLines[patronId] = rng.randint(0, 5)
+    return table
+
+def expectedOutputs(table, measuredFrom = None):
+    rows = [patronId for patronId in range(len(table)) if measuredFrom is None or table.departureTime[patronId] > measuredFrom]
+    timeInLine = sum(table.timeInLine[patronId] for patronId in rows)
+    visits = sum(table.venuesVisited[patronId] for patronId in rows)
+    return {"averageTimeInLine": timeInLine / len(rows), "averageTimeInLinePerVisit": timeInLine / visits,
+        "averageVenuesVisited": visits / float(len(rows)), "maxVenuesVisited": max(table.venuesVisited[patronId] for patronId in rows),
+        "noAvailableVenue": sum(table.noAvailableVenue[patronId] for patronId in rows),
+        "emptyLineSelections": sum(table.emptyLines[patronId] for patronId in rows)}
+
+def testAddReturnsConsecutiveIds():
+    table = PatronTable()
+    assert [table.add(3), table.add(5, 10.0, 200.0), table.add(3)] == [0, 1, 2]
+    assert len(table) == 3
+    assert (table.nextVenue[1], table.lastVenue[1], table.arrivalTime[1], table.departureTime[1]) == (5, 5, 10.0, 200.0)
+    assert table.departureTime[0] == 12 * 60.0
+    assert table.avoidVenues == [None, None, None]
+
+def testDailyOutputs(numpyMode):
+    table = fillTable(500, 1)
+    outputs = table.dailyOutputs()
+    expected = expectedOutputs(table)
+    assert outputs.keys() == expected.keys()
+    for name in expected:
+        assert outputs[name] == pytest.approx(expected[name], rel = 1e-12)
+    assert type(outputs["maxVenuesVisited"]) is int
+
+def testDailyOutputsAfterResetCounters(numpyMode):
+    table = fillTable(500, 2)
+    table.resetCounters(400.0)
+    rng = random.Random(3)
+    for patronId in range(len(table)):
+        table.timeInLine[patronId] = rng.uniform(0, 100)
+        table.venuesVisited[patronId] = rng.randint(1, 10)
+    outputs = table.dailyOutputs()
+    expected = expectedOutputs(table, 400.0)
+    for name in expected:
+        assert outputs[name] == pytest.approx(expected[name], rel = 1e-12)
+
+def testEmptyTable(numpyMode):
+    table = PatronTable()
+    assert table.dailyOutputs()["averageVenuesVisited"] == 0.0
+    table.add(0, 0.0, 60.0)
+    table.resetCounters(120.0)
+    assert table.dailyOutputs() == PatronTable().dailyOutputs()
+
+def testNumpyAndPureOutputsAgree(monkeypatch):
+    pytest.importorskip("numpy")
+    table = fillTable(300, 4)
+    table.measuredFrom = 300.0
+    withNumpy = table.dailyOutputs()
+    monkeypatch.setattr(patrontable, "numpy", None)
+    assert table.dailyOutputs() == pytest.approx(withNumpy, rel = 1e-12)
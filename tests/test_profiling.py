@@ -0,0 +1,27 @@
+# Profiling hooks (lib/profiling.py)
+import pytest
+import SimPy
+import Patron
+from lib import profiling
+from lib.profiling import profiler, checkSimPy
+
+def testInstalledSimPyIsSupported():
+    checkSimPy()
+
+def testOtherSimPyIsRefused(monkeypatch):
+    monkeypatch.setattr(SimPy, "__version__", "2.2", raising = False)
+    with pytest.raises(RuntimeError, match = "2.3.1"):
+        checkSimPy()
+
+def testProfiledRunCountsEveryEvent():
+    profiler.reset()
+    profiler.enable()
+    try:
+        Patron.seed(2)
+        Patron.startPark(50, servers = 1)
+        events = Patron.simulateCountingEvents(12*60)
+    finally:
+        profiler.disable()
+    assert sum([cost.events for cost in profiler.processes.values()]) == events
+    assert profiler.levels
+    profiler.reset()
@@ -0,0 +1,56 @@
+# Analytical venue queue estimates (lib/queueing.py)
+import math
+import pytest
+from lib.queueing import md1k, mmck, mdckApproximation, estimateVenue, estimatePark, relativeError
+from lib.parklayout import loadLayout
+import Patron
+
+def testMD1KWithoutLineIsErlangLoss():
+    # With no room to wait the blocking probability does not depend on the service distribution
+    assert md1k(0.5, 1.0, 0).blockProbability == pytest.approx(0.5 / 1.5)
+
+@pytest.mark.parametrize("load", [0.3, 0.5, 0.8])
+def testMD1KWithLongLineIsPollaczekKhinchine(load):
+    estimate = md1k(load, 1.0, 200)
+    assert estimate.blockProbability == pytest.approx(0.0, abs = 1e-9)
+    assert estimate.meanLineDelay == pytest.approx(load / (2.0 * (1.0 - load)))
+    # The line is empty with nobody or one patron at the venue
+    assert estimate.emptyFraction == pytest.approx((1.0 - load) * math.exp(load))
+
+def testMD1KOverloaded():
+    estimate = md1k(2.0, 1.0, 5)
+    assert estimate.throughput() == pytest.approx(1.0, rel = 1e-3)
+    assert estimate.blockProbability == pytest.approx(0.5, rel = 1e-3)
+    assert estimate.fullFraction == estimate.blockProbability
+    assert 0.0 < estimate.meanLineLength <= 5
+
+@pytest.mark.parametrize("lineCapacity", [5, 60, 300])
+def testMD1KSaturated(lineCapacity):
+    # Every patron served waited for a full line ahead of it
+    estimate = md1k(3.0, 1.0, lineCapacity)
+    assert estimate.blockProbability == pytest.approx(2.0 / 3.0, rel = 1e-3)
+    assert estimate.meanLineDelay == pytest.approx(lineCapacity, rel = 0.15)
+
+def testMMCKMatchesMM1K():
+    load = 0.5
+    assert mmck(load, 1.0, 1, 4).blockProbability == pytest.approx((1 - load) * load ** 5 / (1 - load ** 6))
+
+def testMDCKWithOneServerIsMD1K():
+    assert mdckApproximation(0.7, 1.0, 1, 10).meanLineDelay == md1k(0.7, 1.0, 10).meanLineDelay
+
+def testUnlimitedServersNeverWait():
+    estimate = estimateVenue(5.0, 3.0, None, 10)
+    assert (estimate.meanLineDelay, estimate.blockProbability) == (0.0, 0.0)
+
+def testRelativeError():
+    assert relativeError(15.0, 10.0) == 0.5
+    assert relativeError(2.0, 0.0) == 2.0
+
+# Within the bounds documented in lib/queueing.py
+def testParkEstimateAgainstSimulation():
+    layout = loadLayout(Patron.defaultLayoutPath)
+    estimate, venues = estimatePark(layout, 1000, 2)
+    runs = [Patron.runReplication(currentSeed, 1000, backend = "kernel", servers = 2) for currentSeed in range(1, 4)]
+    for metric, bound in [("patronsServed", 0.2), ("meanLineDelay", 1.0)]:
+        simulated = sum([run[metric] for run in runs]) / len(runs)
+        assert abs(relativeError(estimate[metric], simulated)) < bound
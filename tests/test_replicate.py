@@ -0,0 +1,40 @@
+# Replications, confidence intervals and sequential stopping (lib/replicate.py)
+import random
+import pytest
+from lib.replicate import replicate, replicateUntil, confidenceHalfWidth, summarize
+
+# A cheap stand-in for a park day: noisy metrics whose spread differs
+def fakeRun(seed):
+    rng = random.Random(seed)
+    return {"narrow": 100.0 + rng.gauss(0.0, 1.0), "wide": 100.0 + rng.gauss(0.0, 20.0)}
+
+def testConfidenceHalfWidth():
+    assert confidenceHalfWidth([1.0, 1.0, 1.0]) == 0.0
+    assert confidenceHalfWidth([1.0, 3.0]) == pytest.approx(12.706)
+
+def testSummarize():
+    merged = summarize([{"x": 1.0}, {"x": 3.0}])
+    assert merged["x"] == (2.0, pytest.approx(12.706), 2)
+
+def testReplicateKeepsSeedOrder():
+    assert replicate(fakeRun, [3, 1, 2], 2) == [fakeRun(3), fakeRun(1), fakeRun(2)]
+
+def testRunsNeededDoesNotDependOnBatchSize():
+    results, runsNeeded = replicateUntil(fakeRun, ["narrow", "wide"], 0.05, 200, processes = 1)
+    assert 5 == runsNeeded["narrow"] < runsNeeded["wide"] == len(results)
+    for processes in [2, 3]:
+        batched, batchedRunsNeeded = replicateUntil(fakeRun, ["narrow", "wide"], 0.05, 200, processes = processes)
+        assert batchedRunsNeeded == runsNeeded
+        assert batched[:len(results)] == results
+        assert len(batched) < len(results) + processes
+
+def testBudgetRunsOut():
+    results, runsNeeded = replicateUntil(fakeRun, ["wide"], 0.0001, 7, processes = 1)
+    assert len(results) == 7
+    assert runsNeeded == {"wide": None}
+
+def testInvalidInput():
+    with pytest.raises(ValueError):
+        replicateUntil(fakeRun, ["narrow"], 0.05, 0, processes = 1)
+    with pytest.raises(ValueError):
+        replicateUntil(fakeRun, ["meanDelay"], 0.05, 10, processes = 1)
@@ -0,0 +1,54 @@
+# Fenwick-tree venue sampler against a linear walk over the weights (lib/sampler.py)
+import random
+from lib.sampler import PopularitySampler
+
+def linearFind(weights, masked, target):
+    for index, weight in enumerate(weights):
+        if index in masked:
+            continue
+        target = target - weight
+        if target <= 0:
+            return index
+
+def testTotalAndSetWeight():
+    sampler = PopularitySampler([3, 1, 4, 1, 5])
+    assert sampler.total() == 14
+    sampler.setWeight(2, 10)
+    assert sampler.total() == 20
+    assert sampler.find(4) == 1
+    assert sampler.find(5) == 2
+    assert sampler.find(14) == 2
+
+def testMaskNests():
+    sampler = PopularitySampler([2, 3, 5])
+    sampler.mask(1)
+    sampler.mask(1)
+    assert sampler.total() == 7
+    sampler.unmask(1)
+    assert sampler.total() == 7
+    sampler.unmask(1)
+    assert sampler.total() == 10
+
+def testSetWeightWhileMasked():
+    sampler = PopularitySampler([2, 3, 5])
+    sampler.mask(0)
+    sampler.setWeight(0, 8)
+    assert sampler.total() == 8
+    sampler.unmask(0)
+    assert sampler.total() == 16
+    assert sampler.find(8) == 0
+    assert sampler.find(9) == 1
+
+def testFindMatchesLinearWalk():
+    rng = random.Random(11)
+    for size in (1, 2, 7, 16, 33):
+        weights = [rng.randint(0, 9) for i in range(size)]
+        weights[0] = weights[0] + 1
+        sampler = PopularitySampler(weights)
+        masked = set(rng.sample(range(1, size), size // 3)) if size > 1 else set()
+        for index in masked:
+            sampler.mask(index)
+        total = sum(weight for index, weight in enumerate(weights) if index not in masked)
+        assert sampler.total() == total
+        for target in range(1, total + 1):
+            assert sampler.find(target) == linearFind(weights, masked, target)
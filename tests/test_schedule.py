@@ -0,0 +1,27 @@
+# Daily arrival and departure schedule (lib/schedule.py)
+import random
+import pytest
+from lib.schedule import departureCounts, daySchedule, departurePercentages, departureStart
+
+@pytest.mark.parametrize("numberPatrons", [0, 1, 7, 99, 100, 1234, 3000])
+def testDepartureCountsAddUp(numberPatrons):
+    counts = departureCounts(numberPatrons)
+    assert len(counts) == len(departurePercentages)
+    assert sum(counts) == numberPatrons
+    for count, percentage in zip(counts, departurePercentages):
+        assert abs(count - numberPatrons * percentage / 100.0) < 1
+
+def testDepartureCountsExact():
+    assert departureCounts(100) == departurePercentages
+
+@pytest.mark.parametrize("numberPatrons", [1, 57, 1000])
+def testDaySchedule(numberPatrons):
+    arrivals, departures = daySchedule(numberPatrons, random.Random(5), random.Random(6))
+    assert len(arrivals) == len(departures) == numberPatrons
+    assert arrivals == sorted(arrivals)
+    assert all(0.0 <= arrival < 120.0 for arrival in arrivals)
+    assert all(departureStart <= departure < 720.0 for departure in departures)
+    perHour = [0] * len(departurePercentages)
+    for departure in departures:
+        perHour[int((departure - departureStart) // 60.0)] += 1
+    assert perHour == departureCounts(numberPatrons)
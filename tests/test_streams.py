@@ -0,0 +1,37 @@
+# Independent random streams (lib/streams.py)
+import random
+import pytest
+import Patron
+from lib.schedule import daySchedule
+from lib.streams import RandomStreams, PatronStreams, streamSeed
+
+def testStreamsAreRepeatableAndDistinct():
+    assert RandomStreams(1).stream("arrivals").random() == RandomStreams(1).stream("arrivals").random()
+    assert streamSeed(1, "arrivals") != streamSeed(1, "departures")
+    assert streamSeed(1, "arrivals") != streamSeed(2, "arrivals")
+
+def testPatronStreamsDoNotDependOnOtherPatrons():
+    alone = PatronStreams(7)
+    alone.add()
+    busy = PatronStreams(7)
+    busy.add()
+    busy.add()
+    for draw in range(100):
+        busy.randint(1, 1, 100)
+    draws = [alone.randint(0, 1, 6) for draw in range(1000)]
+    assert draws == [busy.randint(0, 1, 6) for draw in range(1000)]
+    assert sorted(set(draws)) == [1, 2, 3, 4, 5, 6]
+
+def testDepartureStreamIndependentOfArrivals():
+    first = daySchedule(200, random.Random(1), random.Random(9))
+    second = daySchedule(200, random.Random(2), random.Random(9))
+    assert first[0] != second[0]
+    assert first[1] == second[1]
+
+# Holds with unlimited servers only, where no lines form (see lib/streams.py)
+@pytest.mark.parametrize("currentSeed", [1, 4])
+def testBackendsAgreeWithUnlimitedServers(currentSeed):
+    simpy = Patron.runReplication(currentSeed, 400, backend = "simpy", streams = "independent")
+    kernel = Patron.runReplication(currentSeed, 400, backend = "kernel", streams = "independent")
+    del simpy["schedulerEvents"], simpy["venueWakeups"], kernel["schedulerEvents"]
+    assert simpy == kernel
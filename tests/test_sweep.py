@@ -0,0 +1,75 @@
+# Parameter sweeps over the on-disk result cache (lib/sweep.py)
+import json
+import os
+from lib.sweep import ResultCache, expandGrid, modelVersion, sweep
+
+def countingRun(calls):
+    def run(params, seed):
+        calls.append((params["a"], params["b"], seed))
+        return {"value": params["a"] * 10 + params["b"] + seed / 100.0}
+    return run
+
+def testExpandGrid():
+    assert expandGrid({"b": [1, 2], "a": ["x"]}) == [{"a": "x", "b": 1}, {"a": "x", "b": 2}]
+
+def testRepeatedSweepOnlyHitsTheCache(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    calls = []
+    first = sweep(countingRun(calls), {"a": [1, 2], "b": [3]}, [1, 2], cache, "v1", processes = 1)
+    assert len(calls) == 4 and (cache.hits, cache.misses) == (0, 4)
+    second = sweep(countingRun(calls), {"a": [1, 2], "b": [3]}, [1, 2], cache, "v1", processes = 1)
+    assert len(calls) == 4 and (cache.hits, cache.misses) == (4, 4)
+    assert second == first
+    assert first[0] == ({"a": 1, "b": 3}, 1, {"value": 13.01})
+
+def testGrownGridOnlyRunsNewCells(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    calls = []
+    sweep(countingRun(calls), {"a": [1, 2], "b": [3]}, [1], cache, "v1", processes = 1)
+    del calls[:]
+    results = sweep(countingRun(calls), {"a": [1, 2, 5], "b": [3]}, [1], cache, "v1", processes = 1)
+    assert calls == [(5, 3, 1)]
+    assert [result["value"] for params, seed, result in results] == [13.01, 23.01, 53.01]
+
+def testNewModelVersionMissesEveryCell(tmp_path):
+    source = tmp_path / "model.py"
+    source.write_text("x = 1\n")
+    version = modelVersion([str(source)])
+    assert modelVersion([str(source)]) == version
+    source.write_text("x = 2\n")
+    newVersion = modelVersion([str(source)])
+    assert newVersion != version
+    cache = ResultCache(str(tmp_path / "cache"))
+    calls = []
+    sweep(countingRun(calls), {"a": [1], "b": [3]}, [1, 2], cache, version, processes = 1)
+    sweep(countingRun(calls), {"a": [1], "b": [3]}, [1, 2], cache, newVersion, processes = 1)
+    assert len(calls) == 4 and cache.hits == 0
+
+def testForeignOrPartialRecordsAreMisses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key({"a": 1}, 1, "v1")
+    os.makedirs(os.path.dirname(cache.path(key)))
+    for contents in ['{"params": {"a": 1}}', '[1, 2]', '{"params": {"a": 1}, "res']:
+        with open(cache.path(key), "w") as resultFile:
+            resultFile.write(contents)
+        assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.put(key, {"a": 1}, 1, "v1", {"value": 4})
+    assert cache.get(key) == {"value": 4}
+    assert json.load(open(cache.path(key)))["params"] == {"a": 1}
+
+def testEvictRemovesLeastRecentlyUsed(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    keys = [cache.key({"a": index}, 1, "v1") for index in range(4)]
+    for index, key in enumerate(keys):
+        cache.put(key, {"a": index}, 1, "v1", {"value": index})
+        os.utime(cache.path(key), (1000 + index, 1000 + index))
+    os.utime(cache.path(keys[0]), (2000, 2000)) # Used most recently
+    count, size = cache.size()
+    assert count == 4
+    assert cache.evict() == 0 # No limit
+    assert cache.evict(size // 2) == 2
+    assert [cache.get(key) is not None for key in keys] == [True, False, False, True]
+    cache.maxBytes = 0
+    assert cache.evict() == 2
+    assert cache.size() == (0, 0)
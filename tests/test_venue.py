@@ -0,0 +1,36 @@
+# The single venue sample (lib/venue.py) and its WaitLine
+from SimPy.Simulation import Process, initialize, activate, simulate, now, hold, put, passivate
+from lib.venue import Venue
+from lib.waitline import WaitLine
+
+class Rider(Process):
+
+    def ride(self, venue, arrival, served):
+        yield hold, self, arrival
+        venue.waitQueue.join(self, now())
+        venue.lineStats.change(now(), len(venue.waitQueue))
+        yield put, self, venue.lineLevel, 1
+        yield passivate, self
+        served.append((self.name, now()))
+
+def testWaitLineIsFifo():
+    line = WaitLine()
+    for patron in "abc":
+        line.join(patron, 1.0, 2)
+    assert (len(line), len(line.patrons)) == (6, 3)
+    assert [line.leave()[0] for patron in "abc"] == ["a", "b", "c"]
+
+def testVenueServesInArrivalOrderAtItsHourlyRate():
+    initialize()
+    venue = Venue(name = "Ride")
+    activate(venue, venue.start(maxLineLength = 10, setTimeToServe = 5, numPatronsPerHour = 12))
+    served = []
+    for i in range(4):
+        rider = Rider(name = "P%d" % i)
+        activate(rider, rider.ride(venue, 0.1 * i, served))
+    simulate(until = 60)
+    # 12 patrons per hour is one every 5 minutes, each served for 5 minutes
+    assert [name for name, time in served] == ["P0", "P1", "P2", "P3"]
+    assert [round(time, 6) for name, time in served] == [5.0, 10.0, 15.0, 20.0]
+    assert venue.lineStats.served == 4
+    assert len(venue.waitQueue) == 0
@@ -0,0 +1,40 @@
+# Leaving a warm-up period out of a run's outputs (LineStats.restart, PatronTable.resetCounters)
+import pytest
+import Patron
+from lib.linestats import LineStats
+from lib.patrontable import PatronTable
+
+def testLineStatsRestartKeepsPatronsInLine():
+    stats = LineStats(4)
+    stats.change(0.0, 4)
+    stats.observeDelay(5.0)
+    stats.discourage()
+    stats.restart(10.0)
+    assert (stats.served, stats.discouraged, stats.delaySum) == (0, 0, 0.0)
+    stats.change(20.0, 0)
+    assert stats.minutesFull == 10.0
+    assert stats.timeAverage(30.0) == pytest.approx(2.0)
+
+def testResetCountersLeavesOutPatronsGoneByThen():
+    table = PatronTable()
+    gone = table.add(0, 0.0, 60.0)
+    staying = table.add(0, 0.0, 12 * 60.0)
+    table.venuesVisited[gone] = 9
+    table.resetCounters(120.0)
+    late = table.add(0, 200.0, 12 * 60.0)
+    table.venuesVisited[staying] = 4
+    table.venuesVisited[late] = 2
+    outputs = table.dailyOutputs()
+    assert outputs["averageVenuesVisited"] == 3.0
+    assert outputs["maxVenuesVisited"] == 4
+
+@pytest.mark.parametrize("backend", ["simpy", "kernel"])
+def testWarmUpLeavesOutTheMorning(backend):
+    day = Patron.runReplication(4, 300, backend = backend, servers = 2)
+    afternoon = Patron.runReplication(4, 300, backend = backend, servers = 2, warmUp = 6*60)
+    assert 0 < afternoon["patronsServed"] < day["patronsServed"]
+    assert afternoon["discouragedPatrons"] < day["discouragedPatrons"]
+
+def testWarmUpNeedsOnlineStatistics():
+    with pytest.raises(ValueError):
+        Patron.runReplication(4, 50, statisticsMode = "monitor", warmUp = 60)
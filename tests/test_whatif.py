@@ -0,0 +1,62 @@
+# What-if variants forked from a shared morning (Patron.whatIf, lib/whatif.py)
+import os
+import time
+import pytest
+import Patron
+from lib.whatif import forkVariants
+
+variants = [{"name": "base"}, {"name": "cap5", "venues": {"Ride A0": {"capacity": 5}}}]
+
+@pytest.mark.parametrize("backend", ["simpy", "kernel"])
+def testCapacityVariantChangesLineDelayWithLimitedServers(backend):
+    base, cap5 = Patron.whatIf(3, 300, 2*60, variants, backend = backend, processes = 1, servers = 1)
+    assert base["variant"] == "base" and cap5["variant"] == "cap5"
+    assert base["meanLineDelay"] > 0
+    assert cap5["meanLineDelay"] != base["meanLineDelay"]
+
+@pytest.mark.parametrize("backend", ["simpy", "kernel"])
+def testUnchangedVariantMatchesFullDay(backend):
+    base, = Patron.whatIf(3, 300, 2*60, variants[:1], backend = backend, processes = 1, servers = 1, streams = "independent")
+    day = Patron.runReplication(3, 300, backend = backend, servers = 1, streams = "independent")
+    for metric in ["patronsServed", "meanLineDelay", "discouragedPatrons"]:
+        assert base[metric] == day[metric]
+
+# A capacity cut leaves the line longer than its capacity, which must stay masked until it drops below it
+def testCapacityCutKeepsSamplerMasksBalanced():
+    Patron.seed(3)
+    Patron.startPark(3000, servers = 1)
+    Patron.simulateCountingEvents(2*60)
+    Patron.setVenue("Ride A0", capacity = 3)
+    venue = [venue for venue in Patron.venueTable if venue.name == "Ride A0"][0]
+    lowest = [0]
+    setLineFull = venue.setLineFull
+    def checkedSetLineFull(full):
+        setLineFull(full)
+        lowest[0] = min(lowest[0], min(Patron.venueSampler.masks))
+    venue.setLineFull = checkedSetLineFull
+    Patron.simulateCountingEvents(12*60)
+    assert lowest[0] == 0
+    assert Patron.venueSampler.masks[venue.sampleIndex] == int(len(venue.waitQueue) >= venue.lineCapacity)
+
+def failOrWait(variant):
+    if (variant == "fail"):
+        raise ValueError("variant failed")
+    time.sleep(60)
+
+def testFailedVariantStopsAndReapsTheOthers(monkeypatch):
+    children = []
+    fork = os.fork
+    def recordingFork():
+        pid = fork()
+        if (pid != 0):
+            children.append(pid)
+        return pid
+    monkeypatch.setattr(os, "fork", recordingFork)
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match = "variant failed"):
+        forkVariants(["fail", "wait", "wait"], failOrWait, processes = 3)
+    assert time.perf_counter() - started < 30
+    assert len(children) == 3
+    for pid in children:
+        with pytest.raises(ChildProcessError):
+            os.waitpid(pid, os.WNOHANG)
@@ -0,0 +1,25 @@
+
+# tracedump.py
+# Renders a binary trace file written by Patron.py --trace-file as the
+# human readable "10:05AM Patron P1 ..." lines
+
+from lib.tracing import readRecords, render
+import argparse
+import json
+
+parser = argparse.ArgumentParser(description = "Render an amusement park trace file")
+parser.add_argument("tracefile", help = "binary trace file written by Patron.py --trace-file")
+parser.add_argument("--patron", help = "only show events for this patron, e.g. P1")
+args = parser.parse_args()
+
+with open(args.tracefile + ".names") as namesFile:
+    names = json.load(namesFile)
+venueNames = names["venues"]
+patronNames = names["patrons"]
+
+for time, code, patronId, venueId, value in readRecords(args.tracefile):
+    patronName = patronNames[patronId] if patronId >= 0 else ""
+    if (args.patron != None and patronName != args.patron):
+    	continue
+    venueName = venueNames[venueId] if venueId >= 0 else ""
+    print (render(time, code, patronName, venueName, value))